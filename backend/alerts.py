@@ -0,0 +1,223 @@
+"""
+Price alerts ("notify me when AAPL goes above $180").
+Each symbol keeps its active alerts in two lists sorted by threshold, one for
+alerts waiting for the price to rise to them and one for alerts waiting for it
+to fall. The "above" list is kept in descending threshold order and the
+"below" list in ascending order. Every alert still in a list has not fired
+yet, so on a price update the fired ones are exactly a suffix of either list;
+a bisect finds the cut and the tail is removed. Evaluation cost therefore
+depends on how many alerts fire, not on how many exist. Fired alerts
+are kept as per-user events that clients poll with a cursor.
+"""
+import itertools
+import logging
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("above", "below")
+
+# Active alerts allowed per user
+MAX_ALERTS_PER_USER = 200
+
+# Fired events remembered per user for polling
+MAX_EVENTS_PER_USER = 200
+
+
+class Alert:
+    """An active price alert."""
+    __slots__ = ("id", "user_id", "symbol", "direction", "threshold", "created_at")
+
+    def __init__(self, user_id, symbol, direction, threshold):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.symbol = symbol
+        self.direction = direction
+        self.threshold = threshold
+        self.created_at = datetime.now().isoformat()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "direction": self.direction,
+            "price": self.threshold,
+            "created_at": self.created_at,
+        }
+
+
+class _SortedAlerts:
+    """
+    Alerts of one symbol and direction, ordered so the next to fire are at the end.
+
+    "below" alerts are kept by ascending threshold; "above" alerts by
+    descending threshold (ascending negated threshold). Either way the alerts a
+    price fires are a suffix, removed in time proportional to their number.
+    """
+    def __init__(self, direction):
+        self.sign = -1 if direction == "above" else 1
+        self.keys = []
+        self.alerts = []
+
+    def add(self, alert):
+        key = self.sign * alert.threshold
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.alerts.insert(position, alert)
+
+    def remove(self, alert):
+        position = bisect_left(self.keys, self.sign * alert.threshold)
+        while self.alerts[position] is not alert:
+            position += 1
+        del self.keys[position]
+        del self.alerts[position]
+
+    def pop_crossed(self, price):
+        """Remove and return the alerts the price reaches (at or past their threshold)."""
+        cut = bisect_left(self.keys, self.sign * price)
+        fired = self.alerts[cut:]
+        del self.keys[cut:]
+        del self.alerts[cut:]
+        return fired
+
+    def __len__(self):
+        return len(self.alerts)
+
+
+class AlertEngine:
+    """
+    Stores alerts, evaluates them on price updates and queues fired events.
+    """
+    def __init__(self, max_alerts_per_user=MAX_ALERTS_PER_USER, max_events_per_user=MAX_EVENTS_PER_USER):
+        self.max_alerts_per_user = max_alerts_per_user
+        self.max_events_per_user = max_events_per_user
+        self._above = {}
+        self._below = {}
+        self._by_user = {}
+        self._events = {}
+        self._last_price = {}
+        self._event_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, user_id, symbol, threshold, direction=None):
+        """
+        Add an alert.
+
+        Args:
+            user_id: The user to notify
+            symbol: The stock symbol
+            threshold: Price to watch for
+            direction: 'above' or 'below'; when omitted it is inferred from the
+                last price seen for the symbol (above if the threshold is higher)
+
+        Returns:
+            The new Alert
+
+        Raises:
+            ValueError: If the input is invalid, the direction cannot be
+                inferred or the user has too many alerts
+        """
+        symbol = symbol.upper()
+        if threshold <= 0:
+            raise ValueError("Price must be greater than zero")
+        if direction is not None and direction not in DIRECTIONS:
+            raise ValueError("direction must be 'above' or 'below'")
+
+        with self._lock:
+            if direction is None:
+                last = self._last_price.get(symbol)
+                if last is None:
+                    raise ValueError(f"No recent price for {symbol}; direction is required")
+                direction = "above" if threshold > last else "below"
+
+            alerts = self._by_user.setdefault(user_id, {})
+            if len(alerts) >= self.max_alerts_per_user:
+                raise ValueError(f"At most {self.max_alerts_per_user} active alerts are allowed")
+
+            alert = Alert(user_id, symbol, direction, threshold)
+            books = self._above if direction == "above" else self._below
+            books.setdefault(symbol, _SortedAlerts(direction)).add(alert)
+            alerts[alert.id] = alert
+        logger.info(f"Created alert {alert.id} for user {user_id}: {symbol} {direction} ${threshold}")
+        return alert
+
+    def delete(self, user_id, alert_id):
+        """Remove an active alert; returns it, or None if the user has no such alert."""
+        with self._lock:
+            alert = self._by_user.get(user_id, {}).pop(alert_id, None)
+            if alert is None:
+                return None
+            books = self._above if alert.direction == "above" else self._below
+            books[alert.symbol].remove(alert)
+        return alert
+
+    def alerts_for(self, user_id):
+        """Return a user's active alerts, newest first."""
+        with self._lock:
+            alerts = list(self._by_user.get(user_id, {}).values())
+        return sorted(alerts, key=lambda alert: alert.created_at, reverse=True)
+
+    def on_prices(self, prices):
+        """
+        Evaluate a batch of price updates.
+
+        Args:
+            prices: Dict of symbol to latest price
+
+        Returns:
+            Number of alerts fired
+        """
+        fired = 0
+        with self._lock:
+            for symbol, price in prices.items():
+                self._last_price[symbol] = price
+                triggered = []
+                for books in (self._above, self._below):
+                    alerts = books.get(symbol)
+                    if alerts:
+                        triggered.extend(alerts.pop_crossed(price))
+                for alert in triggered:
+                    self._fire(alert, price)
+                fired += len(triggered)
+        if fired:
+            logger.info(f"Fired {fired} price alerts")
+        return fired
+
+    def _fire(self, alert, price):
+        del self._by_user[alert.user_id][alert.id]
+        events = self._events.get(alert.user_id)
+        if events is None:
+            events = self._events[alert.user_id] = deque(maxlen=self.max_events_per_user)
+        event = alert.to_dict()
+        event.update({
+            "event_id": next(self._event_ids),
+            "alert_id": alert.id,
+            "triggered_price": price,
+            "triggered_at": datetime.now().isoformat(),
+        })
+        del event["id"]
+        events.append(event)
+
+    def events_for(self, user_id, after=0):
+        """
+        Return fired alert events newer than a cursor.
+
+        Args:
+            user_id: The user
+            after: Last event_id the client has seen
+
+        Returns:
+            (events oldest first, cursor to pass as `after` next time)
+        """
+        with self._lock:
+            events = [event for event in self._events.get(user_id, ()) if event["event_id"] > after]
+        cursor = events[-1]["event_id"] if events else after
+        return events, cursor
+
+
+# Shared engine instance
+alert_engine = AlertEngine()
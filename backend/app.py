@@ -2,15 +2,46 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
 import logging
-from dotenv import load_dotenv
-import yfinance as yf
 from datetime import datetime, timedelta
-from supabase import create_client, Client
 from functools import wraps
 from rate_limiter import RateLimiter
-
-# Load environment variables
-load_dotenv()
+from json_provider import FastJSONProvider
+from market_cache import TTLCache
+from market_calendar import market_calendar, PERIOD_DAYS
+from database import database
+from lazy import lazy_import
+from latency_budget import upstream_budget
+import http_cache
+from trades import execute_trade, execute_batch, TradeError, MAX_BATCH_LEGS
+from orders import order_engine
+from alerts import alert_engine
+from leaderboard import leaderboard, MAX_PAGE
+import watchlists
+from watchlists import WatchlistError
+import mock_db
+import write_behind
+
+# Heavy dependencies load on first use so cold starts can answer lightweight
+# routes (health checks) without importing pandas, NumPy or yfinance
+yf = lazy_import("yfinance")
+np = lazy_import("numpy")
+market_service = lazy_import("market_service", "market_service")
+http_session = lazy_import("http_session")
+bar_store = lazy_import("bar_store", "bar_store")
+Bars = lazy_import("bar_store", "Bars")
+synthetic_bars = lazy_import("bar_store", "synthetic_bars")
+downsample = lazy_import("downsample")
+series_formats = lazy_import("series_formats")
+intraday = lazy_import("intraday")
+intraday_store = lazy_import("intraday", "intraday_store")
+compare = lazy_import("compare")
+indicators = lazy_import("indicators")
+backtest = lazy_import("backtest")
+risk = lazy_import("risk")
+montecarlo = lazy_import("montecarlo")
+txlog = lazy_import("txlog")
+screener = lazy_import("screener")
+equity = lazy_import("equity")
 
 # Configure logging
 logging.basicConfig(
@@ -21,41 +52,43 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # Initialize rate limiter (5 calls per minute per symbol)
 rate_limiter = RateLimiter(max_calls=5, period=60)
 
-# Initialize Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-
-# Flag to track if we're using mock database
-using_mock_db = False
-
-try:
-    if not supabase_url or not supabase_key:
-        logger.warning("Missing required environment variables. Using mock database.")
-        missing_vars = []
-        if not supabase_url:
-            missing_vars.append("SUPABASE_URL")
-        if not supabase_key:
-            missing_vars.append("SUPABASE_KEY")
-        logger.warning(f"Missing variables: {', '.join(missing_vars)}")
-
-        # Import mock database
-        import mock_db
-        supabase = mock_db.mock_supabase
-        using_mock_db = True
-    else:
-        # Initialize real Supabase client
-        supabase: Client = create_client(supabase_url, supabase_key)
-except Exception as e:
-    logger.error(f"Error initializing Supabase client: {str(e)}")
-    logger.warning("Falling back to mock database")
-    import mock_db
-    supabase = mock_db.mock_supabase
-    using_mock_db = True
+# Market data caches hold encoded response bodies. While a market is trading
+# entries live for the TTLs below; once it has closed they are kept until the
+# next session opens.
+# Expired entries are kept for a day more so a route whose upstream misses its
+# latency budget can answer with stale data instead of mock data.
+QUOTE_TTL_OPEN = 30
+DAILY_TTL_OPEN = 300
+STALE_MAX_AGE = 24 * 60 * 60
+quote_cache = TTLCache(max_entries=2048, max_stale=STALE_MAX_AGE)
+daily_cache = TTLCache(max_entries=512, max_stale=STALE_MAX_AGE)
+
+# Intraday responses per (symbol, interval, range, format); refreshed every minute
+# while the market is trading
+INTRADAY_TTL_OPEN = 60
+intraday_cache = TTLCache(max_entries=1024, max_stale=STALE_MAX_AGE)
+
+# Search metadata rarely changes, so matches are kept for an hour
+SEARCH_TTL = 60 * 60
+search_cache = TTLCache(max_entries=1024, max_stale=STALE_MAX_AGE)
+
+# Indicator results keyed by (symbol, range, last bar, spec); the key changes
+# whenever a new bar arrives, so entries only need a long backstop TTL
+INDICATOR_TTL = 24 * 60 * 60
+indicator_cache = TTLCache(max_entries=1024)
+
+# Most symbols fetched in one watchlist refresh: the opened list comes first,
+# then the user's other lists
+WATCHLIST_BATCH_SYMBOLS = 100
+
+# Comparison payloads keyed by (symbols, range, normalize, max_points, last bar of each symbol)
+compare_cache = TTLCache(max_entries=512)
 
 # Authentication decorator
 def require_auth(f):
@@ -74,6 +107,103 @@ def validate_request_data(data, required_fields):
         return False, f"Missing required fields: {', '.join(missing_fields)}"
     return True, None
 
+# Trade validation helper shared by single and batch submissions
+def parse_trade(data):
+    """Validate trade fields; returns ((symbol, quantity, price, type) or None, error message or None)"""
+    required_fields = ['symbol', 'quantity', 'price', 'type']
+    is_valid, error_message = validate_request_data(data, required_fields)
+    if not is_valid:
+        return None, error_message
+
+    # Validate data types
+    try:
+        symbol = data['symbol']
+        quantity = int(data['quantity'])
+        price = float(data['price'])
+        trade_type = data['type']
+    except (ValueError, TypeError):
+        return None, "Invalid data types provided"
+
+    # Additional validations
+    if quantity <= 0:
+        return None, "Quantity must be greater than zero"
+    if price <= 0:
+        return None, "Price must be greater than zero"
+    if trade_type not in ['buy', 'sell']:
+        return None, "Type must be 'buy' or 'sell'"
+    return (symbol, quantity, price, trade_type), None
+
+# Cache an encoded market data body for HTTP responses
+def cache_body(cache, key, body, ttl, mimetype="application/json"):
+    entry = http_cache.CachedBody(body, ttl, mimetype)
+    cache.set(key, entry, ttl)
+    return entry
+
+# Run an upstream fetch within the route's latency budget and pick the best answer
+def respond_within_budget(route, cache, key, fetch, stale_while_revalidate, mock, vary=None):
+    """
+    Serve a fresh upstream result if it arrives within the route's budget,
+    otherwise a stale cache entry, otherwise mock data. A fetch that misses the
+    budget keeps running in the background and fills the cache.
+    """
+    try:
+        finished, entry = upstream_budget.run(route, (route, key), fetch)
+    except Exception as e:
+        logger.error(f"Error fetching {route} data for {key}: {str(e)}")
+        finished, entry = True, None
+
+    if entry is not None:
+        return http_cache.respond(entry, stale_while_revalidate, vary)
+
+    stale = cache.get_stale(key)
+    if stale is not None:
+        logger.info(f"Serving stale {route} data for {key}")
+        return http_cache.respond(stale, stale_while_revalidate, vary, source="stale")
+    return mock()
+
+# Serve a rate-limited request from stale cache if possible, otherwise mock data
+def respond_rate_limited(cache, key, stale_while_revalidate, mock, vary=None):
+    stale = cache.get_stale(key)
+    if stale is not None:
+        return http_cache.respond(stale, stale_while_revalidate, vary, source="stale")
+    return mock()
+
+# Optional max_points query parameter for series endpoints
+def parse_max_points():
+    """Read max_points from the query string; returns (value or None, error message or None)"""
+    raw = request.args.get('max_points')
+    if not raw:
+        return None, None
+    try:
+        value = int(raw)
+    except ValueError:
+        return None, "max_points must be an integer"
+    if value < 3:
+        return None, "max_points must be at least 3"
+    return value, None
+
+# Portfolio loading helper for analytics routes
+def load_portfolio_rows(user_id):
+    """Load a user's portfolio rows, falling back to the mock database on errors"""
+    if database.using_mock:
+        return mock_db.get_user_portfolio(user_id)
+
+    try:
+        response = database.client.table('portfolios').select('*').eq('user_id', user_id).execute()
+        return response.data
+    except Exception as e:
+        logger.error(f"Error retrieving portfolio for user {user_id}: {str(e)}")
+        logger.warning(f"Falling back to mock database for portfolio")
+        return mock_db.get_user_portfolio(user_id)
+
+def holdings_quantities(rows):
+    """Sum portfolio row quantities per upper-cased symbol, dropping empty positions"""
+    quantities = {}
+    for row in rows:
+        symbol = str(row['symbol']).upper()
+        quantities[symbol] = quantities.get(symbol, 0) + float(row['quantity'])
+    return {symbol: quantity for symbol, quantity in quantities.items() if quantity > 0}
+
 # Routes
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -83,6 +213,19 @@ def health_check():
         "environment": "Vercel" if os.environ.get("VERCEL") else "Development"
     })
 
+@app.route('/api/health/upstream', methods=['GET'])
+def upstream_health():
+    """Connection reuse statistics for the shared upstream HTTP session"""
+    return jsonify(http_session.stats())
+
+@app.route('/api/health/journal', methods=['GET'])
+def journal_health():
+    """Write-behind journal counters (appended, flushed, backlog, flush requests, fsyncs)"""
+    journal = write_behind.get_journal()
+    if journal is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **journal.stats()})
+
 @app.route('/', methods=['GET'])
 def root():
     """Root endpoint for Vercel deployment health check"""
@@ -101,81 +244,78 @@ def search_stocks():
     if not keywords:
         return jsonify({"error": "Keywords parameter is required"}), 400
 
+    # Serve cached matches; conditional requests get a 304
+    cached = search_cache.get(keywords.upper())
+    if cached is not None:
+        return http_cache.respond(cached, SEARCH_TTL)
+
     # Check if we're being rate limited
     if not rate_limiter.can_call("search_" + keywords):
-        logger.info(f"Rate limited for search with keywords {keywords}, using mock data")
-        return fallback_to_mock_search(keywords)
+        logger.info(f"Rate limited for search with keywords {keywords}, using cached or mock data")
+        return respond_rate_limited(search_cache, keywords.upper(), SEARCH_TTL, lambda: fallback_to_mock_search(keywords))
+
+    return respond_within_budget(
+        "search", search_cache, keywords.upper(), lambda: fetch_search(keywords),
+        SEARCH_TTL, lambda: fallback_to_mock_search(keywords)
+    )
 
+def fetch_search(keywords):
+    """Search upstream and cache the encoded matches; returns None if nothing was found"""
     try:
         # Use yfinance to search for tickers
-        try:
-            tickers = yf.Tickers(keywords)
-
-            # If the exact ticker doesn't exist, try to search for similar ones
-            if not tickers.tickers:
-                # This is a simple approach - in a real app, you might want to use a more sophisticated search
-                # For now, we'll just check if the ticker exists by trying to get its info
-                try:
-                    ticker = yf.Ticker(keywords)
-                    info = ticker.info
-                    if not info or 'symbol' not in info:
-                        logger.warning(f"No symbol info found for {keywords}")
-                        return fallback_to_mock_search(keywords)
-
-                    # Format the response to match the expected format in the frontend
-                    result = {
-                        "bestMatches": [
-                            {
-                                "1. symbol": info.get('symbol', keywords),
-                                "2. name": info.get('shortName', info.get('longName', keywords)),
-                                "3. type": "Equity",
-                                "4. region": info.get('country', "United States"),
-                                "5. marketOpen": "09:30",
-                                "6. marketClose": "16:00",
-                                "7. timezone": "UTC-04",
-                                "8. currency": info.get('currency', "USD"),
-                                "9. matchScore": "1.0000"
-                            }
-                        ]
-                    }
-                    return jsonify(result)
-                except Exception as e:
-                    logger.error(f"Error searching for ticker {keywords}: {str(e)}")
-                    return fallback_to_mock_search(keywords)
+        tickers = yf.Tickers(keywords, session=http_session.get_session())
+
+        # If the exact ticker doesn't exist, try to search for similar ones
+        if not tickers.tickers:
+            # This is a simple approach - in a real app, you might want to use a more sophisticated search
+            # For now, we'll just check if the ticker exists by trying to get its info
+            info = market_service.get_info(keywords)
+            if not info or 'symbol' not in info:
+                logger.warning(f"No symbol info found for {keywords}")
+                return None
 
             # Format the response to match the expected format in the frontend
-            result = {"bestMatches": []}
-            for symbol, ticker in tickers.tickers.items():
-                try:
-                    info = ticker.info
-                    if info and 'symbol' in info:
-                        match = {
-                            "1. symbol": info.get('symbol', symbol),
-                            "2. name": info.get('shortName', info.get('longName', symbol)),
-                            "3. type": "Equity",
-                            "4. region": info.get('country', "United States"),
-                            "5. marketOpen": "09:30",
-                            "6. marketClose": "16:00",
-                            "7. timezone": "UTC-04",
-                            "8. currency": info.get('currency', "USD"),
-                            "9. matchScore": "1.0000"
-                        }
-                        result["bestMatches"].append(match)
-                except Exception as e:
-                    logger.error(f"Error getting info for ticker {symbol}: {str(e)}")
-                    continue
-
-            if not result["bestMatches"]:
-                logger.warning(f"No matches found for {keywords}")
-                return fallback_to_mock_search(keywords)
+            result = {
+                "bestMatches": [
+                    {
+                        "1. symbol": info.get('symbol', keywords),
+                        "2. name": info.get('shortName', info.get('longName', keywords)),
+                        "3. type": "Equity",
+                        "4. region": info.get('country', "United States"),
+                        **market_calendar.session_metadata(keywords),
+                        "8. currency": info.get('currency', "USD"),
+                        "9. matchScore": "1.0000"
+                    }
+                ]
+            }
+            return cache_body(search_cache, keywords.upper(), app.json.encode_body(result), SEARCH_TTL)
 
-            return jsonify(result)
-        except Exception as e:
-            logger.error(f"Error with yfinance Tickers for {keywords}: {str(e)}")
-            return fallback_to_mock_search(keywords)
+        # Fetch info for every matched ticker concurrently
+        infos = market_service.get_infos(tickers.tickers.keys())
+
+        # Format the response to match the expected format in the frontend
+        result = {"bestMatches": []}
+        for symbol, info in infos.items():
+            if info and 'symbol' in info:
+                match = {
+                    "1. symbol": info.get('symbol', symbol),
+                    "2. name": info.get('shortName', info.get('longName', symbol)),
+                    "3. type": "Equity",
+                    "4. region": info.get('country', "United States"),
+                    **market_calendar.session_metadata(symbol),
+                    "8. currency": info.get('currency', "USD"),
+                    "9. matchScore": "1.0000"
+                }
+                result["bestMatches"].append(match)
+
+        if not result["bestMatches"]:
+            logger.warning(f"No matches found for {keywords}")
+            return None
+
+        return cache_body(search_cache, keywords.upper(), app.json.encode_body(result), SEARCH_TTL)
     except Exception as e:
-        logger.error(f"Error searching for stocks: {str(e)}")
-        return fallback_to_mock_search(keywords)
+        logger.error(f"Error with yfinance Tickers for {keywords}: {str(e)}")
+        return None
 
 def fallback_to_mock_search(keywords):
     """Fallback to mock search results when API fails"""
@@ -282,7 +422,7 @@ def fallback_to_mock_search(keywords):
     else:
         results = all_stocks
 
-    return jsonify({"bestMatches": results})
+    return http_cache.mark_source(jsonify({"bestMatches": results}), "mock")
 
 @app.route('/api/market/quote/<symbol>', methods=['GET'])
 def get_stock_quote(symbol):
@@ -290,73 +430,155 @@ def get_stock_quote(symbol):
     if not symbol:
         return jsonify({"error": "Stock symbol is required"}), 400
 
+    # Serve from cache while the entry is fresh (held until the next open when the market is closed)
+    cached = quote_cache.get(symbol.upper())
+    if cached is not None:
+        return http_cache.respond(cached, QUOTE_TTL_OPEN)
+
     # Check if we're being rate limited
     if not rate_limiter.can_call(symbol):
-        logger.info(f"Rate limited for symbol {symbol}, using mock data")
-        return fallback_to_mock_data(symbol)
-
-    try:
-        # Get stock data using yfinance with more parameters for reliability
-        ticker = yf.Ticker(symbol)
-
-        # Try to get info first to verify the symbol exists
-        try:
-            info = ticker.info
-            if not info or 'regularMarketPrice' not in info:
-                logger.warning(f"Symbol {symbol} info not available or incomplete")
-                # Fall back to mock data if available
-                return fallback_to_mock_data(symbol)
-        except Exception as info_err:
-            logger.warning(f"Error getting info for {symbol}: {str(info_err)}")
-            # Continue anyway, as history might still work
-
-        # Try different periods if 1d doesn't work
-        for period in ["1d", "5d", "1mo"]:
-            try:
-                quote = ticker.history(period=period)
-                if not quote.empty:
-                    break
-            except Exception as period_err:
-                logger.warning(f"Error getting {period} history for {symbol}: {str(period_err)}")
-                continue
-
-        if quote.empty:
-            logger.warning(f"No data found for symbol {symbol} after trying multiple periods")
-            return fallback_to_mock_data(symbol)
-
-        # Get the latest price data
-        latest = quote.iloc[-1]
-        prev_close = quote.iloc[0]['Close'] if len(quote) > 1 else latest['Open']
-
-        # Calculate change and change percent
-        change = latest['Close'] - prev_close
-        change_percent = (change / prev_close) * 100 if prev_close > 0 else 0
-
-        # Format the response to match the expected format in the frontend
-        result = {
-            "Global Quote": {
-                "01. symbol": symbol,
-                "02. open": str(latest['Open']),
-                "03. high": str(latest['High']),
-                "04. low": str(latest['Low']),
-                "05. price": str(latest['Close']),
-                "06. volume": str(int(latest['Volume'])),
-                "07. latest trading day": quote.index[-1].strftime("%Y-%m-%d"),
-                "08. previous close": str(prev_close),
-                "09. change": str(round(change, 4)),
-                "10. change percent": f"{round(change_percent, 4)}%"
-            }
+        logger.info(f"Rate limited for symbol {symbol}, using cached or mock data")
+        return respond_rate_limited(quote_cache, symbol.upper(), QUOTE_TTL_OPEN, lambda: fallback_to_mock_data(symbol))
+
+    return respond_within_budget(
+        "quote", quote_cache, symbol.upper(), lambda: fetch_quote(symbol),
+        QUOTE_TTL_OPEN, lambda: fallback_to_mock_data(symbol)
+    )
+
+def fetch_quote(symbol):
+    """Fetch a quote upstream and cache the encoded body; returns None if unavailable"""
+    # Get info and history concurrently; info verifies the symbol exists
+    info, quote = market_service.get_quote_data(symbol, ["1d", "5d", "1mo"])
+    if info is not None and 'regularMarketPrice' not in info:
+        logger.warning(f"Symbol {symbol} info not available or incomplete")
+        return None
+
+    if quote is None:
+        logger.warning(f"No data found for symbol {symbol} after trying multiple periods")
+        return None
+
+    result = quote_payload(symbol, quote)
+    # Resting limit/stop orders, price alerts and the leaderboard follow every live price
+    publish_prices({symbol.upper(): float(quote.iloc[-1]['Close'])})
+    ttl = market_calendar.cache_ttl(symbol, QUOTE_TTL_OPEN)
+    return cache_body(quote_cache, symbol.upper(), app.json.encode_body(result), ttl)
+
+def quote_payload(symbol, quote):
+    """Build the quote response from a symbol's recent daily history"""
+    # Get the latest price data
+    latest = quote.iloc[-1]
+    prev_close = quote.iloc[0]['Close'] if len(quote) > 1 else latest['Open']
+
+    # Calculate change and change percent
+    change = latest['Close'] - prev_close
+    change_percent = (change / prev_close) * 100 if prev_close > 0 else 0
+
+    # Format the response to match the expected format in the frontend
+    return {
+        "Global Quote": {
+            "01. symbol": symbol,
+            "02. open": str(latest['Open']),
+            "03. high": str(latest['High']),
+            "04. low": str(latest['Low']),
+            "05. price": str(latest['Close']),
+            "06. volume": str(int(latest['Volume'])),
+            "07. latest trading day": quote.index[-1].strftime("%Y-%m-%d"),
+            "08. previous close": str(prev_close),
+            "09. change": str(round(change, 4)),
+            "10. change percent": f"{round(change_percent, 4)}%"
         }
+    }
 
-        return jsonify(result)
-    except Exception as e:
-        logger.error(f"Error fetching stock quote for {symbol}: {str(e)}")
-        return fallback_to_mock_data(symbol)
+def publish_prices(prices):
+    """Check resting orders, price alerts and the leaderboard against live prices"""
+    order_engine.submit_prices(prices)
+    alert_engine.on_prices(prices)
+    leaderboard.on_prices(prices)
+
+def refresh_quotes(symbols):
+    """
+    Fetch the latest daily bar of each symbol concurrently, cache the quotes and publish the prices.
+
+    Returns:
+        Dict of symbol to quote payload for the symbols upstream had data for
+    """
+    frames = {
+        symbol: frame for symbol, frame in market_service.get_histories(symbols, ["1d"]).items()
+        if frame is not None
+    }
+    results = {}
+    for symbol, frame in frames.items():
+        results[symbol] = quote_payload(symbol, frame)
+        ttl = market_calendar.cache_ttl(symbol, QUOTE_TTL_OPEN)
+        cache_body(quote_cache, symbol, app.json.encode_body(results[symbol]), ttl)
+    if frames:
+        publish_prices({symbol: float(frame.iloc[-1]['Close']) for symbol, frame in frames.items()})
+    return results
+
+def refresh_order_prices(symbols):
+    """Refresh symbols with resting orders whose market is open (called by the order poller)"""
+    symbols = [symbol for symbol in symbols if market_calendar.is_open(symbol) and rate_limiter.can_call(symbol)]
+    if symbols:
+        refresh_quotes(symbols)
+
+# Symbols nobody is quoting still get prices while they have open orders
+order_engine.refresh = refresh_order_prices
+
+def resolve_quotes(symbols, prefetch=()):
+    """
+    Get quotes for many symbols in one round of concurrent upstream requests.
+
+    Fresh cache entries are used as they are. The other symbols, together with
+    uncached symbols from prefetch (deduplicated), are fetched concurrently, one
+    history request per symbol, within the watchlist budget; the results fill
+    the quote cache. Symbols still without a quote get a stale cache entry or
+    mock data.
+
+    Args:
+        symbols: Upper-cased symbols to return quotes for
+        prefetch: Further symbols worth caching in the same call
+
+    Returns:
+        (dict of symbol to (quote, source), number of upstream requests made)
+    """
+    wanted = set(symbols)
+    quotes, missing = {}, []
+    for symbol in dict.fromkeys([*symbols, *prefetch]):
+        entry = quote_cache.get(symbol)
+        if entry is None:
+            missing.append(symbol)
+        elif symbol in wanted:
+            quotes[symbol] = (app.json.loads(entry.body)["Global Quote"], "cache")
+    missing = [symbol for symbol in missing[:WATCHLIST_BATCH_SYMBOLS] if rate_limiter.can_call(symbol)]
+
+    fetched = {}
+    if missing:
+        try:
+            _, fetched = upstream_budget.run("watchlist", ("watchlist", tuple(missing)), lambda: refresh_quotes(missing))
+        except Exception as e:
+            logger.error(f"Error fetching quotes for {len(missing)} symbols: {str(e)}")
+        fetched = fetched or {}
+
+    for symbol in symbols:
+        if symbol in quotes:
+            continue
+        if symbol in fetched:
+            quotes[symbol] = (fetched[symbol]["Global Quote"], "live")
+            continue
+        stale = quote_cache.get_stale(symbol)
+        if stale is not None:
+            quotes[symbol] = (app.json.loads(stale.body)["Global Quote"], "stale")
+        else:
+            quotes[symbol] = (mock_quote_payload(symbol)["Global Quote"], "mock")
+    return quotes, len(missing)
 
 def fallback_to_mock_data(symbol):
     """Fallback to mock data when API fails"""
     logger.info(f"Falling back to mock data for {symbol}")
+    return http_cache.mark_source(jsonify(mock_quote_payload(symbol)), "mock")
 
+def mock_quote_payload(symbol):
+    """Mock quote response for a symbol"""
     # Create mock data for the symbol
     mock_quote = {
         "Global Quote": {
@@ -419,7 +641,7 @@ def fallback_to_mock_data(symbol):
             "10. change percent": "0.74%"
         })
 
-    return jsonify(mock_quote)
+    return mock_quote
 
 @app.route('/api/market/daily/<symbol>', methods=['GET'])
 def get_daily_data(symbol):
@@ -427,61 +649,108 @@ def get_daily_data(symbol):
     if not symbol:
         return jsonify({"error": "Stock symbol is required"}), 400
 
-    # Check if we're being rate limited
-    if not rate_limiter.can_call(symbol + "_daily"):
-        logger.info(f"Rate limited for daily data of symbol {symbol}, using mock data")
-        return fallback_to_mock_daily_data(symbol)
+    # Legacy JSON by default; columnar or binary layouts on request
+    fmt = series_formats.negotiate(request.args.get('format'), request.accept_mimetypes)
+    if fmt is None:
+        available = [name for name in series_formats.FORMATS if series_formats.available(name)]
+        return jsonify({"error": f"Unsupported format. Available formats: {', '.join(available)}"}), 406
 
-    try:
-        # Get historical data using yfinance
-        ticker = yf.Ticker(symbol)
+    period = request.args.get('range', '1mo')
+    if period not in PERIOD_DAYS:
+        return jsonify({"error": f"range must be one of: {', '.join(PERIOD_DAYS)}"}), 400
+    max_points, error = parse_max_points()
+    if error:
+        return jsonify({"error": error}), 400
 
-        # Try different periods if 1mo doesn't work
-        for period in ["1mo", "3mo", "6mo"]:
-            try:
-                hist = ticker.history(period=period)
-                if not hist.empty:
-                    break
-            except Exception as period_err:
-                logger.warning(f"Error getting {period} history for {symbol}: {str(period_err)}")
-                continue
+    # Serve from cache while the entry is fresh (held until the next open when the market is closed)
+    cache_key = (symbol.upper(), fmt, period, max_points)
+    cached = daily_cache.get(cache_key)
+    if cached is not None:
+        return http_cache.respond(cached, DAILY_TTL_OPEN, vary='Accept')
 
-        if hist.empty:
-            logger.warning(f"No daily data found for symbol {symbol} after trying multiple periods")
-            return fallback_to_mock_daily_data(symbol)
+    mock = lambda: fallback_to_mock_daily_data(symbol, fmt, period, max_points)
 
-        # Format the response to match the expected format in the frontend
-        time_series = {}
-        for date, row in hist.iterrows():
-            date_str = date.strftime("%Y-%m-%d")
-            time_series[date_str] = {
-                "1. open": str(round(row['Open'], 4)),
-                "2. high": str(round(row['High'], 4)),
-                "3. low": str(round(row['Low'], 4)),
-                "4. close": str(round(row['Close'], 4)),
-                "5. volume": str(int(row['Volume']))
-            }
+    # Check if we're being rate limited
+    if not rate_limiter.can_call(symbol + "_daily"):
+        logger.info(f"Rate limited for daily data of symbol {symbol}, using cached or mock data")
+        return respond_rate_limited(daily_cache, cache_key, DAILY_TTL_OPEN, mock, vary='Accept')
+
+    return respond_within_budget(
+        "daily", daily_cache, cache_key, lambda: fetch_daily_data(symbol, fmt, period, max_points),
+        DAILY_TTL_OPEN, mock, vary='Accept'
+    )
+
+def fetch_daily_data(symbol, fmt, period="1mo", max_points=None):
+    """Fetch daily bars upstream and cache the encoded body; returns None if unavailable"""
+    # Get historical bars, trying longer periods if the requested one doesn't work
+    fallbacks = tuple(longer for longer in ("3mo", "6mo") if PERIOD_DAYS[longer] > PERIOD_DAYS[period])
+    bars = bar_store.get(symbol, period, fallbacks=fallbacks)
+
+    if bars is None:
+        logger.warning(f"No daily data found for symbol {symbol} after trying multiple periods")
+        return None
+
+    body = encode_daily_data(symbol, downsample.downsample_bars(bars, max_points), fmt)
+    ttl = market_calendar.cache_ttl(symbol, DAILY_TTL_OPEN)
+    cache_key = (symbol.upper(), fmt, period, max_points)
+    return cache_body(daily_cache, cache_key, body, ttl, mimetype=series_formats.FORMATS[fmt])
+
+def encode_daily_data(symbol, bars, fmt):
+    """Encode daily bars as a response body in the negotiated format"""
+    if fmt != "legacy":
+        meta = {
+            "information": "Daily Prices (open, high, low, close) and Volumes",
+            "last_refreshed": datetime.now().strftime("%Y-%m-%d"),
+            "time_zone": "US/Eastern",
+            "source": bars.source
+        }
+        return series_formats.encode(fmt, bars, meta, app.json)
 
-        result = {
-            "Meta Data": {
-                "1. Information": "Daily Prices (open, high, low, close) and Volumes",
-                "2. Symbol": symbol,
-                "3. Last Refreshed": datetime.now().strftime("%Y-%m-%d"),
-                "4. Output Size": "Compact",
-                "5. Time Zone": "US/Eastern"
-            },
-            "Time Series (Daily)": time_series
+    # Format the response to match the expected format in the frontend
+    time_series = {}
+    for date_str, open_, high, low, close, volume in zip(
+        bars.date_strings(),
+        bars.open.tolist(),
+        bars.high.tolist(),
+        bars.low.tolist(),
+        bars.close.tolist(),
+        bars.volume.tolist()
+    ):
+        time_series[date_str] = {
+            "1. open": str(round(open_, 4)),
+            "2. high": str(round(high, 4)),
+            "3. low": str(round(low, 4)),
+            "4. close": str(round(close, 4)),
+            "5. volume": str(int(volume))
         }
 
-        return jsonify(result)
-    except Exception as e:
-        logger.error(f"Error fetching daily data for {symbol}: {str(e)}")
-        return fallback_to_mock_daily_data(symbol)
+    result = {
+        "Meta Data": {
+            "1. Information": "Daily Prices (open, high, low, close) and Volumes",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": datetime.now().strftime("%Y-%m-%d"),
+            "4. Output Size": "Compact",
+            "5. Time Zone": "US/Eastern"
+        },
+        "Time Series (Daily)": time_series
+    }
+    return app.json.encode_body(result)
+
+def series_response(body, fmt):
+    """Build a time-series response for an encoded body in the given format"""
+    response = app.response_class(body, mimetype=series_formats.FORMATS[fmt])
+    response.vary.add('Accept')
+    return response
 
-def fallback_to_mock_daily_data(symbol):
+def fallback_to_mock_daily_data(symbol, fmt="legacy", period="1mo", max_points=None):
     """Fallback to mock daily data when API fails"""
     logger.info(f"Falling back to mock daily data for {symbol}")
 
+    # Longer ranges come from the bar store's synthetic series
+    if period != "1mo":
+        bars = downsample.downsample_bars(synthetic_bars(symbol.upper(), PERIOD_DAYS[period]), max_points)
+        return http_cache.mark_source(series_response(encode_daily_data(symbol, bars, fmt), fmt), "mock")
+
     # Generate 30 days of mock data
     time_series = {}
     base_price = 100.0
@@ -541,14 +810,273 @@ def fallback_to_mock_daily_data(symbol):
         "Time Series (Daily)": time_series
     }
 
-    return jsonify(result)
+    if fmt != "legacy" or max_points:
+        bars = Bars.from_time_series(symbol.upper(), time_series, source="mock")
+        bars = downsample.downsample_bars(bars, max_points)
+        return http_cache.mark_source(series_response(encode_daily_data(symbol, bars, fmt), fmt), "mock")
+
+    return http_cache.mark_source(series_response(app.json.encode_body(result), fmt), "mock")
+
+@app.route('/api/market/intraday/<symbol>', methods=['GET'])
+def get_intraday_data(symbol):
+    """Get intraday bars for a stock symbol, resampled server-side to the requested interval"""
+    interval = request.args.get('interval', '5m')
+    period = request.args.get('range', '1d')
+    try:
+        intraday.validate(interval, period)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Columnar JSON by default; binary layouts on request
+    fmt = series_formats.negotiate(request.args.get('format'), request.accept_mimetypes)
+    if fmt is None:
+        available = [name for name in series_formats.FORMATS if series_formats.available(name)]
+        return jsonify({"error": f"Unsupported format. Available formats: {', '.join(available)}"}), 406
+
+    max_points, error = parse_max_points()
+    if error:
+        return jsonify({"error": error}), 400
+
+    cache_key = (symbol.upper(), interval, period, fmt, max_points)
+    cached = intraday_cache.get(cache_key)
+    if cached is not None:
+        return http_cache.respond(cached, INTRADAY_TTL_OPEN, vary='Accept')
+
+    mock = lambda: fallback_to_mock_intraday_data(symbol, interval, period, fmt, max_points)
+
+    if not rate_limiter.can_call(symbol + "_intraday"):
+        logger.info(f"Rate limited for intraday data of symbol {symbol}, using cached or mock data")
+        return respond_rate_limited(intraday_cache, cache_key, INTRADAY_TTL_OPEN, mock, vary='Accept')
+
+    return respond_within_budget(
+        "intraday", intraday_cache, cache_key, lambda: fetch_intraday_data(symbol, interval, period, fmt, max_points),
+        INTRADAY_TTL_OPEN, mock, vary='Accept'
+    )
+
+def fetch_intraday_data(symbol, interval, period, fmt, max_points=None):
+    """Get intraday bars from the intraday store and cache the encoded body; returns None if unavailable"""
+    bars = intraday_store.get(symbol, interval, period)
+    if bars is None:
+        logger.warning(f"No intraday data found for symbol {symbol}")
+        return None
+
+    body = encode_intraday_data(downsample.downsample_bars(bars, max_points), interval, period, fmt)
+    ttl = market_calendar.cache_ttl(symbol, INTRADAY_TTL_OPEN)
+    cache_key = (symbol.upper(), interval, period, fmt, max_points)
+    return cache_body(intraday_cache, cache_key, body, ttl, mimetype=series_formats.FORMATS[fmt])
+
+def encode_intraday_data(bars, interval, period, fmt):
+    """Encode intraday bars; the legacy (default) format is columnar JSON"""
+    meta = {
+        "interval": interval,
+        "range": period,
+        "time_zone": market_calendar.exchange_for(bars.symbol).tz.key,
+        "source": bars.source
+    }
+    return series_formats.encode("columnar" if fmt == "legacy" else fmt, bars, meta, app.json)
+
+def fallback_to_mock_intraday_data(symbol, interval, period, fmt, max_points=None):
+    """Fallback to synthetic intraday bars when the API fails"""
+    logger.info(f"Falling back to mock intraday data for {symbol}")
+    bars = downsample.downsample_bars(intraday_store.mock(symbol, interval, period), max_points)
+    body = encode_intraday_data(bars, interval, period, fmt)
+    response = app.response_class(body, mimetype=series_formats.FORMATS[fmt])
+    response.vary.add('Accept')
+    return http_cache.mark_source(response, "mock")
+
+@app.route('/api/market/compare', methods=['GET'])
+def compare_symbols():
+    """Get several symbols' daily closes aligned on one date index"""
+    symbols = list(dict.fromkeys(
+        s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()
+    ))
+    period = request.args.get('range', '6mo')
+    rebase = request.args.get('normalize', 'false').lower() in ('1', 'true', 'yes')
+
+    if not symbols:
+        return jsonify({"error": "symbols parameter is required"}), 400
+    if len(symbols) > compare.MAX_SYMBOLS:
+        return jsonify({"error": f"At most {compare.MAX_SYMBOLS} symbols can be compared"}), 400
+    if period not in PERIOD_DAYS:
+        return jsonify({"error": f"range must be one of: {', '.join(PERIOD_DAYS)}"}), 400
+    max_points, error = parse_max_points()
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        # One concurrent fetch for every symbol missing from the bar store
+        bars_by_symbol = bar_store.get_many(symbols, period, allow_mock=True)
+        bars_list = [bars_by_symbol[symbol] for symbol in symbols]
+        empty = [bars.symbol for bars in bars_list if not len(bars)]
+        if empty:
+            return jsonify({"error": f"No price history for: {', '.join(empty)}"}), 404
+
+        # Comparisons including synthetic bars are never cached, here or downstream
+        if any(bars.source == "mock" for bars in bars_list):
+            return http_cache.mark_source(jsonify(compare.build(bars_list, period, rebase, max_points)), "mock")
+
+        # Aligned payloads are reused until any symbol gets a new bar
+        cache_key = (tuple(symbols), period, rebase, max_points, tuple(bars.version for bars in bars_list))
+        cached = compare_cache.get(cache_key)
+        if cached is None:
+            body = app.json.encode_body(compare.build(bars_list, period, rebase, max_points))
+            ttl = min(market_calendar.cache_ttl(symbol, DAILY_TTL_OPEN) for symbol in symbols)
+            cached = cache_body(compare_cache, cache_key, body, ttl)
+        return http_cache.respond(cached, DAILY_TTL_OPEN)
+    except Exception as e:
+        logger.error(f"Error comparing {symbols}: {str(e)}")
+        return jsonify({"error": "Failed to build comparison"}), 500
+
+@app.route('/api/market/screener', methods=['GET'])
+def screen_stocks():
+    """Filter and sort the market by precomputed metrics; never calls upstream"""
+    try:
+        conditions = screener.parse_query(request.args.get('filter', ''))
+        sort = screener.parse_sort(request.args.get('sort', '-return_1m'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= screener.MAX_RESULTS:
+        return jsonify({"error": f"limit must be between 1 and {screener.MAX_RESULTS}"}), 400
+
+    table = screener.screener.current()
+    count, results = table.screen(conditions, sort, limit)
+    return jsonify({
+        "count": count,
+        "results": results,
+        "universe": len(table),
+        "built_at": datetime.fromtimestamp(table.built_at).isoformat(),
+    })
+
+@app.route('/api/market/indicators/<symbol>', methods=['GET'])
+def get_indicators(symbol):
+    """Get technical indicators computed on a stock's daily bars"""
+    spec = request.args.get('ind', '')
+    period = request.args.get('range', '6mo')
+
+    if not spec:
+        return jsonify({"error": "ind parameter is required"}), 400
+    if period not in PERIOD_DAYS:
+        return jsonify({"error": f"range must be one of: {', '.join(PERIOD_DAYS)}"}), 400
+
+    try:
+        parsed = indicators.parse_spec(spec)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        bars = bar_store.get(symbol, period, allow_mock=True)
+
+        # Repeat views of the same bars and spec are served from the memo
+        cache_key = (symbol.upper(), period, bars.version, tuple(key for key, _, _ in parsed))
+        cached = indicator_cache.get(cache_key)
+        if cached is not None:
+            return app.json.body_response(cached)
+
+        computed = indicators.compute(parsed, bars)
+        result = {
+            "symbol": symbol.upper(),
+            "range": period,
+            "source": bars.source,
+            "dates": bars.date_strings(),
+            "indicators": {}
+        }
+        for key, values in computed.items():
+            if isinstance(values, dict):
+                result["indicators"][key] = {
+                    name: indicators.to_json_values(series) for name, series in values.items()
+                }
+            else:
+                result["indicators"][key] = indicators.to_json_values(values)
+
+        body = app.json.encode_body(result)
+        indicator_cache.set(cache_key, body, INDICATOR_TTL)
+        return app.json.body_response(body)
+    except Exception as e:
+        logger.error(f"Error computing indicators for {symbol}: {str(e)}")
+        return jsonify({"error": "Failed to compute indicators"}), 500
+
+@app.route('/api/backtest', methods=['POST'])
+def run_backtest():
+    """Backtest a trading strategy on a stock's daily bars"""
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    is_valid, error_message = validate_request_data(data, ['symbol', 'strategy'])
+    if not is_valid:
+        return jsonify({"error": error_message}), 400
+
+    symbol = data['symbol']
+    strategy = data['strategy']
+    period = data.get('range', '5y')
+    if period not in PERIOD_DAYS:
+        return jsonify({"error": f"range must be one of: {', '.join(PERIOD_DAYS)}"}), 400
+
+    try:
+        initial_capital = float(data.get('initial_capital', 10000))
+        fee_bps = float(data.get('fee_bps', 0))
+        if initial_capital <= 0 or fee_bps < 0:
+            return jsonify({"error": "initial_capital must be positive and fee_bps non-negative"}), 400
+        grid = backtest.expand_grid(strategy, data.get('params') or {})
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        bars = bar_store.get(symbol, period, allow_mock=True)
+        result = {
+            "symbol": symbol.upper(),
+            "strategy": strategy,
+            "range": period,
+            "source": bars.source
+        }
+
+        # Any list-valued parameter turns the request into a sweep
+        if any(isinstance(v, list) for v in (data.get('params') or {}).values()):
+            runs = backtest.sweep(bars.close, strategy, grid, initial_capital, fee_bps, bars.dates)
+            runs.sort(key=lambda r: r["stats"]["sharpe"] if "stats" in r else float("-inf"), reverse=True)
+            result["results"] = runs
+            return jsonify(result)
+
+        run = backtest.run(bars.close, strategy, grid[0], initial_capital, fee_bps, bars.dates)
+        dates = bars.date_strings()
+        fills = run["fills"]
+        result.update({
+            "params": {**backtest.STRATEGIES[strategy], **grid[0]},
+            "stats": run["stats"],
+            "dates": dates,
+            "equity": indicators.to_json_values(run["equity"]),
+            "fills": [
+                {
+                    "date": dates[index],
+                    "side": side,
+                    "price": round(price, 4),
+                    "exposure": round(exposure, 4)
+                }
+                for index, side, price, exposure in zip(
+                    fills["index"].tolist(),
+                    fills["side"].tolist(),
+                    fills["price"].tolist(),
+                    fills["exposure"].tolist()
+                )
+            ]
+        })
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error running backtest for {symbol}: {str(e)}")
+        return jsonify({"error": "Failed to run backtest"}), 500
 
 @app.route('/api/user/portfolio', methods=['GET'])
 @require_auth
 def get_user_portfolio(user_id):
     """Get user's portfolio (requires authentication)"""
     # If using mock database, use the mock implementation
-    if using_mock_db:
+    if database.using_mock:
         try:
             portfolio = mock_db.get_user_portfolio(user_id)
             logger.info(f"Retrieved portfolio for user {user_id} from mock DB")
@@ -559,7 +1087,7 @@ def get_user_portfolio(user_id):
 
     # Query Supabase for user's portfolio
     try:
-        response = supabase.table('portfolios').select('*').eq('user_id', user_id).execute()
+        response = database.client.table('portfolios').select('*').eq('user_id', user_id).execute()
         logger.info(f"Retrieved portfolio for user {user_id}")
         return jsonify(response.data)
     except Exception as e:
@@ -578,7 +1106,7 @@ def get_user_portfolio(user_id):
 def get_user_transactions(user_id):
     """Get user's transaction history (requires authentication)"""
     # If using mock database, use the mock implementation
-    if using_mock_db:
+    if database.using_mock:
         try:
             transactions = mock_db.get_user_transactions(user_id)
             logger.info(f"Retrieved transactions for user {user_id} from mock DB")
@@ -589,8 +1117,15 @@ def get_user_transactions(user_id):
 
     # Query Supabase for user's transactions
     try:
-        response = supabase.table('transactions').select('*').eq('user_id', user_id).order('created_at', desc=True).execute()
+        # Records still waiting in the write-behind journal are newer than anything stored
+        journal = write_behind.get_journal()
+        pending = journal.pending_for(user_id) if journal is not None else []
+
+        response = database.client.table('transactions').select('*').eq('user_id', user_id).order('created_at', desc=True).execute()
         logger.info(f"Retrieved transactions for user {user_id}")
+        if pending:
+            stored = {row.get('id') for row in response.data}
+            return jsonify([row for row in reversed(pending) if row['id'] not in stored] + response.data)
         return jsonify(response.data)
     except Exception as e:
         logger.error(f"Error retrieving transactions for user {user_id}: {str(e)}")
@@ -612,167 +1147,411 @@ def create_transaction(user_id):
         return jsonify({"error": "No data provided"}), 400
 
     # Validate request data
-    required_fields = ['symbol', 'quantity', 'price', 'type']
+    trade, error_message = parse_trade(data)
+    if error_message:
+        return jsonify({"error": error_message}), 400
+    symbol, quantity, price, trade_type = trade
+
+    logger.info(f"Processing {trade_type} transaction for user {user_id}: {quantity} shares of {symbol} at ${price}")
+
+    try:
+        transaction, new_balance = execute_trade(user_id, symbol, quantity, price, trade_type)
+    except TradeError as e:
+        return jsonify({"error": e.message}), e.status
+    except Exception as e:
+        logger.error(f"Error processing transaction for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to process transaction"}), 500
+
+    return jsonify({
+        "transaction": transaction,
+        "new_balance": new_balance
+    })
+
+@app.route('/api/user/transactions/batch', methods=['POST'])
+@require_auth
+def create_transaction_batch(user_id):
+    """Apply several buy/sell trades as one unit"""
+    data = request.json
+    legs = data.get('transactions') if isinstance(data, dict) else None
+    if not isinstance(legs, list) or not legs:
+        return jsonify({"error": "transactions must be a non-empty list"}), 400
+    if len(legs) > MAX_BATCH_LEGS:
+        return jsonify({"error": f"At most {MAX_BATCH_LEGS} transactions per batch"}), 400
+
+    # Every leg is validated before anything is written
+    trades = []
+    for position, leg in enumerate(legs):
+        trade, error_message = parse_trade(leg) if isinstance(leg, dict) else (None, "Invalid data types provided")
+        if error_message:
+            return jsonify({"error": f"Transaction {position}: {error_message}"}), 400
+        trades.append(trade)
+
+    logger.info(f"Processing batch of {len(trades)} transactions for user {user_id}")
+
+    try:
+        transactions, new_balance = execute_batch(user_id, trades)
+    except TradeError as e:
+        return jsonify({"error": e.message}), e.status
+    except Exception as e:
+        logger.error(f"Error processing transaction batch for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to process transactions"}), 500
+
+    return jsonify({
+        "transactions": transactions,
+        "new_balance": new_balance
+    })
+
+@app.route('/api/user/orders', methods=['POST'])
+@require_auth
+def place_order(user_id):
+    """Place a resting limit or stop order"""
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    required_fields = ['symbol', 'quantity', 'side', 'type']
     is_valid, error_message = validate_request_data(data, required_fields)
     if not is_valid:
         return jsonify({"error": error_message}), 400
 
-    # Validate data types
+    price_field = 'stop_price' if data['type'] == 'stop' else 'limit_price'
+    if price_field not in data:
+        return jsonify({"error": f"Missing required fields: {price_field}"}), 400
+
     try:
-        symbol = data['symbol']
+        symbol = str(data['symbol'])
         quantity = int(data['quantity'])
-        price = float(data['price'])
-        trade_type = data['type']
+        price = float(data[price_field])
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid data types provided"}), 400
+
+    try:
+        order = order_engine.place(user_id, symbol, data['side'], data['type'], quantity, price)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(order.to_dict()), 201
+
+@app.route('/api/user/orders', methods=['GET'])
+@require_auth
+def get_user_orders(user_id):
+    """Get the user's open and recently closed orders"""
+    status = request.args.get('status')
+    return jsonify([order.to_dict() for order in order_engine.orders_for(user_id, status)])
 
-        # Additional validations
-        if quantity <= 0:
-            return jsonify({"error": "Quantity must be greater than zero"}), 400
-        if price <= 0:
-            return jsonify({"error": "Price must be greater than zero"}), 400
-        if trade_type not in ['buy', 'sell']:
-            return jsonify({"error": "Type must be 'buy' or 'sell'"}), 400
+@app.route('/api/user/orders/<order_id>', methods=['DELETE'])
+@require_auth
+def cancel_order(user_id, order_id):
+    """Cancel an open order"""
+    order = order_engine.cancel(user_id, order_id)
+    if order is None:
+        return jsonify({"error": "Open order not found"}), 404
+    return jsonify(order.to_dict())
+
+@app.route('/api/user/alerts', methods=['POST'])
+@require_auth
+def create_alert(user_id):
+    """Create a price alert"""
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    is_valid, error_message = validate_request_data(data, ['symbol', 'price'])
+    if not is_valid:
+        return jsonify({"error": error_message}), 400
+
+    try:
+        symbol = str(data['symbol'])
+        price = float(data['price'])
     except (ValueError, TypeError):
         return jsonify({"error": "Invalid data types provided"}), 400
 
-    logger.info(f"Processing {trade_type} transaction for user {user_id}: {quantity} shares of {symbol} at ${price}")
+    try:
+        alert = alert_engine.create(user_id, symbol, price, data.get('direction'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(alert.to_dict()), 201
 
-    # If using mock database, use the mock implementation
-    if using_mock_db:
-        try:
-            transaction, new_balance = mock_db.create_transaction(
-                user_id=user_id,
-                symbol=symbol,
-                quantity=quantity,
-                price=price,
-                trade_type=trade_type
-            )
-
-            return jsonify({
-                "transaction": transaction,
-                "new_balance": new_balance
-            })
-        except Exception as e:
-            logger.error(f"Error creating transaction with mock DB for user {user_id}: {str(e)}")
-            return jsonify({"error": "Failed to process transaction"}), 500
-
-    # Create transaction in Supabase
-    try:
-        transaction_data = {
-            'user_id': user_id,
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': price,
-            'type': trade_type,
-            'total': price * quantity
-        }
+@app.route('/api/user/alerts', methods=['GET'])
+@require_auth
+def get_user_alerts(user_id):
+    """Get the user's active price alerts"""
+    return jsonify([alert.to_dict() for alert in alert_engine.alerts_for(user_id)])
 
-        # Start by checking user exists and has sufficient funds for buy orders
-        user = supabase.table('users').select('cash_balance').eq('id', user_id).execute()
-
-        if len(user.data) == 0:
-            logger.error(f"User {user_id} not found in database")
-            return jsonify({"error": "User not found"}), 404
-
-        current_balance = user.data[0]['cash_balance']
-
-        # For buy orders, check if user has enough funds
-        if trade_type == 'buy':
-            total_cost = price * quantity
-            if total_cost > current_balance:
-                logger.warning(f"Insufficient funds for user {user_id}: has ${current_balance}, needs ${total_cost}")
-                return jsonify({"error": "Insufficient funds for this purchase"}), 400
-
-        # Get current portfolio
-        portfolio = supabase.table('portfolios').select('*').eq('user_id', user_id).eq('symbol', symbol).execute()
-
-        # For sell orders, check if user has enough shares
-        if trade_type == 'sell':
-            if len(portfolio.data) == 0 or portfolio.data[0]['quantity'] < quantity:
-                logger.warning(f"Insufficient shares for user {user_id} to sell {quantity} of {symbol}")
-                return jsonify({"error": "Not enough shares to sell"}), 400
-
-        # Create the transaction record
-        response = supabase.table('transactions').insert(transaction_data).execute()
-
-        if trade_type == 'buy':
-            if len(portfolio.data) == 0:
-                # Create new portfolio entry
-                portfolio_data = {
-                    'user_id': user_id,
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'avg_price': price
-                }
-                logger.info(f"Creating new portfolio entry for user {user_id}: {quantity} shares of {symbol}")
-                supabase.table('portfolios').insert(portfolio_data).execute()
-            else:
-                # Update existing portfolio
-                current = portfolio.data[0]
-                new_quantity = current['quantity'] + quantity
-                new_avg_price = ((current['quantity'] * current['avg_price']) + (quantity * price)) / new_quantity
-                logger.info(f"Updating portfolio for user {user_id}: {symbol} from {current['quantity']} to {new_quantity} shares")
-
-                supabase.table('portfolios').update({
-                    'quantity': new_quantity,
-                    'avg_price': new_avg_price
-                }).eq('id', current['id']).execute()
-
-        elif trade_type == 'sell':
-            current = portfolio.data[0]
-            new_quantity = current['quantity'] - quantity
-            logger.info(f"Selling shares for user {user_id}: {symbol} from {current['quantity']} to {new_quantity} shares")
-
-            if new_quantity == 0:
-                # Remove from portfolio if all shares sold
-                supabase.table('portfolios').delete().eq('id', current['id']).execute()
-                logger.info(f"Removed {symbol} from user {user_id}'s portfolio (all shares sold)")
-            else:
-                # Update quantity (avg_price stays the same when selling)
-                supabase.table('portfolios').update({
-                    'quantity': new_quantity
-                }).eq('id', current['id']).execute()
+@app.route('/api/user/alerts/<alert_id>', methods=['DELETE'])
+@require_auth
+def delete_alert(user_id, alert_id):
+    """Delete an active price alert"""
+    alert = alert_engine.delete(user_id, alert_id)
+    if alert is None:
+        return jsonify({"error": "Alert not found"}), 404
+    return jsonify(alert.to_dict())
+
+@app.route('/api/user/alerts/events', methods=['GET'])
+@require_auth
+def get_alert_events(user_id):
+    """Poll for fired price alerts newer than the `after` cursor"""
+    try:
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({"error": "after must be an integer"}), 400
+    events, cursor = alert_engine.events_for(user_id, after)
+    return jsonify({"events": events, "cursor": cursor})
+
+@app.route('/api/user/watchlists', methods=['GET'])
+@require_auth
+def get_user_watchlists(user_id):
+    """Get the user's watchlists"""
+    try:
+        return jsonify(watchlists.list_watchlists(user_id))
+    except Exception as e:
+        logger.error(f"Error retrieving watchlists for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to retrieve watchlists"}), 500
+
+@app.route('/api/user/watchlists', methods=['POST'])
+@require_auth
+def create_watchlist(user_id):
+    """Create a watchlist: {"name", "symbols": [...]}"""
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    try:
+        return jsonify(watchlists.create_watchlist(user_id, data.get('name'), data.get('symbols', []))), 201
+    except WatchlistError as e:
+        return jsonify({"error": e.message}), e.status
+    except Exception as e:
+        logger.error(f"Error creating watchlist for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to create watchlist"}), 500
+
+@app.route('/api/user/watchlists/<watchlist_id>', methods=['PATCH'])
+@require_auth
+def update_watchlist(user_id, watchlist_id):
+    """Rename a watchlist and/or replace its symbols"""
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    try:
+        return jsonify(watchlists.update_watchlist(user_id, watchlist_id, data.get('name'), data.get('symbols')))
+    except WatchlistError as e:
+        return jsonify({"error": e.message}), e.status
+    except Exception as e:
+        logger.error(f"Error updating watchlist {watchlist_id} for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to update watchlist"}), 500
+
+@app.route('/api/user/watchlists/<watchlist_id>', methods=['DELETE'])
+@require_auth
+def delete_watchlist(user_id, watchlist_id):
+    """Delete a watchlist"""
+    try:
+        return jsonify(watchlists.delete_watchlist(user_id, watchlist_id))
+    except WatchlistError as e:
+        return jsonify({"error": e.message}), e.status
+    except Exception as e:
+        logger.error(f"Error deleting watchlist {watchlist_id} for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to delete watchlist"}), 500
+
+@app.route('/api/user/watchlists/<watchlist_id>/quotes', methods=['GET'])
+@require_auth
+def get_watchlist_quotes(user_id, watchlist_id):
+    """Get quotes for every symbol on a watchlist, fetching uncached symbols concurrently"""
+    try:
+        lists = watchlists.list_watchlists(user_id)
+    except Exception as e:
+        logger.error(f"Error retrieving watchlists for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to retrieve watchlists"}), 500
+    watchlist = next((item for item in lists if item['id'] == watchlist_id), None)
+    if watchlist is None:
+        return jsonify({"error": "Watchlist not found"}), 404
+
+    # Symbols on the user's other lists are fetched in the same round
+    others = [symbol for item in lists if item is not watchlist for symbol in item['symbols']]
+    quotes, upstream_requests = resolve_quotes(watchlist['symbols'], others)
+    return jsonify({
+        "id": watchlist['id'],
+        "name": watchlist['name'],
+        "quotes": [
+            {"symbol": symbol, "source": quotes[symbol][1], "quote": quotes[symbol][0]}
+            for symbol in watchlist['symbols']
+        ],
+        "upstream_requests": upstream_requests,
+    })
 
-        # Update user's cash balance
-        cash_change = -price * quantity if trade_type == 'buy' else price * quantity
-        new_balance = current_balance + cash_change
-        logger.info(f"Updating user {user_id}'s balance from ${current_balance} to ${new_balance}")
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Get a page of users ranked by account value (cash plus holdings)"""
+    try:
+        limit = int(request.args.get('limit', 10))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    if not 1 <= limit <= MAX_PAGE or offset < 0:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE} and offset not negative"}), 400
 
-        supabase.table('users').update({
-            'cash_balance': new_balance
-        }).eq('id', user_id).execute()
+    try:
+        return jsonify({"entries": leaderboard.top(limit, offset), "users": len(leaderboard)})
+    except Exception as e:
+        logger.error(f"Error retrieving leaderboard: {str(e)}")
+        return jsonify({"error": "Failed to retrieve leaderboard"}), 500
 
+@app.route('/api/user/leaderboard', methods=['GET'])
+@require_auth
+def get_leaderboard_rank(user_id):
+    """Get the user's rank and account value on the leaderboard"""
+    try:
+        entry = leaderboard.rank_of(user_id)
+    except Exception as e:
+        logger.error(f"Error retrieving leaderboard rank for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to retrieve leaderboard"}), 500
+    if entry is None:
+        return jsonify({"error": "User not found"}), 404
+    return jsonify(entry)
+
+@app.route('/api/user/trading-stats', methods=['GET'])
+@require_auth
+def get_trading_stats(user_id):
+    """Get per-symbol volume, realized P&L and activity over time from the transaction log"""
+    bucket = request.args.get('bucket', 'month')
+    if bucket not in txlog.BUCKETS:
+        return jsonify({"error": f"bucket must be one of: {', '.join(txlog.BUCKETS)}"}), 400
+
+    try:
+        log = txlog.TransactionLog.from_database(user_id)
+    except Exception as e:
+        logger.error(f"Error loading transaction log for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to retrieve transaction data"}), 500
+
+    symbols = log.group_by('symbol')
+    for (_, symbol), realized in log.realized_pnl().items():
+        symbols[symbol]['realized_pnl'] = round(realized, 2)
+    return jsonify({
+        "trades": len(log),
+        "symbols": symbols,
+        "activity": log.activity(bucket),
+    })
+
+@app.route('/api/user/portfolio/history', methods=['GET'])
+@require_auth
+def get_portfolio_history(user_id):
+    """Get the user's daily equity curve, extending the stored curve to the latest close"""
+    max_points, error = parse_max_points()
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        curve = equity.update_curve(user_id)
+    except Exception as e:
+        logger.error(f"Error updating equity curve for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to retrieve portfolio history"}), 500
+
+    return jsonify(equity.curve_payload(curve, max_points))
+
+@app.route('/api/user/risk', methods=['GET'])
+@require_auth
+def get_portfolio_risk(user_id):
+    """Get risk analytics (volatility, beta, VaR) for the user's holdings"""
+    benchmark = request.args.get('benchmark', 'SPY').upper()
+    period = request.args.get('range', '1y')
+    if period not in PERIOD_DAYS:
+        return jsonify({"error": f"range must be one of: {', '.join(PERIOD_DAYS)}"}), 400
+
+    try:
+        confidence = float(request.args.get('confidence', 0.95))
+        horizon = int(request.args.get('horizon', 1))
+    except ValueError:
+        return jsonify({"error": "Invalid confidence or horizon"}), 400
+    if not 0.5 <= confidence < 1 or not 1 <= horizon <= 252:
+        return jsonify({"error": "confidence must be in [0.5, 1) and horizon between 1 and 252 days"}), 400
+
+    try:
+        quantities = holdings_quantities(load_portfolio_rows(user_id))
+    except Exception as e:
+        logger.error(f"Error retrieving portfolio for risk analysis for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to retrieve portfolio data"}), 500
+
+    if not quantities:
+        return jsonify({"error": "Portfolio has no holdings to analyze"}), 400
+
+    try:
+        bars_by_symbol = bar_store.get_many([*quantities, benchmark], period, allow_mock=True)
+        matrix = risk.return_matrix_cache.get(list(bars_by_symbol.values()), period)
+        result = risk.analyze(matrix, quantities, benchmark, confidence, horizon)
+        result["range"] = period
+        result["source"] = "mock" if any(b.source == "mock" for b in bars_by_symbol.values()) else "live"
+        logger.info(f"Computed risk analytics for user {user_id} over {len(quantities)} holdings")
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error computing risk analytics for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to compute risk analytics"}), 500
+
+@app.route('/api/user/projection', methods=['GET'])
+@require_auth
+def get_portfolio_projection(user_id):
+    """Project the distribution of the user's portfolio value with Monte Carlo simulation"""
+    period = request.args.get('range', '1y')
+    if period not in PERIOD_DAYS:
+        return jsonify({"error": f"range must be one of: {', '.join(PERIOD_DAYS)}"}), 400
+
+    try:
+        horizon = int(request.args.get('horizon', 252))
+        paths = int(request.args.get('paths', 10000))
+        seed = request.args.get('seed')
+        seed = int(seed) if seed is not None else None
+    except ValueError:
+        return jsonify({"error": "horizon, paths and seed must be integers"}), 400
+    if not 1 <= horizon <= 2520 or not 100 <= paths <= montecarlo.MAX_PATHS:
         return jsonify({
-            "transaction": response.data,
-            "new_balance": new_balance
-        })
+            "error": f"horizon must be between 1 and 2520 days and paths between 100 and {montecarlo.MAX_PATHS}"
+        }), 400
 
+    try:
+        quantities = holdings_quantities(load_portfolio_rows(user_id))
     except Exception as e:
-        logger.error(f"Error creating transaction for user {user_id}: {str(e)}")
-        # Try to fall back to mock database if Supabase fails
-        try:
-            logger.warning(f"Falling back to mock database for transaction")
-            transaction, new_balance = mock_db.create_transaction(
-                user_id=user_id,
-                symbol=symbol,
-                quantity=quantity,
-                price=price,
-                trade_type=trade_type
-            )
-
-            return jsonify({
-                "transaction": transaction,
-                "new_balance": new_balance
-            })
-        except Exception as mock_err:
-            logger.error(f"Error with mock database fallback: {str(mock_err)}")
-            return jsonify({"error": "Failed to process transaction"}), 500
+        logger.error(f"Error retrieving portfolio for projection for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to retrieve portfolio data"}), 500
+
+    if not quantities:
+        return jsonify({"error": "Portfolio has no holdings to project"}), 400
+
+    try:
+        bars_by_symbol = bar_store.get_many(quantities, period, allow_mock=True)
+        matrix = risk.return_matrix_cache.get(list(bars_by_symbol.values()), period)
+        if len(matrix.dates) < 2:
+            return jsonify({"error": "Not enough overlapping price history to project"}), 400
+
+        values = np.array([quantities[symbol] for symbol in matrix.symbols]) * matrix.last_prices
+        mu, covariance = montecarlo.estimate(matrix.returns)
+        workers = (os.cpu_count() or 1) if paths >= 2 * montecarlo.CHUNK_PATHS else 1
+        step_days, simulated = montecarlo.simulate(
+            values, mu, covariance, horizon, paths, seed=seed, workers=workers
+        )
+
+        result = montecarlo.summarize(simulated, step_days)
+        result.update({
+            "symbols": matrix.symbols,
+            "holding_values": values.tolist(),
+            "horizon_days": horizon,
+            "paths": paths,
+            "seed": seed,
+            "range": period,
+            "source": "mock" if any(b.source == "mock" for b in bars_by_symbol.values()) else "live"
+        })
+        logger.info(f"Simulated {paths} paths over {horizon} days for user {user_id}")
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error projecting portfolio for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to project portfolio"}), 500
 
 @app.route('/api/user/balance', methods=['GET'])
 @require_auth
 def get_user_balance(user_id):
     """Get user's cash balance"""
     # If using mock database, use the mock implementation
-    if using_mock_db:
+    if database.using_mock:
         try:
             balance = mock_db.get_user_balance(user_id)
             if balance is None:
@@ -787,7 +1566,7 @@ def get_user_balance(user_id):
 
     # Query Supabase for user's balance
     try:
-        response = supabase.table('users').select('cash_balance').eq('id', user_id).execute()
+        response = database.client.table('users').select('cash_balance').eq('id', user_id).execute()
 
         if len(response.data) == 0:
             logger.warning(f"User {user_id} not found when retrieving balance")
@@ -0,0 +1,326 @@
+"""
+Vectorized strategy backtesting over daily bars.
+Every strategy is expressed as a target exposure array (0 = all cash, 1 = fully
+invested); positions, fills, the equity curve and statistics are derived from it
+with array operations. Trades execute at the close of the bar that produced the
+signal, so a signal on day t earns the return from day t+1 onward.
+"""
+import itertools
+import logging
+import os
+
+import numpy as np
+
+import indicators
+from worker_pool import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+# Default parameters for each strategy; values given in a request are converted
+# to the type of the default (int parameters must be whole numbers)
+STRATEGIES = {
+    "buy_and_hold": {},
+    "ma_crossover": {"fast": 20, "slow": 50},
+    "rsi": {"window": 14, "lower": 30.0, "upper": 70.0},
+    "rebalance": {"weight": 0.6, "every": 21},
+}
+
+# Upper bound on parameter combinations accepted for one sweep
+MAX_SWEEP_SIZE = 500
+
+# Sweeps smaller than this run in-process; the pool round trip would cost more
+POOL_MIN_GRID = 16
+
+
+def _coerce(name, value, kind):
+    """Convert one parameter value to int or float, rejecting anything that is not a finite number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be a number")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not np.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    if kind is int:
+        if not number.is_integer():
+            raise ValueError(f"{name} must be a whole number")
+        return int(number)
+    return number
+
+
+def coerce_params(strategy, params):
+    """
+    Merge parameters over a strategy's defaults, converting each to its default's type.
+
+    Args:
+        strategy: A key of STRATEGIES
+        params: Dict of scalar parameter values (numbers or numeric strings)
+
+    Returns:
+        Dict with every parameter of the strategy
+
+    Raises:
+        ValueError: If a parameter is unknown or not a (whole, for int parameters) number
+    """
+    defaults = STRATEGIES[strategy]
+    unknown = set(params) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+    return {**defaults, **{name: _coerce(name, value, type(defaults[name])) for name, value in params.items()}}
+
+
+def _forward_fill(values):
+    """Forward fill NaNs; leading NaNs stay NaN."""
+    index = np.where(np.isnan(values), 0, np.arange(len(values)))
+    np.maximum.accumulate(index, out=index)
+    return values[index]
+
+
+def exposure_buy_and_hold(close):
+    return np.ones(len(close))
+
+
+def exposure_ma_crossover(close, fast, slow):
+    """Invested while the fast SMA is above the slow SMA."""
+    if fast >= slow:
+        raise ValueError("fast must be shorter than slow")
+    fast_ma = indicators.sma(close, fast)
+    slow_ma = indicators.sma(close, slow)
+    with np.errstate(invalid="ignore"):
+        return (fast_ma > slow_ma).astype(np.float64)
+
+
+def exposure_rsi(close, window, lower, upper):
+    """Enter when RSI drops below lower, exit when it rises above upper."""
+    if not 0 < lower < upper < 100:
+        raise ValueError("RSI thresholds must satisfy 0 < lower < upper < 100")
+    values = indicators.rsi(close, window)
+    with np.errstate(invalid="ignore"):
+        events = np.where(values < lower, 1.0, np.where(values > upper, 0.0, np.nan))
+    return np.nan_to_num(_forward_fill(events), nan=0.0)
+
+
+def _rebalance(close, weight, every):
+    """
+    Hold `weight` of equity in the stock and the rest in cash, resetting to the
+    target weight every `every` bars.
+
+    Returns:
+        (equity multiple, stock fraction of equity at each close,
+         exposure change made at each close)
+    """
+    n = len(close)
+    starts = np.arange(0, n, every)
+    segment = np.arange(n) // every
+    growth = close / close[starts[segment]]
+    within = weight * growth + (1 - weight)
+
+    # Each segment's growth up to the next rebalance, compounded across segments
+    drift = close[starts[1:]] / close[starts[:-1]]
+    carried = np.concatenate(([1.0], np.cumprod(weight * drift + (1 - weight))))
+    multiple = carried[segment] * within
+
+    fraction = weight * growth / within
+    delta = np.zeros(n)
+    delta[0] = weight
+    if weight > 0:
+        drifted = weight * drift / (weight * drift + (1 - weight))
+        delta[starts[1:]] = weight - drifted
+    return multiple, fraction, delta
+
+
+def run(close, strategy, params=None, initial_capital=10000.0, fee_bps=0.0, dates=None):
+    """
+    Run a single backtest.
+
+    Args:
+        close: Array of daily closes, ascending in time
+        strategy: A key of STRATEGIES
+        params: Strategy parameters overriding the defaults
+        initial_capital: Starting equity
+        fee_bps: Cost per unit of turnover, in basis points
+        dates: Optional datetime64[D] array aligned with close, used for CAGR
+
+    Returns:
+        Dict with "equity", "position" and "returns" arrays, a "fills" dict of
+        arrays and a "stats" dict
+
+    Raises:
+        ValueError: If the strategy or its parameters are invalid
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    params = coerce_params(strategy, params or {})
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    if n < 2:
+        raise ValueError("At least two bars are required")
+
+    if strategy == "rebalance":
+        weight, every = params["weight"], params["every"]
+        if not 0 <= weight <= 1 or every < 1:
+            raise ValueError("weight must be in [0, 1] and every must be positive")
+        multiple, target, delta = _rebalance(close, weight, every)
+        gross_returns = np.concatenate(([0.0], multiple[1:] / multiple[:-1] - 1))
+    else:
+        if strategy == "buy_and_hold":
+            target = exposure_buy_and_hold(close)
+        elif strategy == "ma_crossover":
+            target = exposure_ma_crossover(close, params["fast"], params["slow"])
+        else:
+            target = exposure_rsi(close, params["window"], params["lower"], params["upper"])
+
+        # Exposure decided at the close of bar t is held over bar t + 1
+        price_returns = np.concatenate(([0.0], close[1:] / close[:-1] - 1))
+        gross_returns = np.concatenate(([0.0], target[:-1])) * price_returns
+        delta = np.diff(np.concatenate(([0.0], target)))
+
+    position = np.concatenate(([0.0], target[:-1]))
+    turnover = np.abs(delta)
+    net_returns = gross_returns - turnover * fee_bps / 10000.0
+    equity = initial_capital * np.cumprod(1 + net_returns)
+
+    trade_index = np.flatnonzero(turnover > 1e-12)
+    fills = {
+        "index": trade_index,
+        "side": np.where(delta[trade_index] > 0, "buy", "sell"),
+        "price": close[trade_index],
+        "exposure": target[trade_index],
+    }
+
+    return {
+        "equity": equity,
+        "position": position,
+        "returns": net_returns,
+        "fills": fills,
+        "stats": statistics(equity, net_returns, position, len(trade_index), dates),
+    }
+
+
+def statistics(equity, returns, position, trades, dates=None):
+    """
+    Summary statistics for an equity curve.
+
+    Returns:
+        Dict with total return, CAGR, max drawdown, annualized volatility,
+        Sharpe ratio (zero risk-free rate), exposure and trade count
+    """
+    n = len(equity)
+    start_equity = equity[0] / (1 + returns[0])
+    total_return = equity[-1] / start_equity - 1
+
+    if dates is not None and n > 1:
+        years = (dates[-1] - dates[0]).astype(np.int64) / 365.25
+    else:
+        years = (n - 1) / TRADING_DAYS
+    cagr = (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else 0.0
+
+    running_max = np.maximum.accumulate(equity)
+    max_drawdown = float(np.min(equity / running_max - 1))
+
+    daily = returns[1:]
+    volatility = float(daily.std(ddof=1)) if len(daily) > 1 else 0.0
+    sharpe = float(daily.mean() / volatility * np.sqrt(TRADING_DAYS)) if volatility > 0 else 0.0
+
+    return {
+        "total_return": float(total_return),
+        "cagr": float(cagr),
+        "max_drawdown": max_drawdown,
+        "volatility": volatility * float(np.sqrt(TRADING_DAYS)),
+        "sharpe": sharpe,
+        "exposure": float(position.mean()),
+        "trades": int(trades),
+    }
+
+
+def expand_grid(strategy, params):
+    """
+    Expand list-valued parameters into a list of parameter dicts.
+
+    Args:
+        strategy: A key of STRATEGIES
+        params: Dict whose values may be scalars or lists
+
+    Returns:
+        List of parameter dicts (a single entry when nothing is a list), with
+        values converted by coerce_params
+
+    Raises:
+        ValueError: If the strategy is unknown, a value is not a number or the
+            grid is too large
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    unknown = set(params) - set(STRATEGIES[strategy])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+
+    names = list(params)
+    values = [v if isinstance(v, list) else [v] for v in params.values()]
+    size = int(np.prod([len(v) for v in values])) if values else 1
+    if size == 0:
+        raise ValueError("Parameter lists must not be empty")
+    if size > MAX_SWEEP_SIZE:
+        raise ValueError(f"Parameter sweep is limited to {MAX_SWEEP_SIZE} combinations")
+    kinds = [type(STRATEGIES[strategy][name]) for name in names]
+    values = [[_coerce(name, v, kind) for v in options] for name, kind, options in zip(names, kinds, values)]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def _run_chunk(close, dates, strategy, grid, initial_capital, fee_bps):
+    """Run a batch of parameter sets; executed inside pool workers."""
+    results = []
+    for params in grid:
+        try:
+            stats = run(close, strategy, params, initial_capital, fee_bps, dates)["stats"]
+            results.append({"params": params, "stats": stats})
+        except ValueError as e:
+            results.append({"params": params, "error": str(e)})
+    return results
+
+
+def sweep(close, strategy, grid, initial_capital=10000.0, fee_bps=0.0, dates=None, workers=None):
+    """
+    Run a parameter sweep, splitting the grid across a process pool.
+
+    Args:
+        close: Array of daily closes
+        strategy: A key of STRATEGIES
+        grid: List of parameter dicts (see expand_grid)
+        initial_capital: Starting equity
+        fee_bps: Cost per unit of turnover, in basis points
+        dates: Optional datetime64[D] array aligned with close
+        workers: Number of chunks to split the grid into (defaults to CPU count);
+            1, or a grid smaller than POOL_MIN_GRID, runs in-process
+
+    Returns:
+        List of {"params", "stats"} (or {"params", "error"}) dicts in grid order
+    """
+    close = np.asarray(close, dtype=np.float64)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(grid) < POOL_MIN_GRID:
+        return _run_chunk(close, dates, strategy, grid, initial_capital, fee_bps)
+
+    # One chunk per worker keeps pickling of the price array to a minimum
+    chunks = [grid[i::workers] for i in range(min(workers, len(grid)))]
+    try:
+        pool = get_process_pool()
+        futures = [
+            pool.submit(_run_chunk, close, dates, strategy, chunk, initial_capital, fee_bps)
+            for chunk in chunks
+        ]
+        chunk_results = [future.result() for future in futures]
+    except Exception as e:
+        logger.warning(f"Process pool unavailable, running sweep in-process: {str(e)}")
+        return _run_chunk(close, dates, strategy, grid, initial_capital, fee_bps)
+
+    # Interleave the strided chunks back into grid order
+    results = [None] * len(grid)
+    for offset, chunk in enumerate(chunk_results):
+        results[offset::len(chunks)] = chunk
+    return results
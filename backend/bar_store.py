@@ -0,0 +1,315 @@
+"""
+Cached daily OHLCV bars held as NumPy arrays.
+Routes that compute on price history (indicators, analytics) read bars from here
+so that repeated work on the same symbol does not cost extra upstream calls.
+"""
+import logging
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from market_cache import TTLCache
+from market_calendar import market_calendar, PERIOD_DAYS
+from market_service import market_service
+
+logger = logging.getLogger(__name__)
+
+# Base prices used for synthetic bars of well-known symbols
+MOCK_BASE_PRICES = {
+    "AAPL": 175.0,
+    "MSFT": 410.0,
+    "GOOGL": 175.0,
+    "AMZN": 180.0,
+    "TSLA": 215.0,
+    "META": 485.0,
+    "NVDA": 925.0,
+    "JPM": 195.0,
+}
+
+
+class Bars:
+    """
+    Columnar daily OHLCV series for one symbol.
+    """
+    def __init__(self, symbol, dates, open, high, low, close, volume, source="live"):
+        """
+        Initialize the bars.
+
+        Args:
+            symbol: The stock symbol
+            dates: datetime64[D] array of bar dates, ascending
+            open, high, low, close, volume: float64 arrays aligned with dates
+            source: "live" for upstream data, "mock" for synthetic data
+        """
+        self.symbol = symbol
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.source = source
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def last_date(self):
+        """Date string of the latest bar, or None when empty."""
+        if not len(self.dates):
+            return None
+        return str(self.dates[-1])
+
+    @property
+    def version(self):
+        """Identifies the latest bar, including intraday updates to its close."""
+        if not len(self.dates):
+            return (None, None)
+        return (self.last_date, float(self.close[-1]))
+
+    def date_strings(self):
+        """Return the bar dates as YYYY-MM-DD strings."""
+        return np.datetime_as_string(self.dates, unit="D").tolist()
+
+    def since(self, start):
+        """Return the bars dated on or after a datetime64[D] start date."""
+        index = int(np.searchsorted(self.dates, start))
+        return type(self)(
+            self.symbol,
+            self.dates[index:],
+            self.open[index:],
+            self.high[index:],
+            self.low[index:],
+            self.close[index:],
+            self.volume[index:],
+            self.source
+        )
+
+    def take(self, index):
+        """Return the bars at the given positions."""
+        return type(self)(
+            self.symbol,
+            self.dates[index],
+            self.open[index],
+            self.high[index],
+            self.low[index],
+            self.close[index],
+            self.volume[index],
+            self.source
+        )
+
+    @classmethod
+    def from_history(cls, symbol, hist):
+        """Build bars from a yfinance history DataFrame."""
+        index = hist.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)
+        return cls(
+            symbol,
+            index.values.astype("datetime64[D]"),
+            hist["Open"].to_numpy(dtype=np.float64),
+            hist["High"].to_numpy(dtype=np.float64),
+            hist["Low"].to_numpy(dtype=np.float64),
+            hist["Close"].to_numpy(dtype=np.float64),
+            hist["Volume"].to_numpy(dtype=np.float64),
+        )
+
+    @classmethod
+    def from_time_series(cls, symbol, time_series, source="live"):
+        """Build bars from a "Time Series (Daily)" dict of date -> string fields."""
+        dates = sorted(time_series)
+        fields = np.array(
+            [
+                [time_series[date][key] for key in ("1. open", "2. high", "3. low", "4. close", "5. volume")]
+                for date in dates
+            ],
+            dtype=np.float64
+        ).reshape(len(dates), 5)
+        return cls(
+            symbol,
+            np.array(dates, dtype="datetime64[D]"),
+            *(np.ascontiguousarray(fields[:, i]) for i in range(5)),
+            source=source
+        )
+
+
+def synthetic_bars(symbol, days, end=None):
+    """
+    Generate deterministic mock bars for a symbol.
+
+    Args:
+        symbol: The stock symbol (seeds the random walk)
+        days: Number of calendar days to cover
+        end: Optional last date (defaults to today)
+
+    Returns:
+        Bars with source "mock", one per business day
+    """
+    end = np.datetime64(end or datetime.now().date(), "D")
+    dates = np.arange(end - np.timedelta64(days, "D"), end + np.timedelta64(1, "D"))
+    dates = dates[np.is_busday(dates)]
+    n = len(dates)
+
+    rng = np.random.default_rng(zlib.crc32(symbol.upper().encode()))
+    base_price = MOCK_BASE_PRICES.get(symbol.upper(), 100.0)
+
+    close = base_price * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n)))
+    prev_close = np.concatenate(([base_price], close[:-1]))
+    open_ = prev_close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, n)))
+    volume = np.floor(rng.uniform(1_000_000, 10_000_000, n))
+
+    return Bars(symbol.upper(), dates, open_, high, low, close, volume, source="mock")
+
+
+class BarStore:
+    """
+    Caches daily bars per (symbol, period) with market-calendar-aware expiry.
+    """
+    def __init__(self, service=None, calendar=None, open_ttl=300, max_entries=512):
+        """
+        Initialize the store.
+
+        Args:
+            service: MarketDataService used for upstream fetches
+            calendar: MarketCalendar used to work out entry lifetimes
+            open_ttl: TTL in seconds while the market is trading
+            max_entries: Maximum number of cached series
+        """
+        self.service = service or market_service
+        self.calendar = calendar or market_calendar
+        self.open_ttl = open_ttl
+        self.cache = TTLCache(max_entries=max_entries)
+
+    def _cached(self, symbol, period):
+        """Find cached bars for a period, slicing a longer cached period if needed."""
+        bars = self.cache.get((symbol, period))
+        if bars is not None:
+            return bars
+
+        days = PERIOD_DAYS[period]
+        for longer, longer_days in PERIOD_DAYS.items():
+            if longer_days <= days:
+                continue
+            bars = self.cache.get((symbol, longer))
+            if bars is not None and len(bars):
+                start = bars.dates[-1] - np.timedelta64(days, "D")
+                return bars.since(start)
+        return None
+
+    def get(self, symbol, period="1mo", fallbacks=(), allow_mock=False):
+        """
+        Get daily bars for a symbol.
+
+        Args:
+            symbol: The stock symbol
+            period: yfinance period to fetch (a key of PERIOD_DAYS)
+            fallbacks: Longer periods to try if the requested one has no data
+            allow_mock: Return synthetic bars instead of None when upstream fails
+
+        Returns:
+            Bars, or None if upstream failed and allow_mock is False
+        """
+        if period not in PERIOD_DAYS:
+            raise ValueError(f"Unsupported period: {period}")
+
+        symbol = symbol.upper()
+        bars = self._cached(symbol, period)
+        if bars is not None:
+            return bars
+
+        # Recently failed upstream fetches are answered from synthetic bars
+        # without retrying until the short mock TTL runs out
+        if allow_mock:
+            bars = self.cache.get((symbol, period, "mock"))
+            if bars is not None:
+                return bars
+
+        hist = self.service.get_history(symbol, [period, *fallbacks])
+        if hist is not None:
+            bars = Bars.from_history(symbol, hist)
+            self.cache.set((symbol, period), bars, self.calendar.cache_ttl(symbol, self.open_ttl))
+            return bars
+
+        if not allow_mock:
+            return None
+
+        logger.info(f"Using synthetic {period} bars for {symbol}")
+        bars = synthetic_bars(symbol, PERIOD_DAYS[period])
+        self.cache.set((symbol, period, "mock"), bars, self.open_ttl)
+        return bars
+
+    def get_many(self, symbols, period="1mo", allow_mock=False, store=True):
+        """
+        Get daily bars for several symbols, fetching all cache misses concurrently.
+
+        Args:
+            symbols: Iterable of stock symbols
+            period: yfinance period to fetch (a key of PERIOD_DAYS)
+            allow_mock: Use synthetic bars for symbols upstream has no data for
+            store: Cache what was fetched; bulk scans pass False so they do
+                not evict the series routes are using
+
+        Returns:
+            Dict of upper-cased symbol to Bars (or None when unavailable and
+            allow_mock is False)
+        """
+        if period not in PERIOD_DAYS:
+            raise ValueError(f"Unsupported period: {period}")
+
+        results = {}
+        missing = []
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            bars = self._cached(symbol, period)
+            if bars is None and allow_mock:
+                bars = self.cache.get((symbol, period, "mock"))
+            if bars is None:
+                missing.append(symbol)
+            results[symbol] = bars
+
+        if missing:
+            histories = self.service.get_histories(missing, [period])
+            for symbol in missing:
+                hist = histories.get(symbol)
+                if hist is not None:
+                    bars = Bars.from_history(symbol, hist)
+                    if store:
+                        self.cache.set((symbol, period), bars, self.calendar.cache_ttl(symbol, self.open_ttl))
+                elif allow_mock:
+                    logger.info(f"Using synthetic {period} bars for {symbol}")
+                    bars = synthetic_bars(symbol, PERIOD_DAYS[period])
+                    if store:
+                        self.cache.set((symbol, period, "mock"), bars, self.open_ttl)
+                else:
+                    bars = None
+                results[symbol] = bars
+        return results
+
+    def cached_daily(self):
+        """
+        Return the longest unexpired live series cached for each symbol.
+
+        Never calls upstream and leaves synthetic bars out.
+
+        Returns:
+            Dict of upper-cased symbol to Bars
+        """
+        longest = {}
+        for key, bars in self.cache.items():
+            # Synthetic entries are keyed (symbol, period, "mock")
+            if len(key) != 2 or bars.source == "mock" or not len(bars):
+                continue
+            symbol = key[0]
+            if symbol not in longest or len(bars) > len(longest[symbol]):
+                longest[symbol] = bars
+        return longest
+
+    def put(self, symbol, period, bars):
+        """Store bars fetched elsewhere."""
+        self.cache.set((symbol.upper(), period), bars, self.calendar.cache_ttl(symbol, self.open_ttl))
+
+
+# Shared store instance
+bar_store = BarStore()
@@ -0,0 +1,86 @@
+"""
+Benchmark price alert evaluation as the number of alerts grows.
+
+Creates alerts spread 1-30% around each symbol's price, replays random-walk
+price updates for every symbol and reports evaluation time per batch and per
+fired alert for the sorted AlertEngine and for a loop that checks every alert
+of each updated symbol. The sorted engine's time should follow the number of
+fired alerts rather than the total.
+
+Usage:
+    python benchmarks/bench_alerts.py [--symbols 500] [--ticks 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from alerts import AlertEngine  # noqa: E402
+
+ALERT_COUNTS = (10_000, 100_000, 1_000_000)
+
+
+def scan(alerts_by_symbol, prices):
+    fired = 0
+    for symbol, price in prices.items():
+        waiting = []
+        for direction, threshold in alerts_by_symbol.get(symbol, ()):
+            if (price >= threshold) if direction == "above" else (price <= threshold):
+                fired += 1
+            else:
+                waiting.append((direction, threshold))
+        alerts_by_symbol[symbol] = waiting
+    return fired
+
+
+def run(count, args):
+    rng = np.random.default_rng(0)
+    symbols = [f"S{i:04d}" for i in range(args.symbols)]
+    base = rng.uniform(20, 500, args.symbols)
+    which = rng.integers(0, args.symbols, count)
+    above = rng.random(count) < 0.5
+    distance = rng.uniform(0.01, 0.30, count)
+    thresholds = np.round(base[which] * np.where(above, 1 + distance, 1 - distance), 2)
+
+    engine = AlertEngine(max_alerts_per_user=count)
+    alerts_by_symbol = {}
+    for s, is_above, threshold in zip(which.tolist(), above.tolist(), thresholds.tolist()):
+        direction = "above" if is_above else "below"
+        engine.create("bench", symbols[s], threshold, direction)
+        alerts_by_symbol.setdefault(symbols[s], []).append((direction, threshold))
+
+    paths = base * np.exp(np.cumsum(rng.normal(0, 0.01, (args.ticks, args.symbols)), axis=0))
+    batches = [dict(zip(symbols, row.tolist())) for row in paths]
+
+    results = {}
+    for name, evaluate in (("sorted", engine.on_prices), ("scan", lambda batch: scan(alerts_by_symbol, batch))):
+        fired, start = 0, time.perf_counter()
+        for batch in batches:
+            fired += evaluate(batch)
+        results[name] = (fired, (time.perf_counter() - start) * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.symbols} symbols, {args.ticks} batches of {args.symbols} price updates\n")
+    print(f"{'alerts':>9} {'fired':>7} {'sorted/batch':>13} {'scan/batch':>11} {'sorted/fire':>12}")
+    for count in ALERT_COUNTS:
+        results = run(count, args)
+        fired, sorted_ms = results["sorted"]
+        assert fired == results["scan"][0]
+        scan_ms = results["scan"][1]
+        print(f"{count:9d} {fired:7d} {sorted_ms / args.ticks:11.2f}ms {scan_ms / args.ticks:9.2f}ms "
+              f"{sorted_ms * 1000 / max(fired, 1):10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
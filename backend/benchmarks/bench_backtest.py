@@ -0,0 +1,71 @@
+"""
+Benchmark the vectorized backtest engine.
+
+Times a single 10-year daily backtest for each strategy, then a 100-combination
+moving-average crossover sweep run in-process and across process pools of
+increasing size.
+
+Usage:
+    python benchmarks/bench_backtest.py [--years 10] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import backtest  # noqa: E402
+from bar_store import synthetic_bars  # noqa: E402
+from worker_pool import set_process_pool  # noqa: E402
+
+
+def time_call(func, repeat):
+    """Return the best wall time in milliseconds over `repeat` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    bars = synthetic_bars("BENCH", int(args.years * 365.25))
+    print(f"{len(bars)} daily bars ({args.years} years)")
+
+    for strategy in backtest.STRATEGIES:
+        ms = time_call(lambda: backtest.run(bars.close, strategy, dates=bars.dates), args.repeat)
+        print(f"  {strategy:14s} {ms:7.2f} ms")
+
+    grid = backtest.expand_grid("ma_crossover", {
+        "fast": list(range(5, 55, 5)),
+        "slow": list(range(60, 260, 20)),
+    })
+    print(f"\n{len(grid)}-combination ma_crossover sweep")
+
+    serial = time_call(lambda: backtest.sweep(bars.close, "ma_crossover", grid, workers=1, dates=bars.dates), 3)
+    print(f"  in-process    {serial:8.1f} ms")
+
+    workers = 2
+    while workers <= args.max_workers:
+        # A dedicated warm pool per size so process start-up is not measured
+        pool = ProcessPoolExecutor(max_workers=workers)
+        set_process_pool(pool)
+        backtest.sweep(bars.close, "ma_crossover", grid, workers=workers, dates=bars.dates)
+        ms = time_call(lambda: backtest.sweep(bars.close, "ma_crossover", grid, workers=workers, dates=bars.dates), 3)
+        print(f"  {workers:2d} workers    {ms:8.1f} ms  ({serial / ms:.2f}x)")
+        set_process_pool(None)
+        pool.shutdown()
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark cold starts of the API.
+
+Reports the import-time profile of `app` (python -X importtime) and, for
+/api/health, /api/market/quote/<symbol> and /api/user/balance, the time from a
+fresh interpreter importing the app to its first response. Each measurement
+runs in a new process so nothing is warm. Exits non-zero when the median
+import or time-to-first-response exceeds its budget, so the script can gate
+regressions in CI. The quote route makes real upstream calls (or fails over to
+mock data when offline), so its budget is the loosest.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs 5] [--import-budget 400]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+HEALTH_ROUTE = "/api/health"
+QUOTE_ROUTE = "/api/market/quote/AAPL"
+BALANCE_ROUTE = "/api/user/balance"
+
+# Run in the child: time the app import and the first request separately
+CHILD = """
+import json, logging, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+logging.disable(logging.CRITICAL)
+response = app.app.test_client().get(sys.argv[1], headers={"user-id": "user123"})
+done = time.perf_counter()
+print(json.dumps({
+    "status": response.status_code,
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (done - start) * 1000,
+    "heavy_modules": sorted(m for m in ("numpy", "pandas", "yfinance", "supabase", "dotenv") if m in sys.modules),
+}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(top):
+    """Direct imports of app with their cumulative import time, slowest first."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    # Children are listed before their parent, so collect second-level imports
+    # until the top-level import they belong to closes
+    total = 0
+    children = []
+    direct = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 3:
+            children.append((cumulative, name))
+        elif indent == 1:
+            if name == "app":
+                total, direct = cumulative, children
+            children = []
+    direct.sort(reverse=True)
+    return total / 1000, [(name, us / 1000) for us, name in direct[:top]]
+
+
+def first_response(route):
+    """Start a fresh interpreter, import the app and serve one request."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, route],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    measured["process_ms"] = (time.perf_counter() - start) * 1000
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports to list")
+    parser.add_argument("--import-budget", type=float, default=400, help="Budget for importing app, in ms")
+    parser.add_argument("--health-budget", type=float, default=400, help="Time to first /api/health response, in ms")
+    parser.add_argument("--quote-budget", type=float, default=3000, help="Time to first quote response, in ms")
+    parser.add_argument("--balance-budget", type=float, default=400, help="Time to first balance response, in ms")
+    args = parser.parse_args()
+    budgets = {
+        HEALTH_ROUTE: args.health_budget,
+        QUOTE_ROUTE: args.quote_budget,
+        BALANCE_ROUTE: args.balance_budget,
+    }
+
+    total_ms, direct = import_profile(args.top)
+    print(f"import app (-X importtime): {total_ms:.1f}ms")
+    for name, ms in direct:
+        print(f"  {name:<24} {ms:8.1f}ms")
+    print()
+
+    failures = []
+    print(f"{'route':<26} {'status':>6} {'import':>9} {'first resp':>11} {'process':>9} {'budget':>8}  heavy modules loaded")
+    import_samples = []
+    for route, budget in budgets.items():
+        runs = [first_response(route) for _ in range(args.runs)]
+        import_samples += [run["import_ms"] for run in runs]
+        ttfr = statistics.median(run["first_response_ms"] for run in runs)
+        print(f"{route:<26} {runs[-1]['status']:>6} "
+              f"{statistics.median(run['import_ms'] for run in runs):7.1f}ms {ttfr:9.1f}ms "
+              f"{statistics.median(run['process_ms'] for run in runs):7.1f}ms {budget:6.0f}ms  "
+              f"{', '.join(runs[-1]['heavy_modules']) or '-'}")
+        if ttfr > budget:
+            failures.append(f"{route}: first response {ttfr:.1f}ms > {budget:.0f}ms")
+
+    import_ms = statistics.median(import_samples)
+    if import_ms > args.import_budget:
+        failures.append(f"import app: {import_ms:.1f}ms > {args.import_budget:.0f}ms")
+
+    if failures:
+        print("\nBudget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll within budget")
+
+
+if __name__ == "__main__":
+    main()
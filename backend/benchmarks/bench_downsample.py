@@ -0,0 +1,89 @@
+"""
+Benchmark LTTB downsampling on long series.
+
+Downsamples a 100k-point random walk to several output sizes with the NumPy
+implementation in downsample.py and a straightforward pure-Python LTTB,
+checks both pick the same points, and reports time per call and the columnar
+JSON payload size before and after.
+
+Usage:
+    python benchmarks/bench_downsample.py [--points 100000] [--repeat 5]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from downsample import lttb_indices  # noqa: E402
+from json_provider import orjson  # noqa: E402
+
+THRESHOLDS = (250, 1000, 5000)
+
+
+def reference_lttb(x, y, threshold):
+    """Textbook LTTB with plain Python loops."""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int(math.floor((i + 1) * every) + 1)
+        avg_end = min(int(math.floor((i + 2) * every) + 1), n)
+        count = avg_end - avg_start
+        avg_x = sum(x[avg_start:avg_end]) / count
+        avg_y = sum(y[avg_start:avg_end]) / count
+
+        best_area, best = -1.0, None
+        for j in range(int(math.floor(i * every) + 1), int(math.floor((i + 1) * every) + 1)):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best_area, best = area, j
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def best_ms(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def payload_bytes(x, y):
+    body = {"dates": x.tolist(), "close": np.round(y, 4).tolist()}
+    return len(orjson.dumps(body)) if orjson is not None else len(str(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    x = np.arange(args.points, dtype=np.float64)
+    y = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, args.points)))
+    x_list, y_list = x.tolist(), y.tolist()
+    full_bytes = payload_bytes(x, y)
+
+    print(f"{args.points} input points, {full_bytes} bytes as columnar JSON\n")
+    print(f"{'points':>7} {'numpy':>10} {'python':>10} {'speedup':>8} {'same':>5} {'bytes':>9}")
+    for threshold in THRESHOLDS:
+        fast_ms, fast = best_ms(lambda: lttb_indices(x, y, threshold), args.repeat)
+        slow_ms, slow = best_ms(lambda: reference_lttb(x_list, y_list, threshold), 1)
+        same = fast.tolist() == slow
+        print(f"{threshold:7d} {fast_ms:8.2f}ms {slow_ms:8.1f}ms {slow_ms / fast_ms:7.1f}x "
+              f"{'yes' if same else 'NO':>5} {payload_bytes(x[fast], y[fast]):9d}")
+
+
+if __name__ == "__main__":
+    main()
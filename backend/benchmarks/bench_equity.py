@@ -0,0 +1,145 @@
+"""
+Benchmark extending a stored equity curve vs. rebuilding it from the ledger.
+
+A user has a few thousand trades across 20 symbols over five years of
+synthetic daily bars (served by a store that hides bars after a movable
+cutoff, so a new trading day can be revealed). Times a full rebuild with a
+Python loop that replays the ledger day by day, the vectorized first build,
+extending the curve by one trading day, and recomputing after a trade
+backdated 30 trading days. Checks the vectorized curve against the loop.
+Every update loads the user's whole transaction log (timed separately); the
+rest is valuation and writing the recomputed points.
+
+Usage:
+    python benchmarks/bench_equity.py [--trades 5000] [--symbols 20]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import equity  # noqa: E402
+import ledger  # noqa: E402
+import mock_db  # noqa: E402
+import txlog  # noqa: E402
+from bar_store import synthetic_bars  # noqa: E402
+
+USER_ID = "bench"
+
+
+class CutoffStore:
+    """Bar store serving pre-generated bars up to a cutoff date."""
+    def __init__(self, bars, cutoff):
+        self.bars = bars
+        self.cutoff = cutoff
+
+    def get_many(self, symbols, period="1mo", allow_mock=False, store=True):
+        found = {}
+        for symbol in symbols:
+            bars = self.bars[symbol]
+            found[symbol] = bars.take(np.flatnonzero(bars.dates <= self.cutoff))
+        return found
+
+
+def make_trades(symbols, days, count, rng):
+    """Random buys, and sells of shares held, on random trading days."""
+    held = dict.fromkeys(symbols, 0)
+    picked = np.sort(rng.choice(days[:-40], count))
+    trades = []
+    for i, day in enumerate(picked.tolist()):
+        symbol = symbols[rng.integers(len(symbols))]
+        quantity = int(rng.integers(1, 20))
+        side = "sell" if held[symbol] >= quantity and rng.random() < 0.4 else "buy"
+        held[symbol] += quantity if side == "buy" else -quantity
+        trades.append({
+            "id": f"bench-{i}", "user_id": USER_ID, "symbol": symbol, "quantity": quantity,
+            "price": round(float(rng.uniform(20, 300)), 2), "type": side,
+            "created_at": f"{day}T15:00:00Z",
+        })
+    return trades
+
+
+def python_curve(trades, bars_by_symbol, days):
+    """Replay the ledger one day at a time, valuing holdings with dict lookups."""
+    closes = {
+        symbol: dict(zip(np.datetime_as_string(bars.dates).tolist(), bars.close.tolist()))
+        for symbol, bars in bars_by_symbol.items()
+    }
+    cash, held, last_price, values = ledger.INITIAL_CASH, {}, {}, []
+    position = 0
+    for day in np.datetime_as_string(days).tolist():
+        while position < len(trades) and trades[position]["created_at"][:10] <= day:
+            trade = trades[position]
+            signed = trade["quantity"] if trade["type"] == "buy" else -trade["quantity"]
+            held[trade["symbol"]] = held.get(trade["symbol"], 0) + signed
+            cash -= signed * trade["price"]
+            position += 1
+        value = cash
+        for symbol, quantity in held.items():
+            last_price[symbol] = closes[symbol].get(day, last_price.get(symbol, 0.0))
+            value += quantity * last_price[symbol]
+        values.append(round(value, 2))
+    return values
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trades", type=int, default=5000)
+    parser.add_argument("--symbols", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rng = np.random.default_rng(7)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    bars = {symbol: synthetic_bars(symbol, 1827) for symbol in symbols}
+    days = bars[symbols[0]].dates
+    store = CutoffStore(bars, days[-2])
+    equity.bar_store = store
+
+    trades = make_trades(symbols, days, args.trades, rng)
+    mock_db.mock_transactions[:] = trades
+    mock_db.mock_equity_curves.clear()
+    print(f"{args.trades} trades in {args.symbols} symbols over {len(days)} trading days\n")
+
+    _, load_ms = timed(lambda: txlog.TransactionLog.from_database(USER_ID))
+    print(f"{'load transaction log':<34} {load_ms:8.1f}ms")
+
+    visible = store.get_many(symbols)
+    python_values, python_ms = timed(
+        lambda: python_curve(trades, visible, days[(days >= np.datetime64(trades[0]["created_at"][:10])) & (days <= store.cutoff)])
+    )
+    curve, first_ms = timed(lambda: equity.update_curve(USER_ID))
+    first_count = curve["points_recomputed"]
+    worst = max(abs(point["value"] - value) for point, value in zip(curve["points"], python_values))
+    print(f"{'full rebuild (python loop)':<34} {python_ms:8.1f}ms {len(python_values):>6} points")
+    print(f"{'first build (vectorized)':<34} {first_ms:8.1f}ms {first_count:>6} points  "
+          f"(max difference {worst:.2f})")
+
+    store.cutoff = days[-1]
+    curve, ms = timed(lambda: equity.update_curve(USER_ID))
+    print(f"{'next trading day':<34} {ms:8.1f}ms {curve['points_recomputed']:>6} points")
+
+    curve, ms = timed(lambda: equity.update_curve(USER_ID))
+    print(f"{'same day again':<34} {ms:8.1f}ms {curve['points_recomputed']:>6} points")
+
+    backdated = dict(trades[-1], id="bench-backdated", type="buy", created_at=f"{days[-31]}T15:00:00Z")
+    mock_db.mock_transactions.append(backdated)
+    mock_db.mock_transactions.sort(key=lambda trade: trade["created_at"])
+    curve, ms = timed(lambda: equity.update_curve(USER_ID))
+    print(f"{'trade backdated 30 days':<34} {ms:8.1f}ms {curve['points_recomputed']:>6} points  "
+          f"(from {curve['recomputed_from']})")
+
+
+if __name__ == "__main__":
+    main()
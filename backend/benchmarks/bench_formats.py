@@ -0,0 +1,91 @@
+"""
+Benchmark time-series response formats.
+
+For 30-, 250- and 1250-row daily payloads reports body size (raw and gzipped)
+and encode/decode time for the legacy date-keyed JSON, columnar JSON,
+MessagePack and Arrow IPC. Decode time includes turning values into numbers,
+which the legacy layout leaves to the client.
+
+Usage:
+    python benchmarks/bench_formats.py [--repeat 50]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import app as backend  # noqa: E402
+import series_formats  # noqa: E402
+from bar_store import synthetic_bars  # noqa: E402
+
+ROWS = (30, 250, 1250)
+
+
+def decode_legacy(body):
+    series = json.loads(body)["Time Series (Daily)"]
+    return {date: {key: float(value) for key, value in fields.items()} for date, fields in series.items()}
+
+
+def decode_columnar(body):
+    return json.loads(body)
+
+
+def decode_msgpack(body):
+    return series_formats.msgpack.unpackb(body)
+
+
+def decode_arrow(body):
+    import pyarrow.ipc
+
+    return pyarrow.ipc.open_stream(body).read_all()
+
+
+DECODERS = {
+    "legacy": decode_legacy,
+    "columnar": decode_columnar,
+    "msgpack": decode_msgpack,
+    "arrow": decode_arrow,
+}
+
+
+def best_ms(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    formats = [fmt for fmt in series_formats.FORMATS if series_formats.available(fmt)]
+    missing = [fmt for fmt in series_formats.FORMATS if fmt not in formats]
+    if missing:
+        print(f"Skipping formats without an installed encoder: {', '.join(missing)}\n")
+
+    print(f"{'rows':>5} {'format':>9} {'bytes':>8} {'gzip':>7} {'encode':>9} {'decode':>9}")
+    with backend.app.app_context():
+        for rows in ROWS:
+            bars = synthetic_bars("BENCH", int(rows * 7 / 5) + 10)
+            bars = bars.since(bars.dates[-rows])
+            for fmt in formats:
+                body = backend.encode_daily_data("BENCH", bars, fmt)
+                encode = best_ms(lambda: backend.encode_daily_data("BENCH", bars, fmt), args.repeat)
+                decode = best_ms(lambda: DECODERS[fmt](body), args.repeat)
+                print(f"{rows:5d} {fmt:>9} {len(body):8d} {len(gzip.compress(body)):7d} "
+                      f"{encode:7.3f}ms {decode:7.3f}ms")
+            print()
+
+
+if __name__ == "__main__":
+    main()
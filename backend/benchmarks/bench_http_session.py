@@ -0,0 +1,93 @@
+"""
+Benchmark the pooled upstream HTTP session against a local keep-alive server.
+
+Sends the same requests from several threads twice: with a new session per
+call (how yfinance behaves without a shared session) and through the shared
+pooled session. The server sleeps when it sets up a connection to stand in for
+the TLS handshake of a remote API. Reports throughput and the session's own
+connection counters; since the simulated handshake happens server-side, time
+saved is estimated as reused connections times the simulated handshake cost.
+
+Usage:
+    python benchmarks/bench_http_session.py [--requests 400] [--threads 16] [--handshake-ms 40]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import http_session  # noqa: E402
+
+BODY = b'{"chart": {"result": []}}'
+
+
+def make_handler(handshake, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            # Runs once per connection, so only new connections pay for it
+            time.sleep(handshake)
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def run(url, requests, threads, get):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: get(url).raise_for_status(), range(requests)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--handshake-ms", type=float, default=40.0, help="Simulated connection setup cost")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Simulated response time")
+    args = parser.parse_args()
+
+    handler = make_handler(args.handshake_ms / 1000.0, args.latency_ms / 1000.0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v8/finance/chart/AAPL"
+
+    print(f"{args.requests} requests from {args.threads} threads, "
+          f"{args.handshake_ms:.0f} ms handshake, {args.latency_ms:.0f} ms response\n")
+
+    def new_session_get(target):
+        with http_session.create_session() as session:
+            return session.get(target)
+
+    for name, get in (("session per call", new_session_get), ("pooled session", http_session.get_session().get)):
+        http_session.session_stats.reset()
+        elapsed = run(url, args.requests, args.threads, get)
+        stats = http_session.stats()
+        saved = stats["reused_connections"] * args.handshake_ms / 1000
+        print(f"{name:<17} {args.requests / elapsed:8.1f} req/s  "
+              f"{stats['new_connections']:4d} connections  reuse {stats['reuse_rate']:6.1%}  "
+              f"tcp connect {stats['mean_connect_ms']:6.2f} ms  handshake time saved {saved:6.2f} s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark JSON encoding of the daily time-series payload.
+
+For 30-, 250- and 1250-row payloads reports encode time with the stdlib json
+module and with orjson through FastJSONProvider, and p50/p99 latency of
+/api/market/daily/<symbol> on a cache miss (payload built and encoded) and a
+cache hit (pre-encoded bytes served as-is). Bars come from synthetic data
+placed in the bar store, so no upstream calls are made.
+
+Usage:
+    python benchmarks/bench_json.py [--requests 500]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import app as backend  # noqa: E402
+from bar_store import bar_store, synthetic_bars  # noqa: E402
+from json_provider import FastJSONProvider, orjson  # noqa: E402
+
+ROWS = (30, 250, 1250)
+
+
+def bars_with_rows(symbol, rows):
+    """Synthetic bars trimmed to exactly `rows` bars."""
+    bars = synthetic_bars(symbol, int(rows * 7 / 5) + 10)
+    return bars.since(bars.dates[-rows])
+
+
+def encode_ms(provider, payload, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        provider.dumps(payload)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def latency_ms(client, url, requests, clear_cache):
+    samples = []
+    for _ in range(requests):
+        if clear_cache:
+            backend.daily_cache.clear()
+        start = time.perf_counter()
+        client.get(url)
+        samples.append(time.perf_counter() - start)
+    return np.percentile(samples, 50) * 1000, np.percentile(samples, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    backend.rate_limiter.max_calls = float("inf")
+    client = backend.app.test_client()
+    stdlib = FastJSONProvider(backend.app)
+    stdlib.use_orjson = False
+    fast = FastJSONProvider(backend.app)
+    print(f"orjson {'available' if orjson is not None else 'not installed (stdlib fallback)'}\n")
+
+    print(f"{'rows':>5} {'bytes':>8} {'stdlib enc':>11} {'fast enc':>9}   "
+          f"{'miss p50/p99 (stdlib)':>22} {'miss p50/p99 (fast)':>20} {'hit p50/p99':>14}")
+    for rows in ROWS:
+        symbol = f"BENCH{rows}"
+        bar_store.put(symbol, "1mo", bars_with_rows(symbol, rows))
+        url = f"/api/market/daily/{symbol}"
+
+        backend.app.json = fast
+        backend.daily_cache.clear()
+        payload = backend.app.json.loads(client.get(url).data)
+        size = len(fast.encode_body(payload))
+
+        stdlib_enc = encode_ms(stdlib, payload, args.repeat)
+        fast_enc = encode_ms(fast, payload, args.repeat)
+
+        backend.app.json = stdlib
+        miss_stdlib = latency_ms(client, url, args.requests, clear_cache=True)
+        backend.app.json = fast
+        miss_fast = latency_ms(client, url, args.requests, clear_cache=True)
+        hit = latency_ms(client, url, args.requests, clear_cache=False)
+
+        print(f"{rows:5d} {size:8d} {stdlib_enc:9.3f}ms {fast_enc:7.3f}ms   "
+              f"{miss_stdlib[0]:9.3f}/{miss_stdlib[1]:.3f}ms {miss_fast[0]:8.3f}/{miss_fast[1]:.3f}ms "
+              f"{hit[0]:6.3f}/{hit[1]:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark quote latency with and without the per-route latency budget.
+
+A fake upstream answers most calls quickly but stalls on a fraction of them,
+like Yahoo on a bad day. Quote cache entries expire immediately so every
+request goes upstream. Requests are replayed once with an effectively
+unlimited budget and once with the configured quote budget; the report shows
+p50/p99/max latency and how many answers were live, stale or mock.
+
+Usage:
+    python benchmarks/bench_latency_budget.py [--requests 300] [--budget-ms 300] [--slow-rate 0.1]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import app as backend  # noqa: E402
+from latency_budget import upstream_budget  # noqa: E402
+
+
+class SlowUpstream:
+    """Upstream with a heavy latency tail."""
+    def __init__(self, fast, slow, slow_rate, seed=0):
+        self.fast = fast
+        self.slow = slow
+        self.slow_rate = slow_rate
+        self.rng = random.Random(seed)
+        index = pd.date_range("2026-01-05", periods=5, freq="B", tz="America/New_York")
+        self.frame = pd.DataFrame(
+            {"Open": 100.0, "High": 101.0, "Low": 99.0, "Close": 100.5, "Volume": 1e6},
+            index=index
+        )
+
+    def _wait(self):
+        time.sleep(self.slow if self.rng.random() < self.slow_rate else self.fast)
+
+    def info(self, symbol):
+        self._wait()
+        return {"symbol": symbol, "regularMarketPrice": 100.5}
+
+    def history(self, symbol, period):
+        self._wait()
+        return self.frame
+
+
+def replay(client, symbols, requests):
+    samples = []
+    sources = Counter()
+    for i in range(requests):
+        start = time.perf_counter()
+        response = client.get(f"/api/market/quote/{symbols[i % len(symbols)]}")
+        samples.append(time.perf_counter() - start)
+        sources[response.headers.get("X-Data-Source", "?")] += 1
+    return np.array(samples) * 1000, sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=300.0)
+    parser.add_argument("--fast-ms", type=float, default=40.0)
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    backend.rate_limiter.max_calls = float("inf")
+    backend.market_service.upstream = SlowUpstream(args.fast_ms / 1000, args.slow_ms / 1000, args.slow_rate)
+    # Every entry expires at once, so each request goes upstream but stale data stays available
+    backend.market_calendar.cache_ttl = lambda symbol, open_ttl, now=None: 0.001
+    client = backend.app.test_client()
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+
+    print(f"{args.requests} quote requests, upstream {args.fast_ms:.0f} ms "
+          f"({args.slow_rate:.0%} of calls {args.slow_ms:.0f} ms)\n")
+    for name, budget_ms in (("no budget", 60000.0), (f"{args.budget_ms:.0f} ms budget", args.budget_ms)):
+        backend.quote_cache.clear()
+        upstream_budget.set_budget("quote", budget_ms)
+        latencies, sources = replay(client, symbols, args.requests)
+        print(f"{name:<15} p50 {np.percentile(latencies, 50):7.1f} ms  p99 {np.percentile(latencies, 99):7.1f} ms  "
+              f"max {latencies.max():7.1f} ms  "
+              + "  ".join(f"{source} {count}" for source, count in sorted(sources.items())))
+
+
+if __name__ == "__main__":
+    main()
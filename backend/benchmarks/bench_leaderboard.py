@@ -0,0 +1,106 @@
+"""
+Benchmark the incremental leaderboard against valuing every account per request.
+
+Loads 100k users holding 10 of 2k symbols each into a Leaderboard, then
+compares a top-10 page and a user's rank served from it with the naive
+approach of valuing every account and sorting on each request. Also times
+price updates (re-valuing only the holders of moved symbols) and trades, and
+checks the incremental ranking against a full recomputation at the end.
+
+Usage:
+    python benchmarks/bench_leaderboard.py [--users 100000] [--symbols 2000] [--holdings 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from leaderboard import Leaderboard  # noqa: E402
+
+
+def generate(users, symbols, holdings, rng):
+    balances = {f"user{i}": rng.uniform(1000, 100000) for i in range(users)}
+    rows = [
+        {"user_id": f"user{i}", "symbol": f"SYM{s}", "quantity": rng.randint(1, 100), "avg_price": rng.uniform(5, 500)}
+        for i in range(users)
+        for s in rng.sample(range(symbols), holdings)
+    ]
+    return balances, rows
+
+
+def naive_ranking(balances, positions, prices):
+    values = {
+        user_id: cash + sum(quantity * prices[symbol] for symbol, quantity in positions[user_id].items())
+        for user_id, cash in balances.items()
+    }
+    return sorted(values.items(), key=lambda item: (-item[1], item[0]))
+
+
+def timed(function, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--holdings", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    balances, rows = generate(args.users, args.symbols, args.holdings, rng)
+    board = Leaderboard(loader=lambda: (balances, rows))
+    prices = {f"SYM{s}": rng.uniform(5, 500) for s in range(args.symbols)}
+    _, load_ms = timed(board.reload)
+    board.on_prices(prices)
+
+    positions = {user_id: {} for user_id in balances}
+    for row in rows:
+        positions[row["user_id"]][row["symbol"]] = row["quantity"]
+
+    print(f"{args.users} users x {args.holdings} holdings over {args.symbols} symbols (load {load_ms:.0f}ms)\n")
+    _, naive_ms = timed(naive_ranking, balances, positions, prices)
+    _, top_ms = timed(board.top, 10, repeat=1000)
+    _, rank_ms = timed(board.rank_of, "user12345", repeat=1000)
+    print(f"{'query':>10} {'naive':>9} {'incremental':>12}")
+    print(f"{'top 10':>10} {naive_ms:7.0f}ms {top_ms * 1000:10.1f}us")
+    print(f"{'my rank':>10} {naive_ms:7.0f}ms {rank_ms * 1000:10.1f}us\n")
+
+    # Price updates: 20 symbols move per batch
+    batches = [
+        {f"SYM{s}": rng.uniform(5, 500) for s in rng.sample(range(args.symbols), 20)}
+        for _ in range(200)
+    ]
+    start = time.perf_counter()
+    for batch in batches:
+        board.on_prices(batch)
+        prices.update(batch)
+    update_ms = (time.perf_counter() - start) * 1000 / len(batches)
+    holders = args.users * args.holdings * 20 / args.symbols
+    print(f"price batch of 20 symbols (~{holders:.0f} holders re-valued): {update_ms:.2f}ms")
+
+    # Trades: buys into a held or new symbol
+    start = time.perf_counter()
+    for i in range(10000):
+        user_id = f"user{rng.randrange(args.users)}"
+        symbol = f"SYM{rng.randrange(args.symbols)}"
+        balances[user_id] -= prices[symbol]
+        board.on_trade(user_id, [(symbol, 1, prices[symbol], "buy")], balances[user_id])
+        positions[user_id][symbol] = positions[user_id].get(symbol, 0) + 1
+    trade_us = (time.perf_counter() - start) * 1e6 / 10000
+    print(f"trade: {trade_us:.1f}us")
+
+    expected = naive_ranking(balances, positions, prices)[:100]
+    actual = board.top(100)
+    same = [board.handle(user_id) for user_id, _ in expected] == [entry["handle"] for entry in actual]
+    print(f"\ntop 100 matches a full recomputation: {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
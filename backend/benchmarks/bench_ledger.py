@@ -0,0 +1,119 @@
+"""
+Benchmark ledger replay on millions of transaction rows.
+
+Generates a random but valid ledger (no user sells more than they hold) for
+10k users and 500 symbols, replays it with the vectorized ledger.replay and,
+for the smallest size, with a plain Python loop applying the trade rules one
+row at a time, checking both agree. Also times a single user's rebuild from
+the full history against one resuming from a snapshot.
+
+Usage:
+    python benchmarks/bench_ledger.py [--rows 1000000,5000000] [--users 10000] [--symbols 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ledger  # noqa: E402
+
+
+def generate(rows, users, symbols, rng):
+    user = rng.integers(0, users, rows)
+    symbol = rng.integers(0, symbols, rows)
+    quantity = rng.integers(1, 50, rows).astype(np.float64)
+    price = np.round(rng.uniform(5, 500, rows), 2)
+    is_buy = rng.random(rows) < 0.6
+
+    # Turn sells that would oversell into buys, so the ledger stays valid
+    key = user.astype(np.int64) * symbols + symbol
+    order = np.argsort(key, kind="stable")
+    starts = np.flatnonzero(np.concatenate(([True], key[order][1:] != key[order][:-1])))
+    for start, end in zip(starts, np.append(starts[1:], rows)):
+        held = 0.0
+        for i in order[start:end]:
+            if not is_buy[i] and quantity[i] > held:
+                is_buy[i] = True
+            held += quantity[i] if is_buy[i] else -quantity[i]
+    return user, symbol, quantity, price, is_buy
+
+
+def python_replay(user, symbol, quantity, price, is_buy, users):
+    cash = [ledger.INITIAL_CASH] * users
+    positions = {}
+    for u, s, q, p, buy in zip(user.tolist(), symbol.tolist(), quantity.tolist(), price.tolist(), is_buy.tolist()):
+        held, avg_price = positions.get((u, s), (0.0, 0.0))
+        if buy:
+            avg_price = ((held * avg_price) + (q * p)) / (held + q)
+            held += q
+            cash[u] -= q * p
+        else:
+            held -= q
+            cash[u] += q * p
+        if held == 0:
+            positions.pop((u, s), None)
+        else:
+            positions[(u, s)] = (held, avg_price)
+    return cash, positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", default="1000000,5000000")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--symbols", type=int, default=500)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.rows.split(",")]
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>9} {'vectorized':>11} {'rows/s':>12} {'python':>9} {'match':>6}")
+    for rows in sizes:
+        user, symbol, quantity, price, is_buy = generate(rows, args.users, args.symbols, rng)
+        start = time.perf_counter()
+        cash, (pos_user, pos_symbol, pos_quantity, pos_avg) = ledger.replay(
+            user, symbol, quantity, price, is_buy, args.users, args.symbols
+        )
+        fast = time.perf_counter() - start
+
+        slow, match = None, "-"
+        if rows == sizes[0]:
+            start = time.perf_counter()
+            slow_cash, slow_positions = python_replay(user, symbol, quantity, price, is_buy, args.users)
+            slow = time.perf_counter() - start
+            expected = np.array([slow_positions[(u, s)] for u, s in zip(pos_user.tolist(), pos_symbol.tolist())])
+            match = "yes" if (
+                len(slow_positions) == len(pos_user)
+                and np.allclose(cash, slow_cash)
+                and np.allclose(pos_quantity, expected[:, 0])
+                and np.allclose(pos_avg, expected[:, 1], rtol=1e-9)
+            ) else "NO"
+        print(f"{rows:9d} {fast * 1000:9.0f}ms {rows / fast:12,.0f} "
+              f"{f'{slow * 1000:7.0f}ms' if slow else '        -'} {match:>6}")
+
+    # One active user's rebuild: full history vs. snapshot plus the last 1% of entries
+    entries = 100_000
+    history = [
+        {"id": str(i), "user_id": "u", "symbol": f"S{i % 20}", "quantity": 1, "price": 10.0 + i % 7,
+         "type": "buy" if i % 3 else "sell", "created_at": f"2025-01-01T{i:09d}"}
+        for i in range(entries)
+    ]
+    cut = entries - entries // 100
+    snapshot = {"u": ledger.replay_rows(history[:cut])["u"]}
+
+    start = time.perf_counter()
+    full = ledger.replay_rows(history)["u"]
+    full_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    resumed = ledger.replay_rows(history[cut:], snapshot)["u"]
+    resumed_ms = (time.perf_counter() - start) * 1000
+    same = abs(full.cash - resumed.cash) < 1e-6 and full.positions.keys() == resumed.positions.keys()
+    print(f"\nrebuild of a user with {entries} entries: full {full_ms:.0f}ms, "
+          f"from snapshot {resumed_ms:.1f}ms ({'same result' if same else 'DIFFERENT'})")
+
+
+if __name__ == "__main__":
+    main()
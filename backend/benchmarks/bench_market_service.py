@@ -0,0 +1,85 @@
+"""
+Benchmark the async market data service against a local fake upstream.
+
+Simulates N concurrent clients that each need info for several symbols (the
+search route's fan-out) and compares serial upstream calls on the request
+thread with fan-out through MarketDataService.
+
+Usage:
+    python benchmarks/bench_market_service.py [--clients 32] [--symbols 5] [--latency-ms 80]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from market_service import MarketDataService  # noqa: E402
+
+
+class FakeUpstream:
+    """Upstream that answers after a fixed latency, like a remote API would."""
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def info(self, symbol):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return {"symbol": symbol, "regularMarketPrice": 100.0}
+
+    def history(self, symbol, period):
+        raise NotImplementedError
+
+
+def run_clients(clients, requests_per_client, handler):
+    """Run handler concurrently from `clients` threads and return requests/second."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(clients * requests_per_client):
+            pool.submit(handler)
+    elapsed = time.perf_counter() - start
+    return clients * requests_per_client / elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=4, help="requests per client")
+    parser.add_argument("--symbols", type=int, default=5, help="symbols fetched per request")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="service semaphore size")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    upstream = FakeUpstream(args.latency_ms / 1000.0)
+
+    def serial_request():
+        for symbol in symbols:
+            upstream.info(symbol)
+
+    service = MarketDataService(
+        upstream=upstream,
+        max_concurrency=args.concurrency,
+        timeout=5.0,
+        max_workers=args.concurrency
+    )
+    service.get_info("warmup")
+
+    def service_request():
+        service.get_infos(symbols)
+
+    print(f"{args.clients} clients x {args.requests} requests, "
+          f"{args.symbols} symbols/request, {args.latency_ms:.0f} ms upstream latency")
+    for name, handler in (("serial", serial_request), ("fan-out", service_request)):
+        rps, elapsed = run_clients(args.clients, args.requests, handler)
+        print(f"  {name:8s} {rps:8.1f} req/s  ({elapsed:.2f}s total)")
+
+
+if __name__ == "__main__":
+    main()
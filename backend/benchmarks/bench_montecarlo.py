@@ -0,0 +1,63 @@
+"""
+Benchmark Monte Carlo portfolio simulation throughput.
+
+Reports paths/second for a 10-holding portfolio over a one-year horizon,
+in-process and split across process pools of increasing size, plus the
+per-core rate.
+
+Usage:
+    python benchmarks/bench_montecarlo.py [--paths 50000] [--assets 10] [--max-workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import montecarlo  # noqa: E402
+from worker_pool import set_process_pool  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paths", type=int, default=50000)
+    parser.add_argument("--assets", type=int, default=10)
+    parser.add_argument("--horizon", type=int, default=252)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1000, 10000, args.assets)
+    mu = rng.normal(0.0003, 0.0002, args.assets)
+    loadings = rng.normal(0, 0.01, (args.assets, args.assets))
+    covariance = loadings @ loadings.T / args.assets + np.eye(args.assets) * 1e-4
+
+    print(f"{args.paths} paths, {args.assets} holdings, {args.horizon}-day horizon, "
+          f"{min(args.horizon, montecarlo.MAX_STEPS)} steps")
+
+    workers = 1
+    while workers <= args.max_workers:
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            set_process_pool(pool)
+            montecarlo.simulate(values, mu, covariance, args.horizon, 2 * montecarlo.CHUNK_PATHS, seed=0, workers=workers)
+
+        start = time.perf_counter()
+        montecarlo.simulate(values, mu, covariance, args.horizon, args.paths, seed=0, workers=workers)
+        elapsed = time.perf_counter() - start
+        rate = args.paths / elapsed
+        print(f"  {workers:2d} worker(s) {rate:12,.0f} paths/s  ({rate / workers:,.0f} paths/s per core)")
+
+        if pool is not None:
+            set_process_pool(None)
+            pool.shutdown()
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
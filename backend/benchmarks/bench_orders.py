@@ -0,0 +1,117 @@
+"""
+Benchmark order matching with many resting orders.
+
+Places 100k limit and stop orders across 1k symbols, then replays batched
+price updates (every symbol moves on every tick) through the heap-based
+OrderEngine and through a matcher that scans every open order of each updated
+symbol. Fills go to a no-op executor so only matching is measured. Reports
+placement rate, time per batch, fills and the cost per fill for both.
+
+Usage:
+    python benchmarks/bench_orders.py [--orders 100000] [--symbols 1000] [--ticks 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from orders import OrderEngine  # noqa: E402
+
+
+def fill_nothing(user_id, symbol, quantity, price, side):
+    return None, None
+
+
+class ScanMatcher:
+    """Keeps open orders in a list per symbol and checks all of them on every update."""
+    def __init__(self):
+        self.books = {}
+
+    def place(self, order):
+        self.books.setdefault(order["symbol"], []).append(order)
+
+    def match(self, prices):
+        fills = 0
+        for symbol, price in prices.items():
+            still_open = []
+            for order in self.books.get(symbol, ()):
+                if order["type"] == "limit":
+                    crosses = price <= order["price"] if order["side"] == "buy" else price >= order["price"]
+                else:
+                    crosses = price >= order["price"] if order["side"] == "buy" else price <= order["price"]
+                if crosses:
+                    fills += 1
+                else:
+                    still_open.append(order)
+            self.books[symbol] = still_open
+        return fills
+
+
+def generate(args, rng):
+    symbols = [f"S{i:04d}" for i in range(args.symbols)]
+    base = rng.uniform(20, 500, args.symbols)
+    which = rng.integers(0, args.symbols, args.orders)
+    sides = rng.choice(["buy", "sell"], args.orders)
+    types = rng.choice(["limit", "stop"], args.orders, p=[0.7, 0.3])
+    # Orders rest 1-15% away from the starting price on the side they wait on
+    distance = rng.uniform(0.01, 0.15, args.orders)
+    below = (sides == "buy") == (types == "limit")
+    prices = base[which] * np.where(below, 1 - distance, 1 + distance)
+    orders = [
+        {"user": f"u{i % 5000}", "symbol": symbols[s], "side": side, "type": kind, "price": round(float(p), 2)}
+        for i, (s, side, kind, p) in enumerate(zip(which, sides, types, prices))
+    ]
+
+    # Random-walk prices, one batch of updates per tick for every symbol
+    steps = rng.normal(0, 0.01, (args.ticks, args.symbols))
+    paths = base * np.exp(np.cumsum(steps, axis=0))
+    ticks = [dict(zip(symbols, row.tolist())) for row in paths]
+    return orders, ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    orders, ticks = generate(args, np.random.default_rng(0))
+    print(f"{args.orders} orders across {args.symbols} symbols, {args.ticks} batches of {args.symbols} updates\n")
+
+    engine = OrderEngine(executor=fill_nothing)
+    start = time.perf_counter()
+    for order in orders:
+        engine.place(order["user"], order["symbol"], order["side"], order["type"], 1, order["price"])
+    place_seconds = time.perf_counter() - start
+
+    scanner = ScanMatcher()
+    for order in orders:
+        scanner.place(order)
+
+    results = {}
+    for name, match in (("heap", lambda batch: len(engine.match(batch))), ("scan", scanner.match)):
+        fills, batch_times = 0, []
+        for batch in ticks:
+            start = time.perf_counter()
+            fills += match(batch)
+            batch_times.append(time.perf_counter() - start)
+        results[name] = (fills, np.array(batch_times) * 1000)
+
+    print(f"placement: {args.orders / place_seconds:,.0f} orders/s\n")
+    print(f"{'matcher':>8} {'fills':>7} {'p50 batch':>10} {'p99 batch':>10} {'total':>9} {'per fill':>10}")
+    for name, (fills, batch_ms) in results.items():
+        total = batch_ms.sum()
+        print(f"{name:>8} {fills:7d} {np.percentile(batch_ms, 50):8.2f}ms {np.percentile(batch_ms, 99):8.2f}ms "
+              f"{total:7.0f}ms {total * 1000 / max(fills, 1):8.1f}us")
+    if results["heap"][0] != results["scan"][0]:
+        print("\nfill counts differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark building and querying the screener's metrics table.
+
+Builds the table through Screener.rebuild from a store holding two years of
+cached bars for 10k symbols (synthetic series marked as live, so they are
+screened), counting every read of the cache. Then times screening queries
+with vectorized masks against a Python loop over one metrics dict per symbol,
+and checks both return the same symbols.
+
+Usage:
+    python benchmarks/bench_screener.py [--symbols 10000] [--repeat 200]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import screener  # noqa: E402
+from bar_store import synthetic_bars  # noqa: E402
+
+QUERIES = (
+    ("return_1m > 5 and volatility < 30 and price < 50", "-return_1m"),
+    ("from_high > -5 and avg_volume > 5000000", "volatility"),
+    ("return_1y > 20, return_1w < 0", "-return_1y"),
+)
+
+
+class CachedStore:
+    """Bar store whose cache holds pre-generated bars; counts cache reads."""
+    def __init__(self, bars):
+        self.bars = bars
+        self.requests = 0
+
+    def cached_daily(self):
+        self.requests += 1
+        return dict(self.bars)
+
+
+def cached_bars(symbol):
+    bars = synthetic_bars(symbol, 730)
+    bars.source = "live"
+    return bars
+
+
+def python_screen(rows, conditions, sort, limit):
+    metric, descending = sort
+    matches = [
+        row for row in rows
+        if all(row[m] == row[m] and screener.OPERATORS[op](row[m], value) for m, op, value in conditions)
+    ]
+    present = [row for row in matches if row[metric] == row[metric]]
+    missing = [row for row in matches if row[metric] != row[metric]]
+    present.sort(key=lambda row: row[metric], reverse=descending)
+    return len(matches), [row["symbol"] for row in (present + missing)[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    start = time.perf_counter()
+    store = CachedStore({symbol: cached_bars(symbol) for symbol in symbols})
+    generate_s = time.perf_counter() - start
+
+    runner = screener.Screener(store=store, max_age=float("inf"))
+    start = time.perf_counter()
+    table = runner.rebuild()
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{args.symbols} symbols ({generate_s:.1f}s to generate bars): table built in {build_ms:.0f}ms "
+          f"from {store.requests} cache read\n")
+
+    rows = [
+        {"symbol": symbol, **{name: float(column[i]) for name, column in table.columns.items()}}
+        for i, symbol in enumerate(table.symbols.tolist())
+    ]
+    store.requests = 0
+    print(f"{'query':<52} {'matches':>8} {'vectorized':>11} {'python':>9} {'same':>5}")
+    for query, sort in QUERIES:
+        conditions, order = screener.parse_query(query), screener.parse_sort(sort)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            count, results = runner.current().screen(conditions, order, 50)
+        fast_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        start = time.perf_counter()
+        slow_count, slow_symbols = python_screen(rows, conditions, order, 50)
+        slow_ms = (time.perf_counter() - start) * 1000
+        same = count == slow_count and [row["symbol"] for row in results] == slow_symbols
+        print(f"{query:<52} {count:>8} {fast_ms:9.2f}ms {slow_ms:7.1f}ms {'yes' if same else 'NO':>5}")
+    print(f"\nstore requests while querying: {store.requests}")
+
+
+if __name__ == "__main__":
+    main()
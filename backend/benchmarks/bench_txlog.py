@@ -0,0 +1,128 @@
+"""
+Benchmark the columnar transaction log against dict-per-row transactions.
+
+Generates transaction dicts shaped like mock_db.mock_transactions (and
+Supabase query results) for 10k users and 500 symbols, measures their memory
+with tracemalloc against a TransactionLog built from them, and times a
+per-symbol group-by and a monthly activity aggregate on both: Python loops
+over the dicts versus the log's vectorized versions.
+
+Usage:
+    python benchmarks/bench_txlog.py [--rows 1000000] [--users 10000] [--symbols 500]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import txlog  # noqa: E402
+
+
+def generate(rows, users, symbols, rng):
+    user = rng.integers(0, users, rows).tolist()
+    symbol = rng.integers(0, symbols, rows).tolist()
+    quantity = rng.integers(1, 50, rows).tolist()
+    price = np.round(rng.uniform(5, 500, rows), 2).tolist()
+    is_buy = (rng.random(rows) < 0.6).tolist()
+    start = datetime(2023, 1, 1)
+    seconds = np.sort(rng.integers(0, 3 * 365 * 86400, rows)).tolist()
+    return [
+        {
+            "id": str(uuid.UUID(int=i)),
+            "user_id": f"user{user[i]}",
+            "symbol": f"SYM{symbol[i]}",
+            "quantity": quantity[i],
+            "price": price[i],
+            "type": "buy" if is_buy[i] else "sell",
+            "created_at": (start + timedelta(seconds=seconds[i])).isoformat(),
+        }
+        for i in range(rows)
+    ]
+
+
+def measure(build):
+    """Return (result, bytes allocated by build and still held)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def python_group_by(rows):
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for row in rows:
+        total = totals[row["symbol"]]
+        total[0] += 1
+        if row["type"] == "buy":
+            total[1] += row["quantity"] * row["price"]
+        else:
+            total[2] += row["quantity"] * row["price"]
+    return totals
+
+
+def python_monthly(rows):
+    totals = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        total = totals[row["created_at"][:7]]
+        total[0] += 1
+        total[1] += row["quantity"] * row["price"]
+    return totals
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--symbols", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows, dict_bytes = measure(lambda: generate(args.rows, args.users, args.symbols, rng))
+    (log, build_ms), log_bytes = measure(lambda: timed(txlog.TransactionLog.from_rows, rows))
+
+    print(f"{args.rows} transactions, {args.users} users, {args.symbols} symbols\n")
+    print(f"{'':>14} {'bytes/row':>10} {'total':>9}")
+    print(f"{'dict per row':>14} {dict_bytes / args.rows:10.0f} {dict_bytes / 2**20:7.0f}MB")
+    print(f"{'columnar':>14} {log_bytes / args.rows:10.0f} {log_bytes / 2**20:7.0f}MB")
+    print(f"(columns alone: {log.nbytes / args.rows:.0f} bytes/row; building the log took {build_ms:.0f}ms under tracemalloc)\n")
+
+    slow_symbols, slow_symbols_ms = timed(python_group_by, rows)
+    fast_symbols, fast_symbols_ms = timed(log.group_by, "symbol")
+    slow_months, slow_months_ms = timed(python_monthly, rows)
+    fast_months, fast_months_ms = timed(log.activity, "month")
+
+    symbols_match = all(
+        slow_symbols[symbol][0] == totals["trades"]
+        and np.isclose(slow_symbols[symbol][1], totals["buy_notional"])
+        and np.isclose(slow_symbols[symbol][2], totals["sell_notional"])
+        for symbol, totals in fast_symbols.items()
+    ) and len(slow_symbols) == len(fast_symbols)
+    months_match = [count for _, (count, _) in sorted(slow_months.items())] == fast_months["trades"]
+
+    print(f"{'aggregate':>16} {'python':>9} {'columnar':>9} {'match':>6}")
+    print(f"{'by symbol':>16} {slow_symbols_ms:7.0f}ms {fast_symbols_ms:7.1f}ms {'yes' if symbols_match else 'NO':>6}")
+    print(f"{'by month':>16} {slow_months_ms:7.0f}ms {fast_months_ms:7.1f}ms {'yes' if months_match else 'NO':>6}")
+
+    _, pnl_ms = timed(log.realized_pnl)
+    print(f"\nrealized P&L for every position: {pnl_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
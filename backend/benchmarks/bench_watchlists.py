@@ -0,0 +1,101 @@
+"""
+Benchmark opening a watchlist: one quote request per symbol vs. the watchlist endpoint.
+
+A fake upstream takes a fixed round-trip per call. A user has two 50-symbol
+watchlists that share 10 symbols. Opening each list is replayed once the way
+the frontend did it before (a quote request per symbol, each needing info and
+history calls) and once through /api/user/watchlists/<id>/quotes, which
+fetches one history per uncached symbol concurrently, starting from a cold
+cache. Reports wall time and upstream calls per opened list.
+
+Usage:
+    python benchmarks/bench_watchlists.py [--symbols 50] [--latency-ms 40]
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import app as backend  # noqa: E402
+import mock_db  # noqa: E402
+from latency_budget import upstream_budget  # noqa: E402
+
+
+class CountingUpstream:
+    """Upstream with a fixed round-trip that counts its calls."""
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+        index = pd.date_range("2026-01-05", periods=1, freq="B", tz="America/New_York")
+        self.frame = pd.DataFrame(
+            {"Open": 100.0, "High": 101.0, "Low": 99.0, "Close": 100.5, "Volume": 1e6},
+            index=index
+        )
+
+    def _wait(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def info(self, symbol):
+        self._wait()
+        return {"symbol": symbol, "regularMarketPrice": 100.5}
+
+    def history(self, symbol, period):
+        self._wait()
+        return self.frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    backend.rate_limiter.max_calls = float("inf")
+    upstream_budget.set_budget("quote", 60000)
+    upstream_budget.set_budget("watchlist", 60000)
+    upstream = CountingUpstream(args.latency_ms / 1000)
+    backend.market_service.upstream = upstream
+    client = backend.app.test_client()
+    headers = {"user-id": "bench"}
+
+    shared = [f"SHR{i}" for i in range(10)]
+    lists = [shared + [f"A{i}" for i in range(args.symbols - 10)], shared + [f"B{i}" for i in range(args.symbols - 10)]]
+    mock_db.mock_watchlists[:] = [
+        {"id": str(i), "user_id": "bench", "name": f"List {i}", "symbols": symbols,
+         "created_at": f"2026-01-0{i + 1}T00:00:00Z", "updated_at": f"2026-01-0{i + 1}T00:00:00Z"}
+        for i, symbols in enumerate(lists)
+    ]
+
+    print(f"two {args.symbols}-symbol watchlists sharing 10 symbols, {args.latency_ms:.0f} ms upstream round-trip\n")
+    print(f"{'':>22} {'list':>5} {'time':>9} {'upstream calls':>15}")
+
+    backend.quote_cache.clear()
+    for i, symbols in enumerate(lists):
+        upstream.calls = 0
+        start = time.perf_counter()
+        for symbol in symbols:
+            client.get(f"/api/market/quote/{symbol}")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{'quote per symbol':>22} {i + 1:>5} {elapsed:7.0f}ms {upstream.calls:>15}")
+
+    backend.quote_cache.clear()
+    for i in range(len(lists)):
+        upstream.calls = 0
+        start = time.perf_counter()
+        client.get(f"/api/user/watchlists/{i}/quotes", headers=headers)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{'watchlist endpoint':>22} {i + 1:>5} {elapsed:7.0f}ms {upstream.calls:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark trade latency and Supabase requests with and without write-behind.
+
+Runs concurrent buy trades through trades.execute_trade against a fake
+Supabase client whose requests take a random, long-tailed time, once with
+synchronous transaction inserts and once with the write-behind journal (in a
+temporary directory, fsync included). Reports trade p50/p99 latency and
+Supabase requests per trade, counting the flusher's batched inserts.
+
+Usage:
+    python benchmarks/bench_write_behind.py [--threads 16] [--trades 100] [--latency-ms 20]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import trades  # noqa: E402
+import write_behind  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Accepts any PostgREST-style chain and sleeps for one round-trip on execute()."""
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.rows = None
+
+    def insert(self, rows, **kwargs):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.rows = rows
+        return self
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.client.round_trip()
+        if self.table == "users":
+            return FakeResponse([{"cash_balance": 1e12}])
+        if self.table == "transactions" and self.rows is not None:
+            return FakeResponse([dict(row, id=row.get("id", "tx")) for row in self.rows])
+        return FakeResponse([])
+
+
+class FakeSupabase:
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def round_trip(self):
+        with self.lock:
+            self.requests += 1
+        # Long-tailed round-trip: lognormal around the median latency
+        time.sleep(self.latency * random.lognormvariate(0, 0.5))
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def run(args, write_behind_enabled):
+    client = FakeSupabase(args.latency_ms)
+    trades.database._client = client
+    trades.database._using_mock = False
+
+    journal = None
+    if write_behind_enabled:
+        directory = tempfile.mkdtemp()
+        journal = write_behind.TransactionJournal(os.path.join(directory, "bench.journal"), lambda: client)
+    write_behind._journal = journal
+    os.environ["TRANSACTION_WRITE_BEHIND"] = "1" if write_behind_enabled else "0"
+
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index):
+        own = []
+        for i in range(args.trades):
+            start = time.perf_counter()
+            trades.execute_trade(f"user{index}", "AAPL", 1, 100.0, "buy")
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if journal is not None:
+        while journal.backlog():
+            time.sleep(0.01)
+    total = args.threads * args.trades
+    latencies = np.array(latencies) * 1000
+    return {
+        "p50": np.percentile(latencies, 50),
+        "p99": np.percentile(latencies, 99),
+        "throughput": total / elapsed,
+        "requests": client.requests / total,
+        "fsyncs": journal.fsyncs if journal else 0,
+        "flushes": journal.flush_requests if journal else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--trades", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.trades} trades, {args.latency_ms:.0f} ms median Supabase round-trip\n")
+    print(f"{'mode':>12} {'p50':>9} {'p99':>9} {'trades/s':>9} {'req/trade':>10} {'fsyncs':>7} {'flushes':>8}")
+    for name, enabled in (("synchronous", False), ("write-behind", True)):
+        result = run(args, enabled)
+        print(f"{name:>12} {result['p50']:7.1f}ms {result['p99']:7.1f}ms {result['throughput']:9.0f} "
+              f"{result['requests']:10.2f} {result['fsyncs']:7d} {result['flushes']:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Aligned multi-symbol comparison series.
+Puts several symbols' daily closes on one date index so a chart can plot them
+together without aligning differently keyed series in the browser. Missing
+days are forward-filled from the symbol's previous close; the index starts on
+the first date every symbol has a bar, so no series is back-filled.
+"""
+import numpy as np
+
+from downsample import lttb_union
+
+MAX_SYMBOLS = 10
+
+
+def align(bars_list):
+    """
+    Align daily closes of several Bars on the union of their dates.
+
+    Args:
+        bars_list: List of non-empty Bars, one per symbol
+
+    Returns:
+        (dates, closes, filled): datetime64[D] index, (len(dates), len(bars_list))
+        array of closes and a boolean array marking forward-filled values
+    """
+    dates = bars_list[0].dates
+    for bars in bars_list[1:]:
+        dates = np.union1d(dates, bars.dates)
+
+    # Start where every series has data so nothing needs back-filling
+    start = max(bars.dates[0] for bars in bars_list)
+    dates = dates[np.searchsorted(dates, start):]
+
+    closes = np.empty((len(dates), len(bars_list)))
+    filled = np.empty((len(dates), len(bars_list)), dtype=bool)
+    for column, bars in enumerate(bars_list):
+        # Index of the latest bar on or before each date
+        position = np.searchsorted(bars.dates, dates, side="right") - 1
+        closes[:, column] = bars.close[position]
+        filled[:, column] = bars.dates[position] != dates
+    return dates, closes, filled
+
+
+def normalize(closes, base=100.0):
+    """Rebase every column so its first value equals `base`."""
+    return closes / closes[0] * base
+
+
+def build(bars_list, period, rebase=False, max_points=None):
+    """
+    Build the comparison payload.
+
+    Args:
+        bars_list: List of Bars, one per symbol, in the requested order
+        period: Range the bars cover
+        rebase: Normalize every series to 100 on the first date
+        max_points: Optional cap on the number of dates, applied with LTTB
+            so each series keeps its shape
+
+    Returns:
+        Dict with the shared date index and one array per symbol
+    """
+    dates, closes, filled = align(bars_list)
+    values = normalize(closes) if rebase and len(dates) else closes
+    filled_counts = filled.sum(axis=0)
+    if max_points:
+        index = lttb_union(dates.astype(np.int64), values, max_points)
+        dates, values = dates[index], values[index]
+    symbols = [bars.symbol for bars in bars_list]
+    return {
+        "symbols": symbols,
+        "range": period,
+        "normalized": rebase,
+        "dates": np.datetime_as_string(dates, unit="D").tolist(),
+        "series": {symbol: np.round(values[:, i], 4).tolist() for i, symbol in enumerate(symbols)},
+        "filled": {symbol: int(filled_counts[i]) for i, symbol in enumerate(symbols)},
+        "sources": {bars.symbol: bars.source for bars in bars_list},
+    }
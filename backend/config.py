@@ -0,0 +1,37 @@
+"""
+Environment configuration.
+The .env file is read on the first lookup rather than at import time, so cold
+starts that never need configuration do not pay for python-dotenv.
+"""
+import os
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env():
+    """Load variables from .env into the environment once."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
+
+
+def getenv(name, default=None):
+    """
+    Read an environment variable, loading .env first if it has not been loaded.
+
+    Args:
+        name: Variable name
+        default: Value returned when the variable is not set
+
+    Returns:
+        The variable's value, or default
+    """
+    load_env()
+    return os.getenv(name, default)
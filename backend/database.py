@@ -0,0 +1,73 @@
+"""
+Database client for the Investing101 application.
+The Supabase client (and the supabase package itself) is created on first use
+behind a lock rather than at import time. Without credentials, or if the client
+cannot be created, the mock database is used instead.
+"""
+import logging
+import threading
+
+import config
+import mock_db
+
+logger = logging.getLogger(__name__)
+
+
+class Database:
+    """
+    Lazily initialized handle to Supabase or the mock database.
+    """
+    def __init__(self):
+        self._client = None
+        self._using_mock = False
+        self._lock = threading.Lock()
+
+    def _initialize(self):
+        """Create the client once, even when several requests race for it."""
+        if self._client is not None:
+            return
+
+        with self._lock:
+            if self._client is not None:
+                return
+
+            supabase_url = config.getenv("SUPABASE_URL")
+            supabase_key = config.getenv("SUPABASE_KEY")
+            try:
+                if not supabase_url or not supabase_key:
+                    logger.warning("Missing required environment variables. Using mock database.")
+                    missing_vars = []
+                    if not supabase_url:
+                        missing_vars.append("SUPABASE_URL")
+                    if not supabase_key:
+                        missing_vars.append("SUPABASE_KEY")
+                    logger.warning(f"Missing variables: {', '.join(missing_vars)}")
+
+                    client, using_mock = mock_db.mock_supabase, True
+                else:
+                    from supabase import create_client
+                    client, using_mock = create_client(supabase_url, supabase_key), False
+            except Exception as e:
+                logger.error(f"Error initializing Supabase client: {str(e)}")
+                logger.warning("Falling back to mock database")
+                client, using_mock = mock_db.mock_supabase, True
+
+            # Publish the client last so unlocked readers never see it half set up
+            self._using_mock = using_mock
+            self._client = client
+
+    @property
+    def client(self):
+        """The Supabase client, or the mock client when using the mock database."""
+        self._initialize()
+        return self._client
+
+    @property
+    def using_mock(self):
+        """Whether requests are served from the mock database."""
+        self._initialize()
+        return self._using_mock
+
+
+# Shared database handle
+database = Database()
@@ -0,0 +1,106 @@
+"""
+Largest-Triangle-Three-Buckets downsampling for chart series.
+Keeps the first and last points and, from each bucket in between, the point
+forming the largest triangle with the point kept from the previous bucket and
+the average of the next bucket. This preserves peaks, troughs and overall
+shape far better than taking every n-th point. Bucket boundaries, next-bucket
+averages and per-bucket triangle areas are computed with NumPy; only the walk
+from bucket to bucket, where each choice depends on the previous one, is a
+Python loop, so cost scales with the output size rather than the input.
+"""
+import numpy as np
+
+# Smallest max_points accepted (first, last and one bucket)
+MIN_POINTS = 3
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Select the indices of the points to keep.
+
+    Args:
+        x: Ascending x values (e.g. timestamps as numbers)
+        y: Values aligned with x
+        threshold: Number of points to keep
+
+    Returns:
+        Ascending int64 array of selected indices, including the first and last point
+    """
+    n = len(y)
+    if threshold >= n or n <= MIN_POINTS:
+        return np.arange(n)
+    threshold = max(int(threshold), MIN_POINTS)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Buckets split the points between the first and last one
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of every bucket at once; the last bucket's "next" is the final point
+    counts = (ends - starts).astype(np.float64)
+    avg_x = np.append(np.add.reduceat(x[:-1], starts) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:-1], starts) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = starts[bucket], ends[bucket]
+        ax, ay = x[a], y[a]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        # Twice the triangle area, linear in the candidate point
+        area = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
+
+
+def downsample_bars(bars, max_points):
+    """
+    Downsample bars to at most max_points using LTTB on the close.
+
+    The bars kept are real bars from the series (their open/high/low/volume are
+    not aggregated), so every point still matches an actual session.
+
+    Args:
+        bars: Bars or IntradayBars
+        max_points: Maximum number of bars to return, or None to keep all
+
+    Returns:
+        Bars of the same type
+    """
+    if not max_points or len(bars) <= max_points:
+        return bars
+    index = lttb_indices(bars.dates.astype(np.int64), bars.close, max_points)
+    return bars.take(index)
+
+
+def lttb_union(x, columns, max_points):
+    """
+    Pick one shared set of indices for several aligned series.
+
+    Each column gets an equal share of max_points and the selections are
+    merged, so every series keeps its own peaks and the result still has at
+    most max_points points.
+
+    Args:
+        x: Shared ascending x values
+        columns: (len(x), k) array of series
+        max_points: Maximum number of indices to return
+
+    Returns:
+        Ascending array of indices into x
+    """
+    n, k = columns.shape
+    if not max_points or n <= max_points:
+        return np.arange(n)
+    share = max(max_points // max(k, 1), MIN_POINTS)
+    selections = [lttb_indices(x, columns[:, column], share) for column in range(k)]
+    index = np.unique(np.concatenate(selections))
+    if len(index) > max_points:
+        # Shares never exceed max_points in total unless k is large; trim evenly
+        index = index[np.linspace(0, len(index) - 1, max_points).astype(np.int64)]
+    return index
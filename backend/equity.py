@@ -0,0 +1,250 @@
+"""
+Daily equity curve per user: account value (cash plus holdings at the close)
+on every trading day since the first trade.
+Points are stored by date in an `equity_curves` table and extended
+incrementally. Each request values only the days from the first point that
+can have changed: the latest stored day (its close may have moved) or,
+when a backdated trade has arrived, that trade's date. Each point records how
+many of the user's transactions it includes, so a stored point whose count no
+longer matches the transaction log marks where recomputing has to start.
+
+Holdings and cash on each day come from cumulative sums over the user's
+transactions; valuation is one matrix product of daily quantities and closes
+from the bar store, with closes carried forward over days a symbol has no bar.
+
+Only real bars are used. A symbol upstream has no bars for is valued at its
+last trade price, and every day holding it is marked as estimated. Estimated
+points are returned but not stored, and neither is anything after them, so the
+next request values those days again.
+"""
+import logging
+from datetime import datetime
+
+import numpy as np
+
+import ledger
+import mock_db
+import txlog
+from bar_store import bar_store
+from database import database
+from downsample import lttb_indices
+from market_calendar import PERIOD_DAYS
+
+logger = logging.getLogger(__name__)
+
+
+def load_points(user_id):
+    """Return the user's stored curve points, oldest first."""
+    if database.using_mock:
+        return mock_db.get_equity_curve(user_id)
+
+    try:
+        return ledger._fetch_all(
+            lambda: database.client.table('equity_curves').select('*').eq('user_id', user_id).order('date')
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving equity curve for user {user_id}: {str(e)}")
+        logger.warning(f"Falling back to mock database for equity curve")
+        return mock_db.get_equity_curve(user_id)
+
+
+def save_points(user_id, points):
+    """Insert or replace curve points by (user_id, date)."""
+    if not points:
+        return
+    if database.using_mock:
+        mock_db.save_equity_points(user_id, points)
+        return
+
+    try:
+        database.client.table('equity_curves').upsert(points, on_conflict='user_id,date').execute()
+    except Exception as e:
+        logger.error(f"Error saving equity curve for user {user_id}: {str(e)}")
+        logger.warning(f"Falling back to mock database for equity curve")
+        mock_db.save_equity_points(user_id, points)
+
+
+def period_covering(start, end):
+    """Smallest bar store period reaching back from end to start (the longest if none does)."""
+    days = int((end - start) / np.timedelta64(1, "D"))
+    for period, period_days in PERIOD_DAYS.items():
+        if period_days >= days:
+            return period
+    return period
+
+
+def trading_days(bars_list, start, end):
+    """Union of the bar dates of every symbol from start on; business days to end when there are no bars."""
+    if not bars_list:
+        dates = np.arange(start, end + np.timedelta64(1, "D"))
+        return dates[np.is_busday(dates)]
+    dates = np.unique(np.concatenate([bars.dates for bars in bars_list]))
+    return dates[dates >= start]
+
+
+def carried_closes(bars, days, fallback):
+    """
+    Closes of one symbol on each day, carrying the last close forward.
+
+    Args:
+        bars: The symbol's Bars
+        days: datetime64[D] days to price
+        fallback: Prices to use before the symbol's first bar
+
+    Returns:
+        float64 array aligned with days
+    """
+    position = np.searchsorted(bars.dates, days, side="right") - 1
+    return np.where(position >= 0, bars.close[np.maximum(position, 0)], fallback)
+
+
+def value_days(log, days, bars_by_symbol, start_cash=ledger.INITIAL_CASH):
+    """
+    Value an account on each of the given days.
+
+    Args:
+        log: The user's TransactionLog
+        days: Ascending datetime64[D] days
+        bars_by_symbol: Dict of symbol to Bars
+        start_cash: Cash before the first transaction
+
+    Returns:
+        Dict with 'cash', 'holdings', 'value' and cumulative 'trades' arrays
+        aligned with days, plus an 'estimated' mask of days holding a symbol
+        without bars (valued at its last trade price)
+    """
+    trade_days = log.timestamp.astype("datetime64[D]")
+    # Transactions up to and including each day
+    included = np.searchsorted(trade_days, days, side="right")
+
+    signed_cash = np.where(log.is_buy, -log.notional, log.notional)
+    cash = start_cash + np.concatenate(([0.0], np.cumsum(signed_cash)))[included]
+
+    quantities = np.zeros((len(days), len(log.symbols)))
+    closes = np.zeros((len(days), len(log.symbols)))
+    estimated = np.zeros(len(days), dtype=bool)
+    signed_quantity = np.where(log.is_buy, log.quantity, -log.quantity)
+    for code, symbol in enumerate(log.symbols.values):
+        rows = np.flatnonzero(log.symbol == code)
+        # Per day: shares held and, before the first bar, the last trade price
+        held = np.searchsorted(rows, included, side="left")
+        quantities[:, code] = np.concatenate(([0.0], np.cumsum(signed_quantity[rows])))[held]
+        last_trade_price = log.price[rows][np.maximum(held - 1, 0)]
+        bars = bars_by_symbol.get(symbol)
+        if bars is None or not len(bars):
+            closes[:, code] = last_trade_price
+            estimated |= quantities[:, code] != 0
+        else:
+            closes[:, code] = carried_closes(bars, days, last_trade_price)
+
+    holdings = np.einsum("ij,ij->i", quantities, closes)
+    return {"cash": cash, "holdings": holdings, "value": cash + holdings, "trades": included, "estimated": estimated}
+
+
+def dirty_from(points, trade_days):
+    """
+    First stored day that has to be recomputed.
+
+    Args:
+        points: Stored points, oldest first
+        trade_days: Sorted datetime64[D] days of the user's transactions
+
+    Returns:
+        A datetime64[D] day, or None when nothing is stored
+    """
+    if not points:
+        return None
+    stored_days = np.array([point['date'] for point in points], dtype="datetime64[D]")
+    stored_counts = np.array([point['trades'] for point in points])
+    changed = np.flatnonzero(np.searchsorted(trade_days, stored_days, side="right") != stored_counts)
+    # The latest point is always refreshed: its close may still move
+    return stored_days[changed[0]] if len(changed) else stored_days[-1]
+
+
+def update_curve(user_id):
+    """
+    Bring a user's stored curve up to date.
+
+    Returns:
+        Dict with 'points' (oldest first), 'estimated' (one flag per point),
+        'recomputed_from' (first recomputed date or None), 'points_recomputed',
+        'points_saved' and 'missing_prices' (symbols valued at their last
+        trade price)
+    """
+    result = {"points": [], "estimated": [], "recomputed_from": None,
+              "points_recomputed": 0, "points_saved": 0, "missing_prices": []}
+    log = txlog.TransactionLog.from_database(user_id)
+    if not len(log):
+        return result
+
+    points = load_points(user_id)
+    trade_days = log.timestamp.astype("datetime64[D]")
+    first_day = trade_days[0]
+    start = dirty_from(points, trade_days)
+    if start is None or start < first_day:
+        start = first_day
+
+    today = np.datetime64(datetime.now().date(), "D")
+    period = period_covering(first_day, today)
+    bars_by_symbol = bar_store.get_many(log.symbols.values, period)
+    missing = sorted(symbol for symbol, bars in bars_by_symbol.items() if bars is None or not len(bars))
+    if missing:
+        logger.warning(f"No daily bars for {', '.join(missing)}; valuing them at the last trade price")
+    days = trading_days([bars for bars in bars_by_symbol.values() if bars is not None and len(bars)], start, today)
+    if not len(days):
+        result.update(points=points, estimated=[False] * len(points))
+        return result
+
+    values = value_days(log, days, bars_by_symbol)
+    computed = [
+        {
+            'user_id': user_id,
+            'date': day,
+            'cash': round(cash, 2),
+            'holdings': round(holdings, 2),
+            'value': round(value, 2),
+            'trades': trades,
+        }
+        for day, cash, holdings, value, trades in zip(
+            np.datetime_as_string(days, unit="D").tolist(), values["cash"].tolist(),
+            values["holdings"].tolist(), values["value"].tolist(), values["trades"].tolist()
+        )
+    ]
+    estimated = values["estimated"].tolist()
+    # Store up to the first estimated point so later requests revisit it
+    saved = estimated.index(True) if True in estimated else len(computed)
+    save_points(user_id, computed[:saved])
+
+    start_string = str(days[0])
+    kept = [point for point in points if point['date'] < start_string]
+    logger.info(f"Recomputed {len(computed)} equity curve points for user {user_id} from {start_string} "
+                f"({saved} stored)")
+    result.update(
+        points=kept + computed,
+        estimated=[False] * len(kept) + estimated,
+        recomputed_from=start_string,
+        points_recomputed=len(computed),
+        points_saved=saved,
+        missing_prices=missing,
+    )
+    return result
+
+
+def curve_payload(curve, max_points=None):
+    """Columnar equity curve from update_curve, optionally downsampled with LTTB on the value."""
+    points, estimated = curve["points"], curve["estimated"]
+    if max_points and len(points) > max_points:
+        dates = np.array([point['date'] for point in points], dtype="datetime64[D]")
+        index = lttb_indices(dates.astype(np.int64), [point['value'] for point in points], max_points).tolist()
+        points = [points[i] for i in index]
+        estimated = [estimated[i] for i in index]
+    return {
+        "dates": [point['date'] for point in points],
+        "value": [point['value'] for point in points],
+        "cash": [point['cash'] for point in points],
+        "holdings": [point['holdings'] for point in points],
+        "estimated": estimated,
+        "missing_prices": curve["missing_prices"],
+        "recomputed_from": curve["recomputed_from"],
+        "points_recomputed": curve["points_recomputed"],
+    }
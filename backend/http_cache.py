@@ -0,0 +1,91 @@
+"""
+HTTP caching for cached market data responses.
+Cache entries keep their encoded body together with a strong ETag and the time
+they were stored, so responses can carry ETag, Last-Modified and Cache-Control
+headers that track the server-side TTL, and conditional requests can be
+answered with a 304 without rebuilding or re-encoding anything.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from flask import current_app, request
+
+# Upper bound on how long browsers may reuse a response without revalidating;
+# shared caches (the Vercel edge) follow the full remaining TTL
+BROWSER_MAX_AGE = 60
+
+# Response header saying where market data came from: live, stale or mock
+DATA_SOURCE_HEADER = "X-Data-Source"
+
+
+class CachedBody:
+    """
+    An encoded response body plus the validators derived from it.
+    """
+    def __init__(self, body, ttl, mimetype="application/json"):
+        """
+        Initialize the entry.
+
+        Args:
+            body: Encoded response bytes
+            ttl: Seconds the entry stays fresh
+            mimetype: Response mimetype
+        """
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        now = time.time()
+        self.last_modified = datetime.fromtimestamp(int(now), tz=timezone.utc)
+        self.expires_at = now + ttl
+
+    def remaining(self):
+        """Seconds until the entry expires (never negative)."""
+        return max(0, int(self.expires_at - time.time()))
+
+
+def mark_source(response, source):
+    """
+    Set the data source header on a response and return it.
+
+    Mock responses are also marked no-store, so neither browsers nor the edge
+    keep serving synthetic data once upstream recovers.
+    """
+    response.headers[DATA_SOURCE_HEADER] = source
+    if source == "mock":
+        response.cache_control.no_store = True
+    return response
+
+
+def respond(entry, stale_while_revalidate, vary=None, source="live"):
+    """
+    Build the response for a cached body, honouring conditional request headers.
+
+    Expired entries served as a stale fallback get zero max-age, so only the
+    client that asked receives them.
+
+    Args:
+        entry: The CachedBody to serve
+        stale_while_revalidate: Seconds a shared cache may serve the entry
+            stale while it refetches in the background
+        vary: Optional request header name the response varies on
+        source: Data source reported in the X-Data-Source header
+
+    Returns:
+        A 200 response with the body, or a 304 if the client's copy is current
+    """
+    response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+
+    remaining = entry.remaining()
+    response.cache_control.public = True
+    response.cache_control.max_age = min(remaining, BROWSER_MAX_AGE)
+    response.cache_control.s_maxage = remaining
+    response.cache_control.stale_while_revalidate = int(stale_while_revalidate)
+    if vary:
+        response.vary.add(vary)
+    mark_source(response, source)
+
+    # Turns the response into a body-less 304 when If-None-Match/If-Modified-Since match
+    return response.make_conditional(request)
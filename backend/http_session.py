@@ -0,0 +1,219 @@
+"""
+Shared HTTP session for upstream market data calls.
+Every yfinance Ticker/Tickers call goes through one process-wide requests
+session, so connections (and their TCP/TLS handshakes) are kept alive and
+reused across requests and threads, and Yahoo's cookies live in one cookie jar
+until they expire instead of being negotiated again for every ticker. The
+session counts requests, new connections and time spent connecting so the
+reuse rate and handshake time saved can be reported.
+"""
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Default (connect, read) timeout for calls that do not pass their own
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Browser-like headers; Yahoo rejects the default python-requests agent
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+    ),
+    "Connection": "keep-alive",
+}
+
+
+class SessionStats:
+    """
+    Thread-safe counters for requests sent and connections opened.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero all counters."""
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.connect_seconds = 0.0
+            self.retries = 0
+
+    def record_request(self, retries=0):
+        with self._lock:
+            self.requests += 1
+            self.retries += retries
+
+    def record_connect(self, seconds):
+        with self._lock:
+            self.connections += 1
+            self.connect_seconds += seconds
+
+    def snapshot(self):
+        """
+        Summarize the counters.
+
+        Returns:
+            Dict with request and connection counts, the connection reuse rate
+            and an estimate of handshake time saved (reused requests times the
+            mean time a new connection took to set up)
+        """
+        with self._lock:
+            requests_sent, connections = self.requests, self.connections
+            connect_seconds, retries = self.connect_seconds, self.retries
+
+        reused = max(requests_sent - connections, 0)
+        mean_connect_ms = connect_seconds / connections * 1000 if connections else 0.0
+        return {
+            "requests": requests_sent,
+            "new_connections": connections,
+            "reused_connections": reused,
+            "reuse_rate": reused / requests_sent if requests_sent else 0.0,
+            "retries": retries,
+            "mean_connect_ms": round(mean_connect_ms, 3),
+            "handshake_ms_saved": round(reused * mean_connect_ms, 3),
+        }
+
+
+# Counters for the shared session
+session_stats = SessionStats()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            session_stats.record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        # Includes the TLS handshake; failed attempts count as new connections too
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            session_stats.record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with instrumented connection pools and a default timeout.
+    """
+    def __init__(self, pool_connections, pool_maxsize, retries, timeout=DEFAULT_TIMEOUT):
+        """
+        Initialize the adapter.
+
+        Args:
+            pool_connections: Number of per-host pools to keep
+            pool_maxsize: Keep-alive connections kept per host
+            retries: urllib3 Retry policy
+            timeout: Timeout used when a call does not pass one
+        """
+        self.timeout = timeout
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retries
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        try:
+            response = super().send(request, timeout=timeout or self.timeout, **kwargs)
+        except Exception:
+            session_stats.record_request()
+            raise
+        retries = response.raw.retries
+        session_stats.record_request(len(retries.history) if retries is not None else 0)
+        return response
+
+
+def create_session(pool_maxsize=None, retries=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Create a pooled keep-alive session.
+
+    Args:
+        pool_maxsize: Keep-alive connections per host; defaults to
+            UPSTREAM_POOL_SIZE (16, the size of the market data thread pool)
+        retries: Total retries for failed connections and 429/5xx responses;
+            defaults to UPSTREAM_RETRIES (3)
+        timeout: Default (connect, read) timeout
+
+    Returns:
+        A configured requests.Session
+    """
+    if pool_maxsize is None:
+        pool_maxsize = int(config.getenv("UPSTREAM_POOL_SIZE", "16"))
+    if retries is None:
+        retries = int(config.getenv("UPSTREAM_RETRIES", "3"))
+
+    # Exponential backoff (0.3s, 0.6s, 1.2s, ...) that honours Retry-After on 429s.
+    # Connection failures get a single retry: a dead route or DNS failure will
+    # not recover within one request, and callers fall back to cached/mock data.
+    retry = Retry(
+        total=retries,
+        connect=min(retries, 1),
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = PooledAdapter(pool_connections=8, pool_maxsize=pool_maxsize, retries=retry, timeout=timeout)
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+                logger.info("Created pooled upstream HTTP session")
+    return _session
+
+
+def stats():
+    """Connection reuse statistics for the shared session."""
+    result = session_stats.snapshot()
+    # Yahoo's cookies are sent until they expire, then replaced by the next response
+    result["cookies"] = len(_session.cookies) if _session is not None else 0
+    return result
@@ -0,0 +1,233 @@
+"""
+Vectorized technical indicators over daily OHLCV arrays.
+Rolling windows use cumulative sums or stride views; exponential averages use
+a blocked closed form so no indicator loops over individual bars in Python.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Default parameters for each supported indicator; a value given in a spec is
+# parsed with the type of its default, so the Bollinger width may be fractional
+INDICATORS = {
+    "sma": (20,),
+    "ema": (20,),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "bb": (20, 2.0),
+    "atr": (14,),
+}
+
+# Block length for the exponential moving average closed form; keeps the
+# (1 - alpha) ** -k scaling factors well inside float64 range
+_EWM_BLOCK = 256
+
+
+def rolling_sum(values, window):
+    """Sum over a trailing window; the first window - 1 entries are NaN."""
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        csum = np.cumsum(np.concatenate(([0.0], values)))
+        out[window - 1:] = csum[window:] - csum[:-window]
+    return out
+
+
+def sma(values, window):
+    """Simple moving average."""
+    return rolling_sum(values, window) / window
+
+
+def rolling_std(values, window):
+    """Population standard deviation over a trailing window."""
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        out[window - 1:] = sliding_window_view(values, window).std(axis=1)
+    return out
+
+
+def _ewm(values, alpha, seed):
+    """
+    Exponentially weighted recursion y[t] = (1 - alpha) * y[t-1] + alpha * x[t].
+
+    Args:
+        values: Input series; values[0] is replaced by the seed
+        alpha: Smoothing factor in (0, 1]
+        seed: Initial value y[0]
+
+    Returns:
+        The smoothed series, same length as values
+    """
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    out[0] = seed
+    if alpha >= 1.0:
+        out[1:] = values[1:]
+        return out
+
+    decay = 1.0 - alpha
+    powers = decay ** np.arange(_EWM_BLOCK + 1)
+    previous = seed
+    for start in range(1, n, _EWM_BLOCK):
+        block = values[start:start + _EWM_BLOCK]
+        m = len(block)
+        # y[start + j] = decay^(j+1) * prev + alpha * sum_k decay^(j-k) * x[start + k]
+        weighted = np.cumsum(block / powers[:m]) * powers[:m]
+        out[start:start + m] = powers[1:m + 1] * previous + alpha * weighted
+        previous = out[start + m - 1]
+    return out
+
+
+def _seeded_ewm(values, window, alpha):
+    """Exponential average that starts at the mean of the first window."""
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        seed = values[:window].mean()
+        out[window - 1:] = _ewm(values[window - 1:], alpha, seed)
+    return out
+
+
+def ema(values, window):
+    """Exponential moving average seeded with the SMA of the first window."""
+    return _seeded_ewm(values, window, 2.0 / (window + 1))
+
+
+def _wilder(values, window):
+    """Wilder smoothing (alpha = 1 / window) seeded with the first window's mean."""
+    return _seeded_ewm(values, window, 1.0 / window)
+
+
+def rsi(close, window=14):
+    """Relative Strength Index with Wilder smoothing."""
+    out = np.full(len(close), np.nan)
+    if len(close) <= window:
+        return out
+
+    delta = np.diff(close)
+    avg_gain = _wilder(np.clip(delta, 0, None), window)
+    avg_loss = _wilder(np.clip(-delta, 0, None), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        values = 100.0 - 100.0 / (1.0 + rs)
+    values = np.where(avg_loss == 0, 100.0, values)
+    values = np.where(np.isnan(avg_gain), np.nan, values)
+    out[1:] = values
+    return out
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD line, signal line and histogram."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(len(close), np.nan)
+    valid = np.flatnonzero(~np.isnan(line))
+    if len(valid):
+        signal_line[valid[0]:] = ema(line[valid[0]:], signal)
+    return {
+        "macd": line,
+        "signal": signal_line,
+        "histogram": line - signal_line,
+    }
+
+
+def bollinger(close, window=20, width=2):
+    """Bollinger Bands around a simple moving average."""
+    middle = sma(close, window)
+    deviation = rolling_std(close, window) * width
+    return {
+        "upper": middle + deviation,
+        "middle": middle,
+        "lower": middle - deviation,
+    }
+
+
+def atr(high, low, close, window=14):
+    """Average True Range with Wilder smoothing."""
+    if not len(close):
+        return np.full(0, np.nan)
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    true_range = np.maximum.reduce([
+        high - low,
+        np.abs(high - prev_close),
+        np.abs(low - prev_close),
+    ])
+    true_range[0] = high[0] - low[0]
+    return _wilder(true_range, window)
+
+
+def parse_spec(spec):
+    """
+    Parse an indicator spec such as "sma:20,rsi:14,macd:12:26:9".
+
+    Args:
+        spec: Comma separated list of name[:param...] entries
+
+    Returns:
+        List of (canonical_key, name, params) tuples
+
+    Raises:
+        ValueError: If an indicator or its parameters are invalid
+    """
+    parsed = []
+    for entry in spec.split(","):
+        entry = entry.strip().lower()
+        if not entry:
+            continue
+
+        name, *raw_params = entry.split(":")
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+
+        defaults = INDICATORS[name]
+        if len(raw_params) > len(defaults):
+            raise ValueError(f"Too many parameters for {name}")
+
+        try:
+            params = [type(default)(value) for default, value in zip(defaults, raw_params)]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}")
+        params += list(defaults[len(params):])
+
+        if any(p <= 0 for p in params) or any(p > 1000 for p in params):
+            raise ValueError(f"Parameters for {name} must be between 1 and 1000")
+
+        # "g" keeps bb:20:2 and bb:20:2.0 on one key
+        key = ":".join([name, *(format(p, "g") for p in params)])
+        parsed.append((key, name, tuple(params)))
+
+    if not parsed:
+        raise ValueError("At least one indicator is required")
+    return parsed
+
+
+def compute(parsed, bars):
+    """
+    Compute parsed indicators for a set of bars.
+
+    Args:
+        parsed: Output of parse_spec
+        bars: Bars to compute on
+
+    Returns:
+        Dict of canonical key to an array, or to a dict of named arrays
+    """
+    results = {}
+    for key, name, params in parsed:
+        if name == "sma":
+            results[key] = sma(bars.close, *params)
+        elif name == "ema":
+            results[key] = ema(bars.close, *params)
+        elif name == "rsi":
+            results[key] = rsi(bars.close, *params)
+        elif name == "macd":
+            results[key] = macd(bars.close, *params)
+        elif name == "bb":
+            results[key] = bollinger(bars.close, *params)
+        elif name == "atr":
+            results[key] = atr(bars.high, bars.low, bars.close, *params)
+    return results
+
+
+def to_json_values(values):
+    """Round an indicator array to 4 decimals with NaN as None."""
+    return np.where(np.isnan(values), None, np.round(values, 4)).tolist()
@@ -0,0 +1,320 @@
+"""
+Intraday OHLCV bars with server-side resampling.
+Each symbol's finest needed interval is fetched from upstream once and cached;
+coarser intervals are derived from it by vectorized OHLCV resampling rather
+than separate upstream calls. While a session is trading, refreshes fetch only
+today's bars and append them to the cached series instead of downloading the
+whole range again.
+"""
+import logging
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bar_store import Bars, MOCK_BASE_PRICES
+from market_cache import TTLCache
+from market_calendar import market_calendar
+from market_service import market_service
+
+logger = logging.getLogger(__name__)
+
+# Supported bar intervals in minutes
+INTERVAL_MINUTES = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+}
+
+# Trading days covered by each range
+RANGE_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 22,
+}
+
+# Finest interval fetched for each range; Yahoo only serves 1m bars for the last 7 days
+BASE_INTERVAL = {
+    "1d": "1m",
+    "5d": "1m",
+    "1mo": "5m",
+}
+
+# How often today's bars are refreshed while the market is trading
+REFRESH_SECONDS = 60
+
+# How long a cached base series is kept at most
+BASE_TTL = 24 * 60 * 60
+
+# Fetch locks shared by hash of the series key; a fixed pool so symbols that
+# were requested once do not each leave a lock behind
+LOCK_STRIPES = 64
+
+
+def validate(interval, period):
+    """
+    Check an interval/range combination.
+
+    Raises:
+        ValueError: If either is unknown or the interval is finer than the
+            base interval available for the range
+    """
+    if interval not in INTERVAL_MINUTES:
+        raise ValueError(f"interval must be one of: {', '.join(INTERVAL_MINUTES)}")
+    if period not in RANGE_DAYS:
+        raise ValueError(f"range must be one of: {', '.join(RANGE_DAYS)}")
+    base = BASE_INTERVAL[period]
+    if INTERVAL_MINUTES[interval] % INTERVAL_MINUTES[base]:
+        raise ValueError(f"interval {interval} is not available for range {period} (finest is {base})")
+
+
+class IntradayBars(Bars):
+    """
+    Columnar intraday OHLCV series; dates are datetime64[m] in exchange local time.
+    """
+    def date_strings(self):
+        """Return the bar start times as YYYY-MM-DDTHH:MM strings."""
+        return np.datetime_as_string(self.dates, unit="m").tolist()
+
+    def last_sessions(self, days):
+        """Return the bars of the last `days` sessions present in the series."""
+        session_days = np.unique(self.dates.astype("datetime64[D]"))
+        if len(session_days) <= days:
+            return self
+        return self.since(session_days[-days].astype("datetime64[m]"))
+
+    @classmethod
+    def from_history(cls, symbol, hist):
+        """Build bars from a yfinance intraday history DataFrame."""
+        index = hist.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)
+        return cls(
+            symbol,
+            index.values.astype("datetime64[m]"),
+            hist["Open"].to_numpy(dtype=np.float64),
+            hist["High"].to_numpy(dtype=np.float64),
+            hist["Low"].to_numpy(dtype=np.float64),
+            hist["Close"].to_numpy(dtype=np.float64),
+            hist["Volume"].to_numpy(dtype=np.float64),
+        )
+
+
+def resample(bars, minutes, session_open):
+    """
+    Aggregate bars into coarser buckets aligned to the session open.
+
+    Args:
+        bars: IntradayBars at a finer interval that divides `minutes`
+        minutes: Target interval in minutes
+        session_open: Session open as a datetime.time; buckets start there
+            (e.g. 09:30, 10:30, ... for hourly bars)
+
+    Returns:
+        IntradayBars with one bar per non-empty bucket
+    """
+    if minutes <= 1 or not len(bars):
+        return bars
+
+    days = bars.dates.astype("datetime64[D]")
+    minute_of_day = (bars.dates - days).astype(np.int64)
+    open_minute = session_open.hour * 60 + session_open.minute
+    offset = (minute_of_day - open_minute) // minutes * minutes + open_minute
+    bucket = days.astype("datetime64[m]") + offset.astype("timedelta64[m]")
+
+    # Bars are sorted, so every bucket is a contiguous run
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.concatenate((starts[1:], [len(bucket)])) - 1
+    return IntradayBars(
+        bars.symbol,
+        bucket[starts],
+        bars.open[starts],
+        np.maximum.reduceat(bars.high, starts),
+        np.minimum.reduceat(bars.low, starts),
+        bars.close[ends],
+        np.add.reduceat(bars.volume, starts),
+        bars.source
+    )
+
+
+def merge(existing, update):
+    """Replace the tail of `existing` from the first bar of `update` onwards."""
+    if not len(update):
+        return existing
+    keep = int(np.searchsorted(existing.dates, update.dates[0]))
+    return IntradayBars(
+        existing.symbol,
+        np.concatenate((existing.dates[:keep], update.dates)),
+        np.concatenate((existing.open[:keep], update.open)),
+        np.concatenate((existing.high[:keep], update.high)),
+        np.concatenate((existing.low[:keep], update.low)),
+        np.concatenate((existing.close[:keep], update.close)),
+        np.concatenate((existing.volume[:keep], update.volume)),
+        existing.source
+    )
+
+
+def synthetic_intraday(symbol, sessions, interval, calendar=None, now=None):
+    """
+    Generate deterministic mock intraday bars for a symbol.
+
+    Args:
+        symbol: The stock symbol (seeds the random walk)
+        sessions: Number of trading sessions to cover
+        interval: Bar interval (a key of INTERVAL_MINUTES)
+        calendar: MarketCalendar used to find sessions
+        now: Optional current time; today's session is cut off here
+
+    Returns:
+        IntradayBars with source "mock"
+    """
+    calendar = calendar or market_calendar
+    exchange = calendar.exchange_for(symbol)
+    local_now = (now or datetime.now(exchange.tz)).astimezone(exchange.tz)
+    step = np.timedelta64(INTERVAL_MINUTES[interval], "m")
+
+    days = []
+    day = local_now.date()
+    while len(days) < sessions:
+        if exchange.is_trading_day(day) and exchange.session(day)[0] <= local_now:
+            days.append(day)
+        day -= timedelta(days=1)
+
+    stamps = []
+    for day in reversed(days):
+        session_open, session_close = exchange.session(day)
+        end = min(session_close, local_now)
+        stamps.append(np.arange(
+            np.datetime64(session_open.replace(tzinfo=None), "m"),
+            np.datetime64(end.replace(tzinfo=None), "m"),
+            step
+        ))
+    dates = np.concatenate(stamps) if stamps else np.array([], dtype="datetime64[m]")
+    n = len(dates)
+
+    rng = np.random.default_rng(zlib.crc32(f"{symbol.upper()}:intraday".encode()))
+    base_price = MOCK_BASE_PRICES.get(symbol.upper(), 100.0)
+    scale = np.sqrt(INTERVAL_MINUTES[interval] / 390)
+
+    close = base_price * np.exp(np.cumsum(rng.normal(0, 0.015 * scale, n)))
+    open_ = np.concatenate(([base_price], close[:-1]))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004 * scale, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004 * scale, n)))
+    volume = np.floor(rng.uniform(10_000, 200_000, n) * INTERVAL_MINUTES[interval])
+    return IntradayBars(symbol.upper(), dates, open_, high, low, close, volume, source="mock")
+
+
+class _BaseSeries:
+    """A cached base-interval series and when its tail is next refreshed."""
+    def __init__(self, bars, sessions, refresh_at):
+        self.bars = bars
+        self.sessions = sessions
+        self.refresh_at = refresh_at
+
+
+class IntradayStore:
+    """
+    Caches base-interval intraday bars per symbol and serves resampled views.
+    """
+    def __init__(self, service=None, calendar=None, refresh=REFRESH_SECONDS, max_entries=256):
+        """
+        Initialize the store.
+
+        Args:
+            service: MarketDataService used for upstream fetches
+            calendar: MarketCalendar used for sessions and refresh timing
+            refresh: Seconds between tail refreshes while the market is trading
+            max_entries: Maximum number of cached base series
+        """
+        self.service = service or market_service
+        self.calendar = calendar or market_calendar
+        self.refresh = refresh
+        self.cache = TTLCache(max_entries=max_entries)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+    def _refresh_at(self, symbol):
+        return time.time() + self.calendar.cache_ttl(symbol, self.refresh)
+
+    def base(self, symbol, period):
+        """
+        Get the base-interval series covering a range, fetching or extending it as needed.
+
+        Returns:
+            IntradayBars at BASE_INTERVAL[period], or None if upstream has no data
+        """
+        interval = BASE_INTERVAL[period]
+        sessions = RANGE_DAYS[period]
+        key = (symbol, interval)
+
+        # One fetch per series at a time; other requests wait and reuse it
+        with self._lock_for(key):
+            entry = self.cache.get(key)
+            if entry is not None and entry.sessions >= sessions:
+                if time.time() < entry.refresh_at:
+                    return entry.bars
+
+                # Only today's bars are fetched and appended to the cached series
+                hist = self.service.get_intraday(symbol, "1d", interval)
+                if hist is not None:
+                    bars = merge(entry.bars, IntradayBars.from_history(symbol, hist))
+                    entry = _BaseSeries(bars.last_sessions(entry.sessions), entry.sessions, self._refresh_at(symbol))
+                else:
+                    logger.warning(f"Could not refresh {interval} bars for {symbol}, keeping cached bars")
+                    entry.refresh_at = time.time() + self.refresh
+                self.cache.set(key, entry, BASE_TTL)
+                return entry.bars
+
+            hist = self.service.get_intraday(symbol, period, interval)
+            if hist is None:
+                return None
+            entry = _BaseSeries(IntradayBars.from_history(symbol, hist), sessions, self._refresh_at(symbol))
+            self.cache.set(key, entry, BASE_TTL)
+            return entry.bars
+
+    def get(self, symbol, interval, period):
+        """
+        Get intraday bars for a symbol at an interval over a range.
+
+        Args:
+            symbol: The stock symbol
+            interval: Bar interval (a key of INTERVAL_MINUTES)
+            period: Range (a key of RANGE_DAYS)
+
+        Returns:
+            IntradayBars, or None if upstream has no data
+
+        Raises:
+            ValueError: If the interval/range combination is not supported
+        """
+        validate(interval, period)
+        symbol = symbol.upper()
+        bars = self.base(symbol, period)
+        if bars is None:
+            return None
+        return self._view(symbol, bars, interval, period)
+
+    def mock(self, symbol, interval, period):
+        """Synthetic bars for a symbol, shaped like get() results."""
+        validate(interval, period)
+        symbol = symbol.upper()
+        bars = synthetic_intraday(symbol, RANGE_DAYS[period], BASE_INTERVAL[period], self.calendar)
+        return self._view(symbol, bars, interval, period)
+
+    def _view(self, symbol, bars, interval, period):
+        bars = bars.last_sessions(RANGE_DAYS[period])
+        if INTERVAL_MINUTES[interval] == INTERVAL_MINUTES[BASE_INTERVAL[period]]:
+            return bars
+        session_open = self.calendar.exchange_for(symbol).open_time
+        return resample(bars, INTERVAL_MINUTES[interval], session_open)
+
+
+# Shared store instance
+intraday_store = IntradayStore()
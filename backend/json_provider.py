@@ -0,0 +1,94 @@
+"""
+Fast JSON provider for Flask.
+Encodes with orjson when it is installed and falls back to the standard library
+otherwise. Also exposes encode_body() so routes can cache response bodies as
+already-encoded bytes and serve cache hits without any encoding work.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _numpy_default(o):
+    """Serialize NumPy scalars and arrays, deferring everything else to Flask."""
+    if hasattr(o, "tolist") and hasattr(o, "dtype"):
+        return o.tolist()
+    return _default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, with the stdlib json module as fallback.
+    """
+    default = staticmethod(_numpy_default)
+    ensure_ascii = False
+
+    use_orjson = orjson is not None
+    """Encode with orjson; set to False to force the stdlib json module."""
+
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def _orjson_options(self, indent=False):
+        # Datetimes go through Flask's default so they keep the RFC 822 format
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def encode(self, obj, indent=False):
+        """
+        Serialize data as JSON to UTF-8 bytes.
+
+        Args:
+            obj: The data to serialize
+            indent: Pretty-print with two-space indentation
+
+        Returns:
+            The encoded bytes
+        """
+        if self.use_orjson:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+
+        if indent:
+            return super().dumps(obj, indent=2).encode("utf-8")
+        return super().dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def encode_body(self, obj):
+        """Encode data exactly as response() would, for caching as bytes."""
+        return self.encode(obj, indent=self._indent()) + b"\n"
+
+    def dumps(self, obj, **kwargs):
+        # Only the formatting options response() uses can be honoured by orjson
+        if self.use_orjson and set(kwargs) <= {"indent", "separators"}:
+            return self.encode(obj, indent=bool(kwargs.get("indent"))).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self.body_response(self.encode_body(obj))
+
+    def body_response(self, body, status=200):
+        """
+        Build a JSON response from an already-encoded body.
+
+        Args:
+            body: Encoded JSON bytes (see encode_body)
+            status: HTTP status code
+
+        Returns:
+            A Flask response
+        """
+        return self._app.response_class(body, status=status, mimetype=self.mimetype)
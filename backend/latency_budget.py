@@ -0,0 +1,107 @@
+"""
+Per-route latency budgets for upstream fetches.
+A route hands its upstream fetch to UpstreamBudget and waits at most the route's
+deadline for it. If the fetch has not finished by then the route answers with
+the best data it already has (a stale cache entry, then mock data) while the
+fetch keeps running in the background and fills the cache for the next request.
+Concurrent requests for the same key share one in-flight fetch.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Default deadline per route in milliseconds; override with <ROUTE>_BUDGET_MS
+DEFAULT_BUDGETS_MS = {
+    "quote": 300,
+    "daily": 800,
+    "intraday": 1000,
+    "search": 800,
+    "watchlist": 800,
+}
+
+
+class UpstreamBudget:
+    """
+    Runs upstream fetches on a background pool and waits for them with a deadline.
+    """
+    def __init__(self, max_workers=8, budgets_ms=None):
+        """
+        Initialize the runner.
+
+        Args:
+            max_workers: Number of fetches that can run at once
+            budgets_ms: Dict of route name to deadline in milliseconds; routes
+                not listed read <ROUTE>_BUDGET_MS, then DEFAULT_BUDGETS_MS
+        """
+        self.max_workers = max_workers
+        self._budgets_ms = dict(budgets_ms or {})
+        self._inflight = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def budget(self, route):
+        """Return a route's deadline in seconds."""
+        if route not in self._budgets_ms:
+            default = DEFAULT_BUDGETS_MS.get(route, 1000)
+            self._budgets_ms[route] = float(config.getenv(f"{route.upper()}_BUDGET_MS", str(default)))
+        return self._budgets_ms[route] / 1000.0
+
+    def set_budget(self, route, milliseconds):
+        """Override a route's deadline."""
+        self._budgets_ms[route] = float(milliseconds)
+
+    def _submit(self, key, fetch):
+        """Start a fetch for a key, or join the one already in flight."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="upstream-budget"
+                )
+            future = self._executor.submit(fetch)
+            self._inflight[key] = future
+
+        def finished(done):
+            with self._lock:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            if not done.cancelled() and done.exception() is not None:
+                logger.warning(f"Upstream fetch for {key} failed: {str(done.exception())}")
+
+        future.add_done_callback(finished)
+        return future
+
+    def run(self, route, key, fetch):
+        """
+        Run a fetch within a route's deadline.
+
+        Args:
+            route: Route name, used to look up the deadline
+            key: Identifies the fetch; concurrent calls with the same key share it
+            fetch: Callable doing the upstream work (and filling any caches)
+
+        Returns:
+            (finished, result): finished is False if the deadline passed first,
+            in which case the fetch continues in the background
+
+        Raises:
+            Exception: Whatever the fetch raised, if it finished in time
+        """
+        future = self._submit(key, fetch)
+        try:
+            return True, future.result(timeout=self.budget(route))
+        except TimeoutError:
+            logger.info(f"Upstream fetch for {key} exceeded the {route} budget, finishing in background")
+            return False, None
+
+
+# Shared budget runner
+upstream_budget = UpstreamBudget()
@@ -0,0 +1,71 @@
+"""
+Deferred imports for cold starts.
+Heavy dependencies (yfinance, pandas, NumPy, the analytics modules) are only
+imported when a request first touches them, so lightweight routes such as the
+health check can be served before any of them load.
+"""
+import importlib
+import threading
+
+
+class LazyImport:
+    """
+    Stand-in for a module, or an attribute of one, that imports it on first
+    attribute access.
+    """
+    def __init__(self, module_name, attribute=None):
+        """
+        Initialize the stand-in.
+
+        Args:
+            module_name: Name of the module to import
+            attribute: Optional module attribute to resolve to instead of the
+                module itself (e.g. a shared service instance)
+        """
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        """Import the target once, even when several threads race for it."""
+        target = self._target
+        if target is None:
+            with self._lock:
+                if self._target is None:
+                    module = importlib.import_module(self._module_name)
+                    self._target = getattr(module, self._attribute) if self._attribute else module
+                target = self._target
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __setattr__(self, name, value):
+        # The proxy's own state is underscored; everything else configures the target
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._resolve(), name, value)
+
+    def __repr__(self):
+        name = f"{self._module_name}.{self._attribute}" if self._attribute else self._module_name
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<lazy {name} ({state})>"
+
+
+def lazy_import(module_name, attribute=None):
+    """
+    Return a stand-in that imports a module (or one of its attributes) on first use.
+
+    Args:
+        module_name: Name of the module to import
+        attribute: Optional attribute of the module to resolve to
+
+    Returns:
+        A LazyImport proxy
+    """
+    return LazyImport(module_name, attribute)
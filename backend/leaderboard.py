@@ -0,0 +1,256 @@
+"""
+Leaderboard of users ranked by total account value (cash plus holdings).
+Each user's holdings and value are kept in memory and updated incrementally:
+a trade changes only the trading user's account, and a price update re-values
+only the users holding that symbol, found through a symbol -> holders index.
+Rankings live in a sorted list keyed by (-value, user_id), so top-N pages and
+a user's rank are O(log n) instead of valuing every account per request.
+
+State is loaded from the users and portfolios tables on first use. Until a
+live price has been seen for a symbol, a holding is valued at its average
+price when loaded, or at the price of the trade that opened or changed it.
+Each process (or serverless instance) keeps its own board and only sees its
+own trades, so the board is reloaded from the database once it is older than
+LEADERBOARD_RELOAD_SECONDS; rankings from different processes agree within
+that interval.
+
+Public pages never show user ids, which the API accepts as credentials. Each
+entry carries an opaque handle instead: an HMAC of the user id keyed with the
+LEADERBOARD_HANDLE_KEY secret, so every process gives a user the same handle.
+A user finds their own handle through rank_of, which only the authenticated
+route exposes.
+"""
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+
+from sortedcontainers import SortedList
+
+import config
+from lazy import lazy_import
+
+ledger = lazy_import("ledger")
+
+logger = logging.getLogger(__name__)
+
+# Largest page of the leaderboard returned at once
+MAX_PAGE = 100
+
+# Hex digits in a public handle (48 bits, so 100k users are unlikely to collide)
+HANDLE_LENGTH = 12
+
+
+class _Account:
+    """One user's cash, holdings and the price each holding is marked at."""
+    __slots__ = ("cash", "quantities", "marks", "value")
+
+    def __init__(self, cash):
+        self.cash = cash
+        self.quantities = {}
+        self.marks = {}
+        self.value = cash
+
+    def revalue(self):
+        self.value = self.cash + sum(
+            quantity * self.marks[symbol] for symbol, quantity in self.quantities.items()
+        )
+
+
+class Leaderboard:
+    """
+    Users ranked by account value, maintained from trades and price updates.
+    """
+    def __init__(self, loader=None, max_age=None, handle_key=None):
+        """
+        Initialize an empty leaderboard.
+
+        Args:
+            loader: Callable returning (balances by user_id, portfolio rows);
+                defaults to reading the database through ledger.load_stored
+            max_age: Seconds before the next query reloads every account; None
+                reads LEADERBOARD_RELOAD_SECONDS (default 300), 0 disables reloads
+            handle_key: Secret keying public handles; None reads
+                LEADERBOARD_HANDLE_KEY on first use
+        """
+        self._loader = loader
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._accounts = {}
+        self._holders = {}
+        self._prices = {}
+        self._ranking = SortedList()
+        self._handle_key = handle_key.encode() if isinstance(handle_key, str) else handle_key
+
+    def _key(self):
+        if self._handle_key is None:
+            secret = config.getenv("LEADERBOARD_HANDLE_KEY")
+            if secret:
+                self._handle_key = secret.encode()
+            else:
+                logger.warning("LEADERBOARD_HANDLE_KEY is not set; leaderboard handles will differ "
+                               "between processes and change on restart")
+                self._handle_key = secrets.token_bytes(32)
+        return self._handle_key
+
+    def handle(self, user_id):
+        """Opaque public name for a user."""
+        digest = hmac.new(self._key(), str(user_id).encode(), hashlib.sha256).hexdigest()
+        return f"trader-{digest[:HANDLE_LENGTH]}"
+
+    def _ensure_loaded(self):
+        """Load every account on first use and once the state is too old (caller holds the lock)."""
+        if self.max_age is None:
+            self.max_age = float(config.getenv("LEADERBOARD_RELOAD_SECONDS", "300"))
+        if not self._loaded or (self.max_age and time.monotonic() - self._loaded_at >= self.max_age):
+            self._load()
+
+    def _load(self):
+        balances, rows = (self._loader or ledger.load_stored)()
+        self._accounts = {user_id: _Account(float(cash)) for user_id, cash in balances.items()}
+        self._holders = {}
+        for row in rows:
+            account = self._accounts.get(row["user_id"])
+            quantity = float(row["quantity"])
+            if account is None or quantity <= 0:
+                continue
+            symbol = str(row["symbol"]).upper()
+            account.quantities[symbol] = account.quantities.get(symbol, 0.0) + quantity
+            account.marks[symbol] = self._prices.get(symbol, float(row["avg_price"]))
+            self._holders.setdefault(symbol, set()).add(row["user_id"])
+
+        for account in self._accounts.values():
+            account.revalue()
+        self._ranking = SortedList((-account.value, user_id) for user_id, account in self._accounts.items())
+        self._loaded = True
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded leaderboard with {len(self._accounts)} accounts and {len(rows)} holdings")
+
+    def reload(self):
+        """Rebuild every account from the database."""
+        with self._lock:
+            self._load()
+
+    def _set_value(self, user_id, account, value=None):
+        """Move an account to its new value, recomputed unless given (caller holds the lock)."""
+        self._ranking.discard((-account.value, user_id))
+        if value is None:
+            account.revalue()
+        else:
+            account.value = value
+        self._ranking.add((-account.value, user_id))
+
+    def on_trade(self, user_id, legs, new_balance):
+        """
+        Apply executed trades to a user's account.
+
+        Args:
+            user_id: The trading user
+            legs: List of (symbol, quantity, price, trade_type)
+            new_balance: The user's cash balance after the trades
+        """
+        with self._lock:
+            if not self._loaded:
+                # The first query loads the stored state, trade included
+                return
+            account = self._accounts.get(user_id)
+            if account is None:
+                account = self._accounts[user_id] = _Account(float(new_balance))
+                self._ranking.add((-account.value, user_id))
+
+            for symbol, quantity, price, trade_type in legs:
+                symbol = symbol.upper()
+                held = account.quantities.get(symbol, 0.0) + (quantity if trade_type == 'buy' else -quantity)
+                if held > 0:
+                    account.quantities[symbol] = held
+                    account.marks[symbol] = self._prices.get(symbol, float(price))
+                    self._holders.setdefault(symbol, set()).add(user_id)
+                else:
+                    account.quantities.pop(symbol, None)
+                    account.marks.pop(symbol, None)
+                    holders = self._holders.get(symbol)
+                    if holders is not None:
+                        holders.discard(user_id)
+                        if not holders:
+                            del self._holders[symbol]
+            account.cash = float(new_balance)
+            self._set_value(user_id, account)
+
+    def on_prices(self, prices):
+        """
+        Re-value the holders of symbols whose price changed.
+
+        Args:
+            prices: Dict of symbol to latest price
+        """
+        with self._lock:
+            # New value of every re-priced account; a price move shifts it by
+            # quantity * change, so the other holdings need not be summed again
+            moved = {}
+            for symbol, price in prices.items():
+                symbol = symbol.upper()
+                price = float(price)
+                if self._prices.get(symbol) == price:
+                    continue
+                self._prices[symbol] = price
+                for user_id in self._holders.get(symbol, ()):
+                    account = self._accounts[user_id]
+                    value = moved.get(user_id, account.value)
+                    moved[user_id] = value + account.quantities[symbol] * (price - account.marks[symbol])
+                    account.marks[symbol] = price
+            for user_id, value in moved.items():
+                self._set_value(user_id, self._accounts[user_id], value)
+
+    def top(self, limit=10, offset=0):
+        """
+        Return a page of the leaderboard.
+
+        Args:
+            limit: Entries to return (at most MAX_PAGE)
+            offset: Entries to skip from the top
+
+        Returns:
+            List of {'rank', 'handle', 'value'} dicts
+        """
+        with self._lock:
+            self._ensure_loaded()
+            page = self._ranking.islice(offset, offset + min(limit, MAX_PAGE))
+            return [
+                {"rank": offset + i + 1, "handle": self.handle(user_id), "value": round(-negative_value, 2)}
+                for i, (negative_value, user_id) in enumerate(page)
+            ]
+
+    def rank_of(self, user_id):
+        """
+        Return a user's place on the leaderboard.
+
+        Returns:
+            {'rank', 'user_id', 'handle', 'value', 'cash', 'holdings', 'users'}, or None
+            for unknown users
+        """
+        with self._lock:
+            self._ensure_loaded()
+            account = self._accounts.get(user_id)
+            if account is None:
+                return None
+            return {
+                "rank": self._ranking.index((-account.value, user_id)) + 1,
+                "user_id": user_id,
+                "handle": self.handle(user_id),
+                "value": round(account.value, 2),
+                "cash": round(account.cash, 2),
+                "holdings": round(account.value - account.cash, 2),
+                "users": len(self._ranking),
+            }
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._ranking)
+
+
+leaderboard = Leaderboard()
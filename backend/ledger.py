@@ -0,0 +1,540 @@
+"""
+Ledger replay: holdings, average cost and cash derived from `transactions`.
+`portfolios` and `users.cash_balance` are updated in place trade by trade, so
+a failed write in the middle of a trade can leave them out of step with the
+transaction log. This module recomputes them from the log alone and can
+reconcile and repair the stored rows.
+
+Replay is vectorized: rows are sorted by (user, symbol) keeping ledger order,
+holdings are a grouped cumulative sum, and the average price follows the same
+rule as trade execution (buys blend in at their price, sells keep the
+average, a position sold to zero starts over). That rule makes the cost basis
+a linear recurrence, so it is computed from cumulative sums of log sell
+ratios instead of a loop. Per-user snapshots of the replayed state let a
+single user's rebuild replay only the entries after the snapshot.
+
+Usage:
+    python ledger.py verify [--user USER_ID] [--repair]
+"""
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+
+import mock_db
+from database import database
+
+logger = logging.getLogger(__name__)
+
+# Cash every account starts with
+INITIAL_CASH = 100000.0
+
+# Write a new snapshot once this many entries have been replayed past the last one
+SNAPSHOT_EVERY = 1000
+
+# Rows fetched per Supabase request
+PAGE_SIZE = 1000
+
+# Differences below these are not reported as drift
+QUANTITY_TOLERANCE = 1e-9
+PRICE_TOLERANCE = 1e-6
+CASH_TOLERANCE = 0.005
+
+
+class LedgerState:
+    """
+    Replayed state of one user's account.
+    """
+    def __init__(self, user_id, cash, positions, as_of=None, as_of_ids=(), entries=0):
+        """
+        Initialize the state.
+
+        Args:
+            user_id: The user
+            cash: Cash balance
+            positions: Dict of symbol to (quantity, avg_price) for open positions
+            as_of: created_at of the last ledger entry included
+            as_of_ids: Ids of the included entries sharing that created_at
+            entries: Number of ledger entries included
+        """
+        self.user_id = user_id
+        self.cash = cash
+        self.positions = positions
+        self.as_of = as_of
+        self.as_of_ids = list(as_of_ids)
+        self.entries = entries
+
+    def to_snapshot(self):
+        return {
+            "user_id": self.user_id,
+            "as_of": self.as_of,
+            "as_of_ids": self.as_of_ids,
+            "cash_balance": self.cash,
+            "positions": {symbol: [quantity, avg_price] for symbol, (quantity, avg_price) in self.positions.items()},
+            "transaction_count": self.entries,
+            "created_at": datetime.now().isoformat(),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        positions = {symbol: tuple(value) for symbol, value in snapshot["positions"].items()}
+        return cls(
+            snapshot["user_id"], snapshot["cash_balance"], positions,
+            snapshot["as_of"], snapshot.get("as_of_ids") or (), snapshot.get("transaction_count", 0)
+        )
+
+
+def replay(user, symbol, quantity, price, is_buy, n_users, n_symbols, start_cash=None, start=None):
+    """
+    Replay ledger entries into cash and positions.
+
+    Args:
+        user: int array of user codes (0..n_users-1), one per entry, in ledger order
+        symbol: int array of symbol codes (0..n_symbols-1)
+        quantity: Shares per entry (positive)
+        price: Price per share
+        is_buy: bool array, False for sells
+        n_users: Number of user codes
+        n_symbols: Number of symbol codes
+        start_cash: Optional (n_users,) starting cash; defaults to INITIAL_CASH
+        start: Optional (user, symbol, quantity, avg_price) arrays of positions
+            held before the first entry (e.g. from snapshots)
+
+    Returns:
+        (cash, positions): cash is an (n_users,) array; positions is a
+        (user, symbol, quantity, avg_price) tuple of arrays for open positions
+    """
+    quantity = np.asarray(quantity, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    is_buy = np.asarray(is_buy, dtype=bool)
+
+    cash = np.full(n_users, INITIAL_CASH) if start_cash is None else np.array(start_cash, dtype=np.float64)
+    cash += np.bincount(user, weights=np.where(is_buy, -quantity * price, quantity * price), minlength=n_users)
+
+    # Starting positions replay as buys at their average price ahead of every entry
+    if start is not None and len(start[0]):
+        user = np.concatenate((start[0], user))
+        symbol = np.concatenate((start[1], symbol))
+        quantity = np.concatenate((np.asarray(start[2], dtype=np.float64), quantity))
+        price = np.concatenate((np.asarray(start[3], dtype=np.float64), price))
+        is_buy = np.concatenate((np.ones(len(start[0]), dtype=bool), is_buy))
+
+    empty = (np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([]), np.array([]))
+    if not len(user):
+        return cash, empty
+
+    # Group entries by position; the stable sort keeps ledger order inside each group
+    key = np.asarray(user, dtype=np.int64) * n_symbols + symbol
+    order = np.argsort(key, kind="stable")
+    key, quantity, price, is_buy = key[order], quantity[order], price[order], is_buy[order]
+    starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+    ends = np.concatenate((starts[1:], [len(key)])) - 1
+    group = np.repeat(np.arange(len(starts)), np.diff(np.concatenate((starts, [len(key)]))))
+
+    # Shares held after each entry
+    signed = np.where(is_buy, quantity, -quantity)
+    held = np.cumsum(signed)
+    held -= (held[starts] - signed[starts])[group]
+    before = held - signed
+
+    # Only entries after the last time a position was flat shape its average price
+    index = np.arange(len(key))
+    last_flat = np.maximum.reduceat(np.where(held <= 0, index, -1), starts)
+    live = index > last_flat[group]
+
+    # A sell of s shares out of h scales the cost basis by (h - s) / h; a buy
+    # adds its cost. Each buy's share of the final basis is the product of the
+    # sell ratios after it, taken as a difference of cumulative log ratios.
+    sell = live & ~is_buy
+    log_ratio = np.zeros(len(key))
+    log_ratio[sell] = np.log(held[sell] / before[sell])
+    cumulative = np.cumsum(log_ratio)
+    weight = np.exp(cumulative[ends][group] - cumulative)
+
+    # After a flat (or oversold) position, only the shares actually held count
+    bought = np.where(live & is_buy, np.minimum(quantity, held) * price, 0.0)
+    basis = np.add.reduceat(bought * weight, starts)
+
+    final = held[ends]
+    open_ = final > QUANTITY_TOLERANCE
+    group_key = key[starts][open_]
+    return cash, (
+        group_key // n_symbols,
+        group_key % n_symbols,
+        final[open_],
+        basis[open_] / final[open_],
+    )
+
+
+def encode_rows(rows, users, symbols):
+    """
+    Turn transaction dicts into replay inputs, in ledger order.
+
+    Args:
+        rows: Transaction dicts
+        users: Sorted list of user ids covering every row
+        symbols: Sorted list of upper-cased symbols covering every row
+
+    Returns:
+        Dict of user/symbol code, quantity, price, is_buy, created_at and id arrays
+    """
+    created_at = np.array([str(row.get("created_at") or "") for row in rows])
+    order = np.argsort(created_at, kind="stable")
+    user_ids = np.array([str(row["user_id"]) for row in rows])
+    row_symbols = np.array([str(row["symbol"]).upper() for row in rows])
+    return {
+        "user": np.searchsorted(np.array(users), user_ids)[order],
+        "symbol": np.searchsorted(np.array(symbols), row_symbols)[order],
+        "quantity": np.array([float(row["quantity"]) for row in rows])[order],
+        "price": np.array([float(row["price"]) for row in rows])[order],
+        "is_buy": np.array([row["type"] == "buy" for row in rows], dtype=bool)[order],
+        "created_at": created_at[order],
+        "id": np.array([str(row.get("id")) for row in rows])[order],
+    }
+
+
+def replay_rows(rows, snapshots=None):
+    """
+    Replay transaction dicts into per-user LedgerStates.
+
+    Args:
+        rows: Transaction dicts (any order)
+        snapshots: Optional dict of user_id to LedgerState to start from; rows
+            must then only contain entries after each snapshot
+
+    Returns:
+        Dict of user_id to LedgerState, for every user with rows or a snapshot
+    """
+    snapshots = snapshots or {}
+    users = sorted({str(row["user_id"]) for row in rows} | set(snapshots))
+    symbols = sorted(
+        {str(row["symbol"]).upper() for row in rows}
+        | {symbol for state in snapshots.values() for symbol in state.positions}
+    )
+    user_index = {user_id: i for i, user_id in enumerate(users)}
+    symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+    arrays = encode_rows(rows, users, symbols) if rows else None
+
+    start_cash = np.full(len(users), INITIAL_CASH)
+    start = [[], [], [], []]
+    for user_id, state in snapshots.items():
+        start_cash[user_index[user_id]] = state.cash
+        for symbol, (held, avg_price) in state.positions.items():
+            start[0].append(user_index[user_id])
+            start[1].append(symbol_index[symbol])
+            start[2].append(held)
+            start[3].append(avg_price)
+    start = (np.array(start[0], dtype=np.int64), np.array(start[1], dtype=np.int64),
+             np.array(start[2], dtype=np.float64), np.array(start[3], dtype=np.float64))
+
+    if arrays is None:
+        cash, positions = start_cash, start
+    else:
+        cash, positions = replay(
+            arrays["user"], arrays["symbol"], arrays["quantity"], arrays["price"], arrays["is_buy"],
+            len(users), len(symbols), start_cash, start
+        )
+
+    states = {}
+    for i, user_id in enumerate(users):
+        base = snapshots.get(user_id)
+        states[user_id] = LedgerState(
+            user_id, float(cash[i]), {},
+            base.as_of if base else None, base.as_of_ids if base else (), base.entries if base else 0
+        )
+    for u, s, held, avg_price in zip(*(values.tolist() for values in positions)):
+        states[users[u]].positions[symbols[s]] = (held, avg_price)
+
+    if arrays is not None:
+        _record_progress(states, users, arrays)
+    return states
+
+
+def _record_progress(states, users, arrays):
+    """Note the last entry each state includes, so a snapshot knows where to resume."""
+    user = arrays["user"]
+    counts = np.bincount(user, minlength=len(users))
+    last = np.full(len(users), -1)
+    last[user] = np.arange(len(user))
+
+    # Entries sharing their user's last timestamp; their ids mark the resume point
+    has_rows = last >= 0
+    last_created = np.full(len(users), "", dtype=arrays["created_at"].dtype)
+    last_created[has_rows] = arrays["created_at"][last[has_rows]]
+    at_last = np.flatnonzero(arrays["created_at"] == last_created[user])
+
+    ids = {}
+    for row in at_last.tolist():
+        ids.setdefault(int(user[row]), []).append(str(arrays["id"][row]))
+
+    for i in np.flatnonzero(has_rows).tolist():
+        state = states[users[i]]
+        as_of = str(last_created[i])
+        state.as_of_ids = ids[i] + (state.as_of_ids if state.as_of == as_of else [])
+        state.as_of = as_of
+        state.entries += int(counts[i])
+
+
+def _fetch_all(query_factory):
+    """Page through a Supabase query until a short page comes back."""
+    rows = []
+    while True:
+        page = query_factory().range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def load_transactions(user_id=None, since=None):
+    """
+    Fetch ledger entries.
+
+    Args:
+        user_id: Only this user's entries, or everyone's when None
+        since: Only entries with created_at at or after this value
+
+    Returns:
+        List of transaction dicts
+    """
+    if database.using_mock:
+        rows = mock_db.mock_transactions if user_id is None else mock_db.get_user_transactions(user_id)
+        return [row for row in rows if since is None or str(row.get("created_at")) >= since]
+
+    def query():
+        builder = database.client.table('transactions').select('id,user_id,symbol,quantity,price,type,created_at')
+        if user_id is not None:
+            builder = builder.eq('user_id', user_id)
+        if since is not None:
+            builder = builder.gte('created_at', since)
+        return builder.order('created_at').order('id')
+    return _fetch_all(query)
+
+
+def load_snapshots(user_id=None):
+    """Return the latest snapshot per user as a dict of user_id to LedgerState."""
+    if database.using_mock:
+        snapshots = mock_db.get_ledger_snapshots(user_id)
+    else:
+        def query():
+            builder = database.client.table('ledger_snapshots').select('*')
+            return builder.eq('user_id', user_id) if user_id is not None else builder.order('user_id')
+        snapshots = _fetch_all(query)
+    return {snapshot["user_id"]: LedgerState.from_snapshot(snapshot) for snapshot in snapshots}
+
+
+def save_snapshots(states):
+    """Store snapshots of replayed states, replacing each user's previous one."""
+    snapshots = [state.to_snapshot() for state in states]
+    if not snapshots:
+        return
+    if database.using_mock:
+        mock_db.save_ledger_snapshots(snapshots)
+    else:
+        for first in range(0, len(snapshots), PAGE_SIZE):
+            database.client.table('ledger_snapshots').upsert(
+                snapshots[first:first + PAGE_SIZE], on_conflict='user_id'
+            ).execute()
+    logger.info(f"Saved {len(snapshots)} ledger snapshots")
+
+
+def _snapshot_due(state, previous):
+    return state.entries - (previous.entries if previous else 0) >= SNAPSHOT_EVERY
+
+
+def rebuild(user_id):
+    """
+    Derive one user's state from their latest snapshot plus the entries after it.
+
+    A new snapshot is written when enough entries were replayed.
+
+    Returns:
+        LedgerState
+    """
+    snapshot = load_snapshots(user_id).get(user_id)
+    if snapshot is None:
+        rows = load_transactions(user_id)
+    else:
+        # Entries at the snapshot's timestamp are included unless the snapshot lists them
+        seen = set(snapshot.as_of_ids)
+        rows = [
+            row for row in load_transactions(user_id, snapshot.as_of)
+            if not (str(row.get("created_at")) == snapshot.as_of and str(row.get("id")) in seen)
+        ]
+
+    states = replay_rows(rows, {user_id: snapshot} if snapshot else None)
+    state = states.get(user_id) or LedgerState(user_id, INITIAL_CASH, {})
+    if _snapshot_due(state, snapshot):
+        save_snapshots([state])
+    logger.info(f"Rebuilt ledger for user {user_id} from {len(rows)} entries")
+    return state
+
+
+def replay_all():
+    """
+    Derive every user's state from the full transaction log and refresh snapshots that are due.
+
+    Returns:
+        Dict of user_id to LedgerState
+    """
+    states = replay_rows(load_transactions())
+    previous = load_snapshots()
+    save_snapshots([state for user_id, state in states.items() if _snapshot_due(state, previous.get(user_id))])
+    return states
+
+
+def load_stored(user_id=None):
+    """Return the stored (balances by user_id, portfolio rows) to reconcile against."""
+    if database.using_mock:
+        balances = {uid: user["cash_balance"] for uid, user in mock_db.mock_users.items()
+                    if user_id is None or uid == user_id}
+        rows = [row for row in mock_db.mock_portfolios if user_id is None or row["user_id"] == user_id]
+        return balances, rows
+
+    def users_query():
+        builder = database.client.table('users').select('id,cash_balance')
+        return builder.eq('id', user_id) if user_id is not None else builder.order('id')
+
+    def portfolios_query():
+        builder = database.client.table('portfolios').select('*')
+        return builder.eq('user_id', user_id) if user_id is not None else builder.order('id')
+
+    balances = {row["id"]: row["cash_balance"] for row in _fetch_all(users_query)}
+    return balances, _fetch_all(portfolios_query)
+
+
+def reconcile(states, balances, rows):
+    """
+    Compare derived states with stored balances and portfolio rows.
+
+    Returns:
+        List of discrepancy dicts with user_id, field ('cash_balance' or
+        'position'), symbol, stored and derived values, and the stored row
+        ids involved
+    """
+    stored_positions = {}
+    for row in rows:
+        stored_positions.setdefault((row["user_id"], str(row["symbol"]).upper()), []).append(row)
+
+    issues = []
+    for user_id in sorted(set(balances) | set(states)):
+        state = states.get(user_id) or LedgerState(user_id, INITIAL_CASH, {})
+        stored_cash = balances.get(user_id)
+        if stored_cash is None:
+            issues.append({"user_id": user_id, "field": "user", "symbol": None,
+                           "stored": None, "derived": state.cash, "row_ids": []})
+        elif abs(stored_cash - state.cash) > CASH_TOLERANCE:
+            issues.append({"user_id": user_id, "field": "cash_balance", "symbol": None,
+                           "stored": stored_cash, "derived": state.cash, "row_ids": []})
+
+        symbols = set(state.positions) | {symbol for uid, symbol in stored_positions if uid == user_id}
+        for symbol in sorted(symbols):
+            stored = stored_positions.get((user_id, symbol), [])
+            derived = state.positions.get(symbol)
+            stored_value = (stored[0]["quantity"], stored[0]["avg_price"]) if stored else None
+            matches = (
+                len(stored) <= 1
+                and (stored_value is None) == (derived is None)
+                and (derived is None or (
+                    abs(stored_value[0] - derived[0]) <= QUANTITY_TOLERANCE
+                    and abs(stored_value[1] - derived[1]) <= PRICE_TOLERANCE * max(abs(derived[1]), 1)
+                ))
+            )
+            if not matches:
+                issues.append({"user_id": user_id, "field": "position", "symbol": symbol,
+                               "stored": stored_value, "derived": derived,
+                               "row_ids": [row.get("id") for row in stored]})
+    return issues
+
+
+def repair(issues):
+    """Overwrite stored balances and portfolio rows with the derived values."""
+    for issue in issues:
+        user_id, symbol, derived = issue["user_id"], issue["symbol"], issue["derived"]
+        if issue["field"] == "cash_balance":
+            _update_balance(user_id, derived)
+        elif issue["field"] == "position":
+            row_ids = issue["row_ids"]
+            # Keep one row per position; duplicates are removed
+            for row_id in row_ids[1:] if derived else row_ids:
+                _delete_position(row_id)
+            if derived and row_ids:
+                _update_position(row_ids[0], derived)
+            elif derived:
+                _insert_position(user_id, symbol, derived)
+        else:
+            logger.warning(f"Cannot repair ledger for user {user_id}: user not found")
+            continue
+        logger.info(f"Repaired {issue['field']} for user {user_id}{' ' + symbol if symbol else ''}")
+
+
+def _update_balance(user_id, cash):
+    if database.using_mock:
+        mock_db.mock_users[user_id]["cash_balance"] = cash
+    else:
+        database.client.table('users').update({'cash_balance': cash}).eq('id', user_id).execute()
+
+
+def _delete_position(row_id):
+    if database.using_mock:
+        mock_db.mock_portfolios[:] = [row for row in mock_db.mock_portfolios if row["id"] != row_id]
+    else:
+        database.client.table('portfolios').delete().eq('id', row_id).execute()
+
+
+def _update_position(row_id, position):
+    values = {'quantity': position[0], 'avg_price': position[1]}
+    if database.using_mock:
+        for row in mock_db.mock_portfolios:
+            if row["id"] == row_id:
+                row.update(values, updated_at=datetime.now().isoformat())
+    else:
+        database.client.table('portfolios').update(values).eq('id', row_id).execute()
+
+
+def _insert_position(user_id, symbol, position):
+    row = {'user_id': user_id, 'symbol': symbol, 'quantity': position[0], 'avg_price': position[1]}
+    if database.using_mock:
+        now = datetime.now().isoformat()
+        mock_db.mock_portfolios.append(dict(row, id=str(len(mock_db.mock_portfolios) + 1), created_at=now, updated_at=now))
+    else:
+        database.client.table('portfolios').insert(row).execute()
+
+
+def verify(user_id=None, fix=False):
+    """
+    Reconcile stored holdings and balances with the ledger, optionally repairing them.
+
+    Args:
+        user_id: Check one user (replaying from their snapshot), or everyone when None
+        fix: Write the derived values over any that differ
+
+    Returns:
+        List of discrepancies found (before any repair)
+    """
+    states = {user_id: rebuild(user_id)} if user_id else replay_all()
+    balances, rows = load_stored(user_id)
+    issues = reconcile(states, balances, rows)
+    if fix and issues:
+        repair(issues)
+    return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile portfolios and balances with the transaction ledger")
+    parser.add_argument("command", choices=["verify"])
+    parser.add_argument("--user", help="Only check this user")
+    parser.add_argument("--repair", action="store_true", help="Overwrite stored values that differ from the ledger")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    issues = verify(args.user, fix=args.repair)
+    for issue in issues:
+        target = f" {issue['symbol']}" if issue["symbol"] else ""
+        print(f"{issue['user_id']} {issue['field']}{target}: stored {issue['stored']}, ledger {issue['derived']}")
+    print(f"{len(issues)} discrepancies{' repaired' if args.repair and issues else ''}")
+    return 1 if issues and not args.repair else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
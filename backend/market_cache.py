@@ -0,0 +1,111 @@
+"""
+In-memory cache with per-entry expiry for market data responses.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache where every entry carries its own time-to-live.
+    """
+    def __init__(self, max_entries=1024, max_stale=0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept before the least
+                recently used one is evicted
+            max_stale: Seconds an expired entry is kept for get_stale()
+        """
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a cached value.
+
+        Args:
+            key: The cache key (e.g., a stock symbol)
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            now = time.time()
+            if expires_at <= now:
+                if expires_at + self.max_stale <= now:
+                    del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def get_stale(self, key):
+        """
+        Get a cached value even if it has expired, within max_stale seconds.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None if missing or expired for too long
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at + self.max_stale <= time.time():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        """
+        Store a value.
+
+        Args:
+            key: The cache key
+            value: The value to cache
+            ttl: Time-to-live in seconds
+        """
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def items(self):
+        """
+        Snapshot the unexpired entries without changing their recency.
+
+        Returns:
+            List of (key, value) pairs, least recently used first
+        """
+        now = time.time()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at) in self._entries.items() if expires_at > now]
+
+    def delete(self, key):
+        """Remove a key if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,365 @@
+"""
+Market calendar for the exchanges we serve quotes for.
+Knows each exchange's trading session, time zone, weekends, holidays and early
+closes so that market data caches can hold entries while a market is closed.
+
+NYSE/NASDAQ, LSE and TSX holidays and half days follow fixed rules and are
+complete. NSE only has its fixed-date holidays: the festival holidays follow
+the lunar calendar and are announced each year, so on those days NSE symbols
+are treated as trading. That only costs extra upstream refreshes; a closed
+market is never assumed while it is open.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+# How long after the close we keep refreshing at the in-session rate, so the
+# final closing print is picked up before entries are held until the next open
+SETTLE_PERIOD = timedelta(minutes=20)
+
+# Calendar days covered by each yfinance period
+PERIOD_DAYS = {
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+
+
+def _nth_weekday(year, month, weekday, n):
+    """Return the n-th given weekday (0=Monday) of a month."""
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def _last_weekday(year, month, weekday):
+    """Return the last given weekday (0=Monday) of a month."""
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Return Easter Sunday for a year (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _next_weekday(day):
+    """Move a date that falls on a weekend to the following Monday."""
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def _christmas_and_boxing_day(year):
+    """Christmas and Boxing Day as the first two weekdays from 25 December (UK and Canada)."""
+    first = _next_weekday(date(year, 12, 25))
+    return first, _next_weekday(first + timedelta(days=1))
+
+
+def _observed(day):
+    """Shift a fixed-date holiday that falls on a weekend to the nearest weekday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=32)
+def nyse_holidays(year):
+    """Return the set of full-day NYSE/NASDAQ holidays for a year."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),           # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),           # Washington's Birthday
+        _easter(year) - timedelta(days=2),     # Good Friday
+        _last_weekday(year, 5, 0),             # Memorial Day
+        _observed(date(year, 7, 4)),           # Independence Day
+        _nth_weekday(year, 9, 0, 1),           # Labor Day
+        _nth_weekday(year, 11, 3, 4),          # Thanksgiving
+        _observed(date(year, 12, 25)),         # Christmas
+    }
+
+    # New Year's Day is not observed on the prior Friday when it falls on a Saturday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+
+    return frozenset(holidays)
+
+
+@lru_cache(maxsize=32)
+def nyse_early_closes(year):
+    """Return NYSE/NASDAQ half days (13:00 close) for a year, by date."""
+    candidates = (
+        date(year, 7, 3),                                   # Day before Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),   # Day after Thanksgiving
+        date(year, 12, 24),                                 # Christmas Eve
+    )
+    holidays = nyse_holidays(year)
+    return {day: time(13, 0) for day in candidates if day.weekday() < 5 and day not in holidays}
+
+
+@lru_cache(maxsize=32)
+def lse_holidays(year):
+    """Return the set of London Stock Exchange holidays for a year."""
+    easter = _easter(year)
+    return frozenset({
+        _next_weekday(date(year, 1, 1)),       # New Year's Day
+        easter - timedelta(days=2),            # Good Friday
+        easter + timedelta(days=1),            # Easter Monday
+        _nth_weekday(year, 5, 0, 1),           # Early May bank holiday
+        _last_weekday(year, 5, 0),             # Spring bank holiday
+        _last_weekday(year, 8, 0),             # Summer bank holiday
+        *_christmas_and_boxing_day(year),
+    })
+
+
+@lru_cache(maxsize=32)
+def lse_early_closes(year):
+    """Return London Stock Exchange half days (12:30 close) for a year, by date."""
+    return {day: time(12, 30) for day in (date(year, 12, 24), date(year, 12, 31)) if day.weekday() < 5}
+
+
+@lru_cache(maxsize=32)
+def tsx_holidays(year):
+    """Return the set of Toronto Stock Exchange holidays for a year."""
+    may_24 = date(year, 5, 24)
+    return frozenset({
+        _next_weekday(date(year, 1, 1)),       # New Year's Day
+        _nth_weekday(year, 2, 0, 3),           # Family Day
+        _easter(year) - timedelta(days=2),     # Good Friday
+        may_24 - timedelta(days=may_24.weekday()),  # Victoria Day (Monday on or before 24 May)
+        _next_weekday(date(year, 7, 1)),       # Canada Day
+        _nth_weekday(year, 8, 0, 1),           # Civic Holiday
+        _nth_weekday(year, 9, 0, 1),           # Labour Day
+        _nth_weekday(year, 10, 0, 2),          # Thanksgiving
+        *_christmas_and_boxing_day(year),
+    })
+
+
+@lru_cache(maxsize=32)
+def tsx_early_closes(year):
+    """Return Toronto Stock Exchange half days (13:00 close) for a year, by date."""
+    christmas_eve = date(year, 12, 24)
+    if christmas_eve.weekday() < 5 and christmas_eve not in tsx_holidays(year):
+        return {christmas_eve: time(13, 0)}
+    return {}
+
+
+@lru_cache(maxsize=32)
+def nse_holidays(year):
+    """
+    Return the fixed-date National Stock Exchange of India holidays for a year.
+
+    Festival holidays (Holi, Diwali, Eid and others) move with the lunar
+    calendar and are not included.
+    """
+    return frozenset({
+        date(year, 1, 26),                     # Republic Day
+        date(year, 4, 14),                     # Ambedkar Jayanti
+        date(year, 5, 1),                      # Maharashtra Day
+        date(year, 8, 15),                     # Independence Day
+        date(year, 10, 2),                     # Gandhi Jayanti
+        date(year, 12, 25),                    # Christmas
+    })
+
+
+class Exchange:
+    """
+    A single exchange's regular trading session.
+    """
+    def __init__(self, code, name, timezone, open_time, close_time, holidays=None, early_closes=None):
+        """
+        Initialize the exchange.
+
+        Args:
+            code: Short exchange code (e.g., "US")
+            name: Human readable exchange name
+            timezone: IANA time zone name the session times are expressed in
+            open_time: Regular session open as a datetime.time
+            close_time: Regular session close as a datetime.time
+            holidays: Optional callable returning the holiday dates for a year
+            early_closes: Optional callable returning a dict of half-day date
+                to close time for a year
+        """
+        self.code = code
+        self.name = name
+        self.tz = ZoneInfo(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = holidays
+        self.early_closes = early_closes
+
+    def is_trading_day(self, day):
+        """Check if the exchange has a regular session on the given date."""
+        if day.weekday() >= 5:
+            return False
+        if self.holidays and day in self.holidays(day.year):
+            return False
+        return True
+
+    def close_on(self, day):
+        """Return the session close time on a trading day, earlier on half days."""
+        if self.early_closes:
+            return self.early_closes(day.year).get(day, self.close_time)
+        return self.close_time
+
+    def session(self, day):
+        """Return the (open, close) datetimes of the session on a trading day."""
+        return (
+            datetime.combine(day, self.open_time, tzinfo=self.tz),
+            datetime.combine(day, self.close_on(day), tzinfo=self.tz),
+        )
+
+
+EXCHANGES = {
+    "US": Exchange("US", "NYSE/NASDAQ", "America/New_York", time(9, 30), time(16, 0),
+                   nyse_holidays, nyse_early_closes),
+    "LSE": Exchange("LSE", "London Stock Exchange", "Europe/London", time(8, 0), time(16, 30),
+                    lse_holidays, lse_early_closes),
+    "TSX": Exchange("TSX", "Toronto Stock Exchange", "America/Toronto", time(9, 30), time(16, 0),
+                    tsx_holidays, tsx_early_closes),
+    "NSE": Exchange("NSE", "National Stock Exchange of India", "Asia/Kolkata", time(9, 15), time(15, 30),
+                    nse_holidays),
+}
+
+# Yahoo Finance symbol suffixes for non-US listings
+SYMBOL_SUFFIXES = {
+    ".L": "LSE",
+    ".TO": "TSX",
+    ".V": "TSX",
+    ".NS": "NSE",
+    ".BO": "NSE",
+}
+
+
+class MarketCalendar:
+    """
+    Answers "is this symbol's market open?" and "how long until it opens?".
+    """
+    def __init__(self, exchanges=None, suffixes=None):
+        """
+        Initialize the calendar.
+
+        Args:
+            exchanges: Mapping of exchange code to Exchange (defaults to EXCHANGES)
+            suffixes: Mapping of symbol suffix to exchange code (defaults to SYMBOL_SUFFIXES)
+        """
+        self.exchanges = exchanges or EXCHANGES
+        self.suffixes = suffixes or SYMBOL_SUFFIXES
+
+    def exchange_for(self, symbol):
+        """Return the Exchange a symbol is listed on (US when no suffix matches)."""
+        symbol = (symbol or "").upper()
+        for suffix, code in self.suffixes.items():
+            if symbol.endswith(suffix):
+                return self.exchanges[code]
+        return self.exchanges["US"]
+
+    def _local_now(self, exchange, now):
+        if now is None:
+            return datetime.now(exchange.tz)
+        if now.tzinfo is None:
+            now = now.astimezone()
+        return now.astimezone(exchange.tz)
+
+    def is_open(self, symbol, now=None):
+        """Check if the symbol's market is in its regular session."""
+        exchange = self.exchange_for(symbol)
+        local = self._local_now(exchange, now)
+        if not exchange.is_trading_day(local.date()):
+            return False
+        session_open, session_close = exchange.session(local.date())
+        return session_open <= local < session_close
+
+    def last_close(self, symbol, now=None):
+        """Return the most recent session close at or before now."""
+        exchange = self.exchange_for(symbol)
+        local = self._local_now(exchange, now)
+        day = local.date()
+        while True:
+            if exchange.is_trading_day(day):
+                session_close = exchange.session(day)[1]
+                if session_close <= local:
+                    return session_close
+            day -= timedelta(days=1)
+
+    def next_open(self, symbol, now=None):
+        """Return the next session open strictly after now."""
+        exchange = self.exchange_for(symbol)
+        local = self._local_now(exchange, now)
+        day = local.date()
+        while True:
+            if exchange.is_trading_day(day):
+                session_open = exchange.session(day)[0]
+                if session_open > local:
+                    return session_open
+            day += timedelta(days=1)
+
+    def last_trading_day(self, symbol, now=None):
+        """Return the date of the latest session that has started."""
+        exchange = self.exchange_for(symbol)
+        local = self._local_now(exchange, now)
+        day = local.date()
+        while not exchange.is_trading_day(day) or exchange.session(day)[0] > local:
+            day -= timedelta(days=1)
+        return day
+
+    def cache_ttl(self, symbol, open_ttl, now=None):
+        """
+        Work out how long a freshly fetched market data entry may be cached.
+
+        Args:
+            symbol: The stock symbol the entry belongs to
+            open_ttl: TTL in seconds to use while the market is trading
+            now: Optional aware datetime to evaluate at (defaults to now)
+
+        Returns:
+            The TTL in seconds: open_ttl during the session and the settle
+            period after it, otherwise the time remaining until the next open
+        """
+        if self.is_open(symbol, now):
+            return open_ttl
+
+        exchange = self.exchange_for(symbol)
+        local = self._local_now(exchange, now)
+        if local - self.last_close(symbol, local) < SETTLE_PERIOD:
+            return open_ttl
+
+        return max(open_ttl, (self.next_open(symbol, local) - local).total_seconds())
+
+    def session_metadata(self, symbol, now=None):
+        """Return the search-result session fields for a symbol."""
+        exchange = self.exchange_for(symbol)
+        local = self._local_now(exchange, now)
+        offset = local.utcoffset()
+        hours, minutes = divmod(int(abs(offset.total_seconds())) // 60, 60)
+        sign = "+" if offset >= timedelta(0) else "-"
+        timezone = f"UTC{sign}{hours:02d}" + (f":{minutes:02d}" if minutes else "")
+        return {
+            "5. marketOpen": exchange.open_time.strftime("%H:%M"),
+            "6. marketClose": exchange.close_time.strftime("%H:%M"),
+            "7. timezone": timezone,
+        }
+
+
+# Shared calendar instance
+market_calendar = MarketCalendar()
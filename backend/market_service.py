@@ -0,0 +1,207 @@
+"""
+Asyncio-based market data service.
+Runs blocking upstream (yfinance) calls concurrently on a background event loop
+so that multi-symbol work fans out instead of running serially on the request
+thread. Synchronous Flask routes delegate to it through the blocking helpers.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import config
+import http_session
+from lazy import lazy_import
+
+yf = lazy_import("yfinance")
+
+logger = logging.getLogger(__name__)
+
+
+class YFinanceUpstream:
+    """
+    Blocking upstream backed by yfinance, sharing the pooled HTTP session.
+    """
+    def info(self, symbol):
+        """Return the info dict for a symbol."""
+        return yf.Ticker(symbol, session=http_session.get_session()).info
+
+    def history(self, symbol, period):
+        """Return the history DataFrame for a symbol and period."""
+        return yf.Ticker(symbol, session=http_session.get_session()).history(period=period)
+
+    def intraday(self, symbol, period, interval):
+        """Return the intraday history DataFrame for a symbol, period and interval."""
+        return yf.Ticker(symbol, session=http_session.get_session()).history(period=period, interval=interval)
+
+
+class MarketDataService:
+    """
+    Fans upstream calls out on a dedicated event loop with bounded concurrency
+    and per-call timeouts.
+    """
+    def __init__(self, upstream=None, max_concurrency=8, timeout=10.0, max_workers=16):
+        """
+        Initialize the service.
+
+        Args:
+            upstream: Object exposing blocking info(symbol), history(symbol, period)
+                and intraday(symbol, period, interval) calls (defaults to YFinanceUpstream)
+            max_concurrency: Maximum number of upstream calls in flight at once;
+                None reads UPSTREAM_CONCURRENCY (default 8) when the loop starts
+            timeout: Per-call timeout in seconds; None reads UPSTREAM_TIMEOUT
+                (default 10) when the loop starts
+            max_workers: Size of the thread pool the blocking calls run on
+        """
+        self.upstream = upstream or YFinanceUpstream()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._loop = None
+        self._semaphore = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        """Start the background event loop on first use."""
+        if self._loop is not None:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None:
+                if self.max_concurrency is None:
+                    self.max_concurrency = int(config.getenv("UPSTREAM_CONCURRENCY", "8"))
+                if self.timeout is None:
+                    self.timeout = float(config.getenv("UPSTREAM_TIMEOUT", "10"))
+
+                loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="market-upstream"
+                )
+                loop.set_default_executor(self._executor)
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="market-data-loop",
+                    daemon=True
+                )
+                thread.start()
+                self._semaphore = asyncio.run_coroutine_threadsafe(
+                    self._make_semaphore(), loop
+                ).result()
+                self._loop = loop
+        return self._loop
+
+    async def _make_semaphore(self):
+        return asyncio.Semaphore(self.max_concurrency)
+
+    def run(self, coro):
+        """
+        Run a coroutine on the service loop and block until it completes.
+
+        Args:
+            coro: The coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def _call(self, func, *args):
+        """Run one blocking upstream call under the semaphore and timeout."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, partial(func, *args)),
+                timeout=self.timeout
+            )
+
+    async def info(self, symbol):
+        """
+        Fetch a symbol's info dict.
+
+        Returns:
+            The info dict, or None if the call failed or timed out
+        """
+        try:
+            return await self._call(self.upstream.info, symbol)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out getting info for {symbol}")
+        except Exception as e:
+            logger.warning(f"Error getting info for {symbol}: {str(e)}")
+        return None
+
+    async def history(self, symbol, periods):
+        """
+        Fetch a symbol's history, trying each period in turn until one has data.
+
+        Returns:
+            The first non-empty DataFrame, or None
+        """
+        for period in periods:
+            try:
+                hist = await self._call(self.upstream.history, symbol, period)
+                if hist is not None and not hist.empty:
+                    return hist
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out getting {period} history for {symbol}")
+            except Exception as e:
+                logger.warning(f"Error getting {period} history for {symbol}: {str(e)}")
+        return None
+
+    async def intraday(self, symbol, period, interval):
+        """
+        Fetch a symbol's intraday history.
+
+        Returns:
+            The DataFrame, or None if it is empty or the call failed
+        """
+        try:
+            hist = await self._call(self.upstream.intraday, symbol, period, interval)
+            if hist is not None and not hist.empty:
+                return hist
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out getting {period}/{interval} history for {symbol}")
+        except Exception as e:
+            logger.warning(f"Error getting {period}/{interval} history for {symbol}: {str(e)}")
+        return None
+
+    async def quote_data(self, symbol, periods):
+        """Fetch a symbol's info and history concurrently."""
+        return await asyncio.gather(self.info(symbol), self.history(symbol, periods))
+
+    async def infos(self, symbols):
+        """Fetch info for many symbols concurrently, keyed by symbol."""
+        results = await asyncio.gather(*(self.info(symbol) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    async def histories(self, symbols, periods):
+        """Fetch history for many symbols concurrently, keyed by symbol."""
+        results = await asyncio.gather(*(self.history(symbol, periods) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    # Blocking helpers for synchronous routes
+
+    def get_info(self, symbol):
+        return self.run(self.info(symbol))
+
+    def get_history(self, symbol, periods):
+        return self.run(self.history(symbol, periods))
+
+    def get_intraday(self, symbol, period, interval):
+        return self.run(self.intraday(symbol, period, interval))
+
+    def get_quote_data(self, symbol, periods):
+        return self.run(self.quote_data(symbol, periods))
+
+    def get_infos(self, symbols):
+        return self.run(self.infos(list(symbols)))
+
+    def get_histories(self, symbols, periods):
+        return self.run(self.histories(list(symbols), periods))
+
+
+# Shared service instance, configured from the environment on first use
+market_service = MarketDataService(max_concurrency=None, timeout=None)
@@ -85,6 +85,24 @@ mock_transactions = [
     }
 ]
 
+# Mock ledger snapshots by user_id
+mock_ledger_snapshots = {}
+
+# Mock equity curve points by user_id, then date
+mock_equity_curves = {}
+
+# Mock watchlist data
+mock_watchlists = [
+    {
+        "id": "1",
+        "user_id": "user123",
+        "name": "Tech",
+        "symbols": ["AAPL", "MSFT", "NVDA", "AMZN"],
+        "created_at": "2025-04-18T12:00:00Z",
+        "updated_at": "2025-04-18T12:00:00Z"
+    }
+]
+
 class MockTable:
     def __init__(self, data):
         self.data = data
@@ -268,3 +286,101 @@ def create_transaction(user_id, symbol, quantity, price, trade_type):
             portfolio_item["updated_at"] = datetime.now().isoformat()
     
     return transaction_data, user["cash_balance"] if user else None
+
+def apply_trades(user_id, legs, positions, new_balance):
+    """Record a validated batch of trades and set the resulting positions and balance"""
+    now = datetime.now().isoformat()
+    transactions = [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "symbol": symbol,
+            "quantity": quantity,
+            "price": price,
+            "type": trade_type,
+            "total": price * quantity,
+            "created_at": now,
+            "status": "COMPLETED"
+        }
+        for symbol, quantity, price, trade_type in legs
+    ]
+    mock_transactions.extend(transactions)
+
+    for symbol, (quantity, avg_price) in positions.items():
+        portfolio_item = None
+        for item in mock_portfolios:
+            if item["user_id"] == user_id and item["symbol"] == symbol:
+                portfolio_item = item
+                break
+
+        if quantity <= 0:
+            # Remove the portfolio item if all shares are sold
+            if portfolio_item:
+                mock_portfolios.remove(portfolio_item)
+        elif portfolio_item:
+            portfolio_item["quantity"] = quantity
+            portfolio_item["avg_price"] = avg_price
+            portfolio_item["updated_at"] = now
+        else:
+            mock_portfolios.append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "symbol": symbol,
+                "quantity": quantity,
+                "avg_price": avg_price,
+                "created_at": now,
+                "updated_at": now
+            })
+
+    mock_users[user_id]["cash_balance"] = new_balance
+    return transactions
+
+def get_ledger_snapshots(user_id=None):
+    """Get the latest ledger snapshot for one user, or for every user"""
+    if user_id is not None:
+        snapshot = mock_ledger_snapshots.get(user_id)
+        return [snapshot] if snapshot else []
+    return list(mock_ledger_snapshots.values())
+
+def save_ledger_snapshots(snapshots):
+    """Store ledger snapshots, replacing each user's previous one"""
+    for snapshot in snapshots:
+        mock_ledger_snapshots[snapshot["user_id"]] = snapshot
+
+def get_user_watchlists(user_id):
+    """Get user's watchlists"""
+    return [item for item in mock_watchlists if item["user_id"] == user_id]
+
+def create_watchlist(watchlist):
+    """Create a new watchlist"""
+    now = datetime.now().isoformat()
+    watchlist = dict(watchlist, id=str(uuid.uuid4()), created_at=now, updated_at=now)
+    mock_watchlists.append(watchlist)
+    return watchlist
+
+def update_watchlist(user_id, watchlist_id, changes):
+    """Update one of the user's watchlists; returns the updated rows"""
+    for item in mock_watchlists:
+        if item["id"] == watchlist_id and item["user_id"] == user_id:
+            item.update(changes)
+            return [item]
+    return []
+
+def delete_watchlist(user_id, watchlist_id):
+    """Delete one of the user's watchlists; returns the deleted rows"""
+    for item in mock_watchlists:
+        if item["id"] == watchlist_id and item["user_id"] == user_id:
+            mock_watchlists.remove(item)
+            return [item]
+    return []
+
+def get_equity_curve(user_id):
+    """Get user's equity curve points, oldest first"""
+    points = mock_equity_curves.get(user_id, {})
+    return [points[date] for date in sorted(points)]
+
+def save_equity_points(user_id, points):
+    """Store equity curve points, replacing any stored for the same dates"""
+    stored = mock_equity_curves.setdefault(user_id, {})
+    for point in points:
+        stored[point["date"]] = point
@@ -0,0 +1,162 @@
+"""
+Monte Carlo projection of portfolio value.
+Simulates correlated log-normal price paths for all holdings at once: standard
+normal draws are correlated with a Cholesky factor in a single matrix multiply
+per batch. Large simulations are split into fixed-size chunks with their own
+seed streams, so a fixed seed gives the same result however many processes
+the chunks run on.
+"""
+import logging
+
+import numpy as np
+
+from worker_pool import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Paths simulated per chunk; also the unit of work handed to pool workers
+CHUNK_PATHS = 5000
+
+# Upper bounds accepted from requests
+MAX_PATHS = 100000
+MAX_STEPS = 64
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def estimate(returns):
+    """
+    Estimate daily log-return drift and covariance.
+
+    Args:
+        returns: (days, assets) array of daily simple returns
+
+    Returns:
+        (mu, covariance) of daily log returns
+    """
+    log_returns = np.log1p(returns)
+    mu = log_returns.mean(axis=0)
+    covariance = np.cov(log_returns, rowvar=False).reshape(len(mu), len(mu))
+    return mu, covariance
+
+
+def cholesky(covariance):
+    """Cholesky factor, adding diagonal jitter if the matrix is not positive definite."""
+    jitter = 0.0
+    scale = float(np.mean(np.diag(covariance))) or 1e-12
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(covariance + np.eye(len(covariance)) * jitter)
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0 else jitter * 100
+    raise ValueError("Covariance matrix is not positive definite")
+
+
+def simulate_chunk(values, mu, factor, step_days, steps, paths, seed_sequence):
+    """
+    Simulate one batch of portfolio value paths.
+
+    Args:
+        values: Current market value per holding
+        mu: Daily log-return drift per holding
+        factor: Cholesky factor of the daily log-return covariance
+        step_days: Trading days per simulation step
+        steps: Number of steps
+        paths: Number of paths in this batch
+        seed_sequence: numpy SeedSequence for this batch
+
+    Returns:
+        (paths, steps + 1) array of portfolio values, starting at today's value
+    """
+    rng = np.random.default_rng(seed_sequence)
+    draws = rng.standard_normal((paths, steps, len(values)))
+
+    # Correlate every draw with one matmul and scale to the step length
+    increments = draws @ (factor.T * np.sqrt(step_days)) + mu * step_days
+    growth = np.exp(np.cumsum(increments, axis=1))
+
+    out = np.empty((paths, steps + 1))
+    out[:, 0] = values.sum()
+    out[:, 1:] = growth @ values
+    return out
+
+
+def _run_chunks(values, mu, factor, step_days, steps, chunks):
+    return [
+        simulate_chunk(values, mu, factor, step_days, steps, paths, seed_sequence)
+        for paths, seed_sequence in chunks
+    ]
+
+
+def simulate(values, mu, covariance, horizon_days, paths, steps=None, seed=None, workers=1):
+    """
+    Project portfolio value over a horizon.
+
+    Args:
+        values: Current market value per holding
+        mu: Daily log-return drift per holding
+        covariance: Daily log-return covariance matrix
+        horizon_days: Projection horizon in trading days
+        paths: Number of simulated paths
+        steps: Number of time steps (defaults to min(horizon_days, MAX_STEPS))
+        seed: Optional integer seed for reproducible results
+        workers: Number of processes to split the chunks across; 1 runs in-process
+
+    Returns:
+        (step_days, values) where values is a (paths, steps + 1) array
+    """
+    values = np.asarray(values, dtype=np.float64)
+    steps = steps or min(horizon_days, MAX_STEPS)
+    step_days = horizon_days / steps
+    factor = cholesky(np.asarray(covariance, dtype=np.float64))
+
+    sizes = [CHUNK_PATHS] * (paths // CHUNK_PATHS)
+    if paths % CHUNK_PATHS:
+        sizes.append(paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    chunks = list(zip(sizes, seeds))
+
+    if workers <= 1 or len(chunks) < 2:
+        results = _run_chunks(values, mu, factor, step_days, steps, chunks)
+    else:
+        groups = [chunks[i::workers] for i in range(min(workers, len(chunks)))]
+        try:
+            pool = get_process_pool()
+            futures = [
+                pool.submit(_run_chunks, values, mu, factor, step_days, steps, group)
+                for group in groups
+            ]
+            grouped = [future.result() for future in futures]
+        except Exception as e:
+            logger.warning(f"Process pool unavailable, simulating in-process: {str(e)}")
+            grouped = [_run_chunks(values, mu, factor, step_days, steps, chunks)]
+            groups = [chunks]
+
+        # Restore chunk order so results do not depend on the worker count
+        results = [None] * len(chunks)
+        for offset, group_results in enumerate(grouped):
+            results[offset::len(groups)] = group_results
+
+    return step_days, np.concatenate(results)
+
+
+def summarize(paths_values, step_days, percentiles=PERCENTILES):
+    """
+    Summarize simulated paths.
+
+    Returns:
+        Dict with percentile bands per step and final-value statistics
+    """
+    start_value = float(paths_values[0, 0])
+    bands = np.percentile(paths_values, percentiles, axis=0)
+    final = paths_values[:, -1]
+    return {
+        "start_value": start_value,
+        "days": (np.arange(paths_values.shape[1]) * step_days).round(2).tolist(),
+        "bands": {f"p{p}": band.round(2).tolist() for p, band in zip(percentiles, bands)},
+        "final": {
+            "mean": float(final.mean()),
+            **{f"p{p}": float(v) for p, v in zip(percentiles, bands[:, -1])},
+            "probability_of_loss": float((final < start_value).mean()),
+        },
+    }
@@ -0,0 +1,354 @@
+"""
+Resting limit and stop orders.
+Open orders are kept per symbol in price-ordered heaps: buy limits by highest
+limit, sell limits by lowest limit, buy stops by lowest stop and sell stops by
+highest stop. A price update only pops the orders it crosses off the top of
+each heap, so a fill costs O(log n) and orders far from the price are never
+looked at. Quote updates are coalesced per symbol and matched in batches on a
+background thread; fills are executed through trades.execute_trade like any
+other trade. Cancelled orders are dropped lazily when they reach the top of a
+heap.
+
+Quotes other routes fetch are matched as they arrive, but a symbol nobody is
+looking at would never be priced. A poller thread, started with the first
+order, therefore refreshes the symbols that have open orders every
+ORDER_POLL_SECONDS through a refresh callable supplied by the app.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from functools import partial
+
+import config
+from trades import execute_trade, TradeError
+
+logger = logging.getLogger(__name__)
+
+SIDES = ("buy", "sell")
+ORDER_TYPES = ("limit", "stop")
+
+# Closed (filled, rejected, cancelled) orders remembered per user
+MAX_CLOSED_PER_USER = 100
+
+# Rebuild a book's heaps once cancelled entries outnumber open ones by this much
+COMPACT_MIN_DEAD = 64
+
+
+class Order:
+    """A resting order and its outcome."""
+    __slots__ = (
+        "id", "user_id", "symbol", "side", "order_type", "quantity", "price",
+        "status", "created_at", "closed_at", "fill_price", "transaction", "reason"
+    )
+
+    def __init__(self, user_id, symbol, side, order_type, quantity, price):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.symbol = symbol
+        self.side = side
+        self.order_type = order_type
+        self.quantity = quantity
+        self.price = price
+        self.status = "open"
+        self.created_at = datetime.now().isoformat()
+        self.closed_at = None
+        self.fill_price = None
+        self.transaction = None
+        self.reason = None
+
+    def close(self, status, reason=None):
+        self.status = status
+        self.reason = reason
+        self.closed_at = datetime.now().isoformat()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "type": self.order_type,
+            "quantity": self.quantity,
+            "limit_price" if self.order_type == "limit" else "stop_price": self.price,
+            "status": self.status,
+            "created_at": self.created_at,
+            "closed_at": self.closed_at,
+            "fill_price": self.fill_price,
+            "transaction": self.transaction,
+            "reason": self.reason,
+        }
+
+
+class OrderBook:
+    """
+    Open orders for one symbol.
+    """
+    def __init__(self, symbol):
+        self.symbol = symbol
+        # Heap entries are (key, sequence, order); the sequence keeps equal
+        # prices first-in first-out and stops orders from being compared
+        self._buy_limits = []
+        self._sell_limits = []
+        self._buy_stops = []
+        self._sell_stops = []
+        self.open_count = 0
+        self.dead_count = 0
+
+    def _heap_for(self, order):
+        if order.order_type == "limit":
+            return self._buy_limits if order.side == "buy" else self._sell_limits
+        return self._buy_stops if order.side == "buy" else self._sell_stops
+
+    @staticmethod
+    def _key(order):
+        # Heaps pop the smallest key, so sides that trigger from the top are negated
+        highest_first = (order.order_type == "limit") == (order.side == "buy")
+        return -order.price if highest_first else order.price
+
+    def add(self, order, sequence):
+        heapq.heappush(self._heap_for(order), (self._key(order), sequence, order))
+        self.open_count += 1
+
+    def discard(self, order):
+        """Account for an order cancelled while resting in the book."""
+        self.open_count -= 1
+        self.dead_count += 1
+        if self.dead_count > max(self.open_count, COMPACT_MIN_DEAD):
+            self._compact()
+
+    def _compact(self):
+        for heap in (self._buy_limits, self._sell_limits, self._buy_stops, self._sell_stops):
+            heap[:] = [entry for entry in heap if entry[2].status == "open"]
+            heapq.heapify(heap)
+        self.dead_count = 0
+
+    def _pop_while(self, heap, crosses, triggered):
+        while heap and crosses(heap[0][0]):
+            order = heapq.heappop(heap)[2]
+            if order.status != "open":
+                self.dead_count -= 1
+                continue
+            self.open_count -= 1
+            triggered.append(order)
+
+    def crossing(self, price):
+        """
+        Remove and return every open order a trade at `price` executes.
+
+        Buy limits at or above the price and sell limits at or below it fill;
+        buy stops at or below the price and sell stops at or above it trigger.
+        """
+        triggered = []
+        self._pop_while(self._buy_limits, lambda key: -key >= price, triggered)
+        self._pop_while(self._sell_limits, lambda key: key <= price, triggered)
+        self._pop_while(self._buy_stops, lambda key: key <= price, triggered)
+        self._pop_while(self._sell_stops, lambda key: -key >= price, triggered)
+        return triggered
+
+
+class OrderEngine:
+    """
+    Holds every open order, matches them against price updates and executes fills.
+    """
+    def __init__(self, executor=None, max_closed_per_user=MAX_CLOSED_PER_USER, refresh=None, poll_interval=None):
+        """
+        Initialize the engine.
+
+        Args:
+            executor: Callable (user_id, symbol, quantity, price, side) ->
+                (transaction, new_balance) used for fills; defaults to
+                execute_trade without the mock database fallback, so a failed
+                fill stays open and is retried
+            max_closed_per_user: Closed orders remembered per user
+            refresh: Callable taking the symbols with open orders, expected to
+                fetch their latest prices and pass them to submit_prices; no
+                polling happens until it is set
+            poll_interval: Seconds between refreshes; None reads
+                ORDER_POLL_SECONDS (default 30) when the poller starts
+        """
+        self.executor = executor or partial(execute_trade, allow_fallback=False)
+        self.max_closed_per_user = max_closed_per_user
+        self.refresh = refresh
+        self.poll_interval = poll_interval
+        self._poller = None
+        self._books = {}
+        self._open = {}
+        self._closed = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+        # Latest price per symbol waiting for the matcher thread
+        self._pending = {}
+        self._wakeup = threading.Condition()
+        self._worker = None
+
+    def place(self, user_id, symbol, side, order_type, quantity, price):
+        """
+        Add a resting order.
+
+        Args:
+            user_id: The user placing the order
+            symbol: The stock symbol
+            side: 'buy' or 'sell'
+            order_type: 'limit' or 'stop'
+            quantity: Number of shares
+            price: Limit price for limit orders, trigger price for stop orders
+
+        Returns:
+            The open Order
+
+        Raises:
+            ValueError: If any field is invalid
+        """
+        if side not in SIDES:
+            raise ValueError("side must be 'buy' or 'sell'")
+        if order_type not in ORDER_TYPES:
+            raise ValueError("type must be 'limit' or 'stop'")
+        if quantity <= 0:
+            raise ValueError("Quantity must be greater than zero")
+        if price <= 0:
+            raise ValueError("Price must be greater than zero")
+
+        order = Order(user_id, symbol.upper(), side, order_type, quantity, price)
+        with self._lock:
+            book = self._books.get(order.symbol)
+            if book is None:
+                book = self._books[order.symbol] = OrderBook(order.symbol)
+            book.add(order, next(self._sequence))
+            self._open[order.id] = order
+            if self._poller is None and self.refresh is not None:
+                if self.poll_interval is None:
+                    self.poll_interval = float(config.getenv("ORDER_POLL_SECONDS", "30"))
+                self._poller = threading.Thread(target=self._poll, name="order-poller", daemon=True)
+                self._poller.start()
+        logger.info(f"Placed {order_type} {side} order {order.id} for user {user_id}: {quantity} {order.symbol} at ${price}")
+        return order
+
+    def cancel(self, user_id, order_id):
+        """
+        Cancel an open order.
+
+        Returns:
+            The cancelled Order, or None if the user has no open order with that id
+        """
+        with self._lock:
+            order = self._open.get(order_id)
+            if order is None or order.user_id != user_id:
+                return None
+            del self._open[order_id]
+            order.close("cancelled")
+            self._books[order.symbol].discard(order)
+            self._remember(order)
+        logger.info(f"Cancelled order {order_id} for user {user_id}")
+        return order
+
+    def orders_for(self, user_id, status=None):
+        """Return a user's open and recently closed orders, newest first."""
+        with self._lock:
+            orders = [order for order in self._open.values() if order.user_id == user_id]
+            orders.extend(self._closed.get(user_id, ()))
+        if status:
+            orders = [order for order in orders if order.status == status]
+        return sorted(orders, key=lambda order: order.created_at, reverse=True)
+
+    def open_symbols(self):
+        """Return the symbols that have open orders."""
+        with self._lock:
+            return [symbol for symbol, book in self._books.items() if book.open_count]
+
+    def _remember(self, order):
+        closed = self._closed.get(order.user_id)
+        if closed is None:
+            closed = self._closed[order.user_id] = deque(maxlen=self.max_closed_per_user)
+        closed.appendleft(order)
+
+    def match(self, prices):
+        """
+        Match a batch of price updates and execute the resulting fills.
+
+        Args:
+            prices: Dict of symbol to latest trade price
+
+        Returns:
+            List of Orders that were triggered, now filled or rejected
+        """
+        triggered = []
+        with self._lock:
+            for symbol, price in prices.items():
+                book = self._books.get(symbol)
+                if book is None or not book.open_count:
+                    continue
+                for order in book.crossing(price):
+                    del self._open[order.id]
+                    triggered.append((order, price))
+
+        # Fills touch the database, so they run outside the lock
+        for order, price in triggered:
+            self._fill(order, price)
+        return [order for order, _ in triggered]
+
+    def _fill(self, order, price):
+        try:
+            transaction, _ = self.executor(order.user_id, order.symbol, order.quantity, price, order.side)
+        except TradeError as e:
+            logger.warning(f"Rejected order {order.id} for user {order.user_id}: {e.message}")
+            order.close("rejected", e.message)
+        except Exception as e:
+            # Not the order's fault; put it back so the next update retries it
+            logger.error(f"Error filling order {order.id} for user {order.user_id}: {str(e)}")
+            with self._lock:
+                self._books[order.symbol].add(order, next(self._sequence))
+                self._open[order.id] = order
+            return
+        else:
+            order.fill_price = price
+            order.transaction = transaction
+            order.close("filled")
+            logger.info(f"Filled order {order.id} for user {order.user_id}: {order.side} {order.quantity} {order.symbol} at ${price}")
+
+        with self._lock:
+            self._remember(order)
+
+    def submit_prices(self, prices):
+        """
+        Queue price updates for the background matcher.
+
+        Updates for the same symbol are coalesced, so only the latest price
+        waiting for each symbol is matched.
+        """
+        with self._wakeup:
+            self._pending.update(prices)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="order-matcher", daemon=True)
+                self._worker.start()
+            self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                batch, self._pending = self._pending, {}
+            try:
+                self.match(batch)
+            except Exception as e:
+                logger.error(f"Error matching orders: {str(e)}")
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            symbols = self.open_symbols()
+            if not symbols:
+                continue
+            try:
+                self.refresh(symbols)
+            except Exception as e:
+                logger.error(f"Error refreshing prices for {len(symbols)} symbols with open orders: {str(e)}")
+
+
+# Shared engine instance
+order_engine = OrderEngine()
@@ -0,0 +1,171 @@
+"""
+Portfolio risk analytics over aligned daily return series.
+Builds one return matrix for a set of holdings (cached per symbol set and last
+bar date so users holding the same names share it) and computes covariance,
+correlation, volatility, beta and Value at Risk from it in one pass.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+from market_cache import TTLCache
+
+TRADING_DAYS = 252
+
+
+class ReturnMatrix:
+    """
+    Daily simple returns for several symbols on a common date index.
+    """
+    def __init__(self, symbols, dates, returns, last_prices):
+        """
+        Initialize the matrix.
+
+        Args:
+            symbols: Column symbols, in order
+            dates: datetime64[D] dates of each return row
+            returns: (len(dates), len(symbols)) array of simple returns
+            last_prices: Latest close for each symbol
+        """
+        self.symbols = symbols
+        self.dates = dates
+        self.returns = returns
+        self.last_prices = last_prices
+
+
+def align_returns(bars_list):
+    """
+    Align several Bars on the dates they all share and convert to returns.
+
+    Args:
+        bars_list: List of Bars, one per symbol
+
+    Returns:
+        ReturnMatrix with one column per Bars, in input order
+    """
+    common = bars_list[0].dates
+    for bars in bars_list[1:]:
+        common = np.intersect1d(common, bars.dates, assume_unique=True)
+
+    closes = np.empty((len(common), len(bars_list)))
+    for column, bars in enumerate(bars_list):
+        closes[:, column] = bars.close[np.searchsorted(bars.dates, common)]
+
+    returns = closes[1:] / closes[:-1] - 1 if len(common) > 1 else np.empty((0, len(bars_list)))
+    last_prices = np.array([bars.close[-1] for bars in bars_list])
+    return ReturnMatrix([bars.symbol for bars in bars_list], common[1:], returns, last_prices)
+
+
+class ReturnMatrixCache:
+    """
+    Caches aligned return matrices per (symbol set, period, last bar dates).
+    """
+    def __init__(self, ttl=6 * 60 * 60, max_entries=256):
+        self.ttl = ttl
+        self.cache = TTLCache(max_entries=max_entries)
+
+    def get(self, bars_list, period):
+        """
+        Return the aligned matrix for a list of Bars, building it on a miss.
+
+        The symbol order of the cached matrix is sorted; callers index columns
+        through ReturnMatrix.symbols.
+        """
+        bars_list = sorted(bars_list, key=lambda bars: bars.symbol)
+        key = (period, tuple((bars.symbol, bars.version) for bars in bars_list))
+        matrix = self.cache.get(key)
+        if matrix is None:
+            matrix = align_returns(bars_list)
+            self.cache.set(key, matrix, self.ttl)
+        return matrix
+
+
+def analyze(matrix, quantities, benchmark, confidence=0.95, horizon=1):
+    """
+    Compute portfolio risk metrics.
+
+    Args:
+        matrix: ReturnMatrix whose columns include every holding and the benchmark
+        quantities: Dict of symbol to share quantity held
+        benchmark: Benchmark symbol (a column of the matrix)
+        confidence: VaR confidence level, e.g. 0.95
+        horizon: VaR horizon in trading days
+
+    Returns:
+        Dict of risk metrics
+
+    Raises:
+        ValueError: If there is not enough overlapping history
+    """
+    if len(matrix.dates) < 2:
+        raise ValueError("Not enough overlapping price history to compute risk")
+
+    columns = {symbol: i for i, symbol in enumerate(matrix.symbols)}
+    held = sorted(quantities)
+    index = np.array([columns[symbol] for symbol in held])
+
+    holdings_returns = matrix.returns[:, index]
+    benchmark_returns = matrix.returns[:, columns[benchmark]]
+    values = np.array([quantities[symbol] for symbol in held]) * matrix.last_prices[index]
+    total_value = float(values.sum())
+    weights = values / total_value
+
+    covariance = np.cov(holdings_returns, rowvar=False).reshape(len(held), len(held))
+    stddev = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.outer(stddev, stddev)
+    correlation = np.nan_to_num(correlation)
+
+    portfolio_returns = holdings_returns @ weights
+    daily_volatility = float(np.sqrt(weights @ covariance @ weights))
+
+    # Betas of every holding and the portfolio against the benchmark at once
+    centered = np.column_stack([holdings_returns, portfolio_returns])
+    centered = centered - centered.mean(axis=0)
+    benchmark_centered = benchmark_returns - benchmark_returns.mean()
+    benchmark_variance = float(benchmark_centered @ benchmark_centered)
+    if benchmark_variance > 0:
+        betas = (centered.T @ benchmark_centered) / benchmark_variance
+    else:
+        betas = np.zeros(len(held) + 1)
+
+    # Value at Risk as a positive loss, scaled to the horizon
+    scale = np.sqrt(horizon)
+    tail = np.quantile(portfolio_returns, 1 - confidence)
+    historical_var = -tail * scale
+    tail_losses = portfolio_returns[portfolio_returns <= tail]
+    expected_shortfall = -tail_losses.mean() * scale if len(tail_losses) else historical_var
+    z = NormalDist().inv_cdf(confidence)
+    parametric_var = (z * daily_volatility - portfolio_returns.mean()) * scale
+
+    return {
+        "symbols": held,
+        "weights": weights.tolist(),
+        "market_value": total_value,
+        "observations": int(len(matrix.dates)),
+        "start_date": str(matrix.dates[0]),
+        "end_date": str(matrix.dates[-1]),
+        "volatility": {
+            "daily": daily_volatility,
+            "annualized": daily_volatility * float(np.sqrt(TRADING_DAYS)),
+        },
+        "beta": float(betas[-1]),
+        "betas": dict(zip(held, betas[:-1].tolist())),
+        "benchmark": benchmark,
+        "var": {
+            "confidence": confidence,
+            "horizon_days": horizon,
+            "historical": float(historical_var),
+            "historical_amount": float(historical_var) * total_value,
+            "parametric": float(parametric_var),
+            "parametric_amount": float(parametric_var) * total_value,
+            "expected_shortfall": float(expected_shortfall),
+            "expected_shortfall_amount": float(expected_shortfall) * total_value,
+        },
+        "covariance": (covariance * TRADING_DAYS).tolist(),
+        "correlation": correlation.tolist(),
+    }
+
+
+# Shared matrix cache
+return_matrix_cache = ReturnMatrixCache()
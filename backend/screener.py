@@ -0,0 +1,414 @@
+"""
+Stock screener over a precomputed table of per-symbol metrics.
+The table is built from the daily bars already cached in the bar store
+(returns over several windows, volatility, average volume, distance from the
+52-week high and low) and held as one NumPy column per metric. A query such as
+"return_1m > 5 and volatility < 30 and price < 50" becomes one vectorized
+comparison per condition, so screening never touches the network and costs
+milliseconds even for a 10k-symbol universe.
+
+Building never fetches: it reads the cache, so it is cheap enough to redo
+inside a request once the table is older than SCREENER_REFRESH_SECONDS. Routes
+mostly cache a month of bars, too short for the longer windows, so a year of
+bars for the universe (SCREENER_UNIVERSE, or every symbol a route has cached)
+is loaded in one batch on a background thread that a query starts when the
+loaded history is older than SCREENER_HISTORY_SECONDS; newer cached bars are
+appended to it. Queries never wait for it. Synthetic bars are never screened.
+"""
+import logging
+import operator
+import re
+import threading
+import time
+
+import numpy as np
+
+import config
+from bar_store import Bars, bar_store
+
+logger = logging.getLogger(__name__)
+
+# Trading days in each return window
+RETURN_WINDOWS = {"1w": 5, "1m": 21, "3m": 63, "6m": 126, "1y": 252}
+
+# Trading days of returns used for volatility and of volume for the average
+VOLATILITY_DAYS = 63
+VOLUME_DAYS = 20
+YEAR_DAYS = 252
+
+# Bars each symbol needs: a year of returns plus the starting close
+HISTORY_DAYS = YEAR_DAYS + 1
+
+# Bar store period loaded for the universe
+HISTORY_PERIOD = "1y"
+
+# Metric columns; returns, volatility and distances are percentages
+METRICS = (
+    "price", *(f"return_{window}" for window in RETURN_WINDOWS), "volatility",
+    "avg_volume", "high_52w", "low_52w", "from_high", "from_low",
+)
+
+# Largest page of results
+MAX_RESULTS = 500
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_CONDITION = re.compile(r"^\s*([a-z0-9_]+)\s*(>=|<=|==|!=|>|<|=)\s*(-?\d+(?:\.\d+)?)\s*$")
+_CONJUNCTION = re.compile(r"\s+and\s+|,", re.IGNORECASE)
+
+
+def universe():
+    """Symbols SCREENER_UNIVERSE (comma separated) limits the table to, or None for every cached symbol."""
+    configured = config.getenv("SCREENER_UNIVERSE", "")
+    symbols = [symbol.strip().upper() for symbol in configured.split(",") if symbol.strip()]
+    return symbols or None
+
+
+def splice(history, recent):
+    """
+    A symbol's loaded history extended with the newer days of a cached series.
+
+    Args:
+        history: Bars loaded for the screener, or None
+        recent: Bars cached by a route, or None
+
+    Returns:
+        Bars, or None when both are None
+    """
+    if history is None or not len(history):
+        return recent
+    if recent is None or not len(recent):
+        return history
+    newer = recent.dates > history.dates[-1]
+    if not newer.any():
+        return history if len(history) >= len(recent) else recent
+    tail = recent.take(np.flatnonzero(newer))
+    return Bars(
+        history.symbol,
+        *(np.concatenate((getattr(history, name), getattr(tail, name)))
+          for name in ("dates", "open", "high", "low", "close", "volume")),
+        history.source
+    )
+
+
+def close_matrix(bars_list, days=HISTORY_DAYS):
+    """
+    Stack the last `days` closes and volumes of every symbol, right-aligned.
+
+    Returns:
+        (close, volume) arrays of shape (symbols, days); symbols with shorter
+        history are NaN-padded on the left
+    """
+    close = np.full((len(bars_list), days), np.nan)
+    volume = np.full((len(bars_list), days), np.nan)
+    for row, bars in enumerate(bars_list):
+        n = min(len(bars), days)
+        if n:
+            close[row, days - n:] = bars.close[-n:]
+            volume[row, days - n:] = bars.volume[-n:]
+    return close, volume
+
+
+def compute_metrics(close, volume):
+    """
+    Compute every metric column from right-aligned close and volume matrices.
+
+    Returns:
+        Dict of metric name to a float64 array with one entry per row; NaN
+        where a symbol lacks the history for a metric
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        price = close[:, -1]
+        columns = {"price": price}
+        for window, days in RETURN_WINDOWS.items():
+            columns[f"return_{window}"] = (price / close[:, -1 - days] - 1) * 100
+
+        log_returns = np.diff(np.log(close[:, -VOLATILITY_DAYS - 1:]), axis=1)
+        complete = ~np.isnan(log_returns).any(axis=1)
+        volatility = np.full(len(close), np.nan)
+        volatility[complete] = log_returns[complete].std(axis=1, ddof=1) * np.sqrt(YEAR_DAYS) * 100
+        columns["volatility"] = volatility
+
+        recent_volume = volume[:, -VOLUME_DAYS:]
+        columns["avg_volume"] = np.where(
+            np.isnan(recent_volume).any(axis=1), np.nan, recent_volume.mean(axis=1)
+        )
+
+        year = close[:, -YEAR_DAYS:]
+        has_price = ~np.isnan(year).all(axis=1)
+        high = np.full(len(close), np.nan)
+        low = np.full(len(close), np.nan)
+        high[has_price] = np.nanmax(year[has_price], axis=1)
+        low[has_price] = np.nanmin(year[has_price], axis=1)
+        columns["high_52w"] = high
+        columns["low_52w"] = low
+        columns["from_high"] = (price / high - 1) * 100
+        columns["from_low"] = (price / low - 1) * 100
+    return columns
+
+
+def parse_query(query):
+    """
+    Parse a filter such as "return_1m > 5 and volatility < 30, price < 50".
+
+    Args:
+        query: Conditions "<metric> <op> <number>" joined by "and" or commas;
+            op is one of >, >=, <, <=, =, ==, !=
+
+    Returns:
+        List of (metric, op, value) tuples
+
+    Raises:
+        ValueError: If a condition is malformed or names an unknown metric
+    """
+    conditions = []
+    for part in _CONJUNCTION.split(query or ""):
+        if not part.strip():
+            continue
+        match = _CONDITION.match(part.lower())
+        if match is None:
+            raise ValueError(f"Invalid condition: {part.strip()}")
+        metric, op, value = match.groups()
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        conditions.append((metric, op, float(value)))
+    return conditions
+
+
+def parse_sort(sort):
+    """
+    Parse a sort key such as "-return_1m" (descending) or "volatility".
+
+    Returns:
+        (metric, descending)
+
+    Raises:
+        ValueError: If the metric is unknown
+    """
+    sort = (sort or "").strip().lower()
+    descending = sort.startswith("-")
+    metric = sort.lstrip("-+")
+    if metric not in METRICS:
+        raise ValueError(f"Unknown sort metric: {metric}")
+    return metric, descending
+
+
+class MetricsTable:
+    """
+    Per-symbol metrics as parallel columns; immutable once built.
+    """
+    def __init__(self, symbols, columns, built_at=None):
+        """
+        Initialize the table.
+
+        Args:
+            symbols: Array of symbols, one per row
+            columns: Dict of metric name to float64 array aligned with symbols
+            built_at: Unix time the table was built
+        """
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.columns = columns
+        self.built_at = built_at or time.time()
+
+    @classmethod
+    def from_bars(cls, bars_list):
+        """Build the table from one Bars per symbol, leaving synthetic bars out."""
+        bars_list = [bars for bars in bars_list if bars.source != "mock"]
+        close, volume = close_matrix(bars_list)
+        return cls([bars.symbol for bars in bars_list], compute_metrics(close, volume))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def screen(self, conditions, sort=("return_1m", True), limit=50):
+        """
+        Filter and sort the table.
+
+        Args:
+            conditions: Output of parse_query; all must hold (NaN never matches)
+            sort: (metric, descending) from parse_sort; NaN sorts last
+            limit: Most rows returned
+
+        Returns:
+            (matching row count, list of row dicts with 'symbol' and every metric)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for metric, op, value in conditions:
+            column = self.columns[metric]
+            with np.errstate(invalid="ignore"):
+                mask &= OPERATORS[op](column, value) & ~np.isnan(column)
+        rows = np.flatnonzero(mask)
+
+        metric, descending = sort
+        keys = self.columns[metric][rows]
+        # NaN last in either direction: sort ascending on the (negated) key
+        order = np.argsort(-keys if descending else keys, kind="stable")
+        rows = rows[order[:limit]]
+
+        values = {name: np.round(column[rows], 4).tolist() for name, column in self.columns.items()}
+        results = []
+        for i, symbol in enumerate(self.symbols[rows].tolist()):
+            row = {"symbol": symbol}
+            for name, column in values.items():
+                # NaN (history too short for the metric) becomes null
+                row[name] = None if column[i] != column[i] else column[i]
+            results.append(row)
+        return int(mask.sum()), results
+
+
+class Screener:
+    """
+    Holds the current metrics table and rebuilds it from the bar store's cache
+    plus a year of bars loaded in the background for the universe.
+    """
+    def __init__(self, store=None, max_age=None, history_max_age=None):
+        """
+        Initialize the screener.
+
+        Args:
+            store: BarStore whose cached daily bars are screened (defaults to the shared store)
+            max_age: Seconds a table is used before the next query rebuilds it;
+                None reads SCREENER_REFRESH_SECONDS (default 60)
+            history_max_age: Seconds a symbol's loaded year of bars is used
+                before it is loaded again; None reads SCREENER_HISTORY_SECONDS
+                (default 21600)
+        """
+        self.store = store or bar_store
+        self.max_age = max_age
+        self.history_max_age = history_max_age
+        self.table = None
+        self.history = {}
+        self._history_at = {}
+        self._loader = None
+        self._lock = threading.Lock()
+        self._loader_lock = threading.Lock()
+
+    def rebuild(self, symbols=None):
+        """
+        Build a new table from cached and loaded bars and swap it in.
+
+        Args:
+            symbols: Only screen these symbols; None reads universe()
+
+        Returns:
+            The new MetricsTable
+        """
+        symbols = symbols or universe()
+        start = time.perf_counter()
+        cached = self.store.cached_daily()
+        history = self.history
+        if symbols is None:
+            symbols = list(dict.fromkeys([*history, *cached]))
+        bars_list = []
+        for symbol in dict.fromkeys(symbol.upper() for symbol in symbols):
+            bars = splice(history.get(symbol), cached.get(symbol))
+            if bars is not None:
+                bars_list.append(bars)
+
+        table = MetricsTable.from_bars(bars_list)
+        self.table = table
+        logger.info(f"Rebuilt screener table for {len(table)} symbols in "
+                    f"{(time.perf_counter() - start) * 1000:.1f}ms")
+        return table
+
+    def due_symbols(self):
+        """Universe symbols whose year of bars is missing or older than history_max_age."""
+        if self.history_max_age is None:
+            self.history_max_age = float(config.getenv("SCREENER_HISTORY_SECONDS", "21600"))
+        symbols = universe() or list(self.store.cached_daily())
+        now = time.time()
+        return [
+            symbol for symbol in dict.fromkeys(symbol.upper() for symbol in symbols)
+            if now - self._history_at.get(symbol, 0) >= self.history_max_age
+        ]
+
+    def load_history(self, symbols=None):
+        """
+        Fetch a year of real daily bars for symbols in one batch and rebuild the table.
+
+        Runs on the loader thread (or from a script); bars are kept here, not
+        in the bar store, so a large universe does not evict the series routes use.
+
+        Args:
+            symbols: Symbols to load; None loads due_symbols()
+
+        Returns:
+            Number of symbols upstream returned bars for
+        """
+        symbols = self.due_symbols() if symbols is None else [symbol.upper() for symbol in symbols]
+        if not symbols:
+            return 0
+        start = time.perf_counter()
+        fetched = self.store.get_many(symbols, HISTORY_PERIOD, allow_mock=False, store=False)
+
+        now = time.time()
+        history = dict(self.history)
+        for symbol in symbols:
+            # Symbols upstream has nothing for wait a full interval before the next try
+            self._history_at[symbol] = now
+            bars = fetched.get(symbol)
+            if bars is not None and len(bars) and bars.source != "mock":
+                history[symbol] = bars
+        self.history = history
+        loaded = sum(1 for symbol in symbols if symbol in history)
+        logger.info(f"Loaded {HISTORY_PERIOD} bars for {loaded} of {len(symbols)} screener symbols in "
+                    f"{(time.perf_counter() - start) * 1000:.0f}ms")
+        self.rebuild()
+        return loaded
+
+    def _start_loader(self):
+        """Start a background load when some symbols are due and none is running."""
+        with self._loader_lock:
+            if self._loader is not None and self._loader.is_alive():
+                return
+            symbols = self.due_symbols()
+            if not symbols:
+                return
+            self._loader = threading.Thread(
+                target=self._load, args=(symbols,), name="screener-history", daemon=True
+            )
+            self._loader.start()
+
+    def _load(self, symbols):
+        try:
+            self.load_history(symbols)
+        except Exception as e:
+            logger.error(f"Error loading screener history for {len(symbols)} symbols: {str(e)}")
+
+    def current(self):
+        """
+        Return the latest table, rebuilding it first when it is missing or too old.
+
+        Never waits: while another request is rebuilding, the previous table
+        (or an empty one) is returned, and history loads run in the background.
+
+        Returns:
+            The MetricsTable
+        """
+        if self.max_age is None:
+            self.max_age = float(config.getenv("SCREENER_REFRESH_SECONDS", "60"))
+        table = self.table
+        if table is not None and time.time() - table.built_at < self.max_age:
+            return table
+
+        if self._lock.acquire(blocking=False):
+            try:
+                table = self.rebuild()
+                self._start_loader()
+            except Exception as e:
+                logger.error(f"Error rebuilding screener table: {str(e)}")
+            finally:
+                self._lock.release()
+        return table if table is not None else MetricsTable.from_bars([])
+
+
+# Shared screener instance
+screener = Screener()
@@ -0,0 +1,128 @@
+"""
+Response formats for time-series endpoints.
+The legacy date-keyed JSON stays the default; clients can ask for a columnar
+JSON layout or a compact binary encoding (MessagePack, Arrow IPC) with either
+a format= query parameter or the Accept header.
+"""
+import importlib.util
+import io
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# pyarrow takes longer to import than everything else here put together, so it
+# is only loaded when an Arrow response is actually requested
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+# Format name -> response mimetype
+FORMATS = {
+    "legacy": "application/json",
+    "columnar": "application/vnd.investing101.columnar+json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Extra Accept mimetypes recognised for a format
+ACCEPT_ALIASES = {
+    "application/x-msgpack": "msgpack",
+}
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def available(fmt):
+    """Check if the encoder for a format is installed."""
+    if fmt == "msgpack":
+        return msgpack is not None
+    if fmt == "arrow":
+        return HAS_PYARROW
+    return fmt in FORMATS
+
+
+def negotiate(format_param, accept):
+    """
+    Pick the response format for a request.
+
+    Args:
+        format_param: Value of the format= query parameter, or None
+        accept: The request's werkzeug MIMEAccept
+
+    Returns:
+        A key of FORMATS, or None if the requested format is unknown or its
+        encoder is not installed
+    """
+    if format_param:
+        fmt = format_param.lower()
+        return fmt if fmt in FORMATS and available(fmt) else None
+
+    # Legacy JSON is offered first so it wins ties such as */*
+    offered = [mimetype for fmt, mimetype in FORMATS.items() if available(fmt)]
+    offered += [alias for alias, fmt in ACCEPT_ALIASES.items() if available(fmt)]
+    if not accept:
+        return "legacy"
+
+    best = accept.best_match(offered, default=FORMATS["legacy"])
+    if best in ACCEPT_ALIASES:
+        return ACCEPT_ALIASES[best]
+    return next(fmt for fmt, mimetype in FORMATS.items() if mimetype == best)
+
+
+def columnar(bars, meta=None):
+    """
+    Build the columnar layout for bars.
+
+    Args:
+        bars: Bars to encode
+        meta: Optional dict of extra metadata
+
+    Returns:
+        Dict with "symbol", "meta", "dates" and one numeric array per OHLCV column
+    """
+    payload = {"symbol": bars.symbol, "meta": meta or {}, "dates": bars.date_strings()}
+    for column in COLUMNS[:-1]:
+        payload[column] = np.round(getattr(bars, column), 4).tolist()
+    payload["volume"] = bars.volume.astype(np.int64).tolist()
+    return payload
+
+
+def _arrow(bars, meta):
+    import pyarrow
+    import pyarrow.ipc
+
+    table = pyarrow.table(
+        {
+            "date": pyarrow.array(bars.dates),
+            **{column: pyarrow.array(getattr(bars, column)) for column in COLUMNS[:-1]},
+            "volume": pyarrow.array(bars.volume.astype(np.int64)),
+        },
+        metadata={"symbol": bars.symbol, **{str(k): str(v) for k, v in (meta or {}).items()}},
+    )
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def encode(fmt, bars, meta, json_provider):
+    """
+    Encode bars in a non-legacy format.
+
+    Args:
+        fmt: "columnar", "msgpack" or "arrow"
+        bars: Bars to encode
+        meta: Dict of metadata to include
+        json_provider: The app's FastJSONProvider, used for columnar JSON
+
+    Returns:
+        The encoded body as bytes
+    """
+    if fmt == "arrow":
+        return _arrow(bars, meta)
+    payload = columnar(bars, meta)
+    if fmt == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True)
+    return json_provider.encode_body(payload)
@@ -0,0 +1,57 @@
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import mock_db  # noqa: E402
+from database import database  # noqa: E402
+from fake_supabase import FakeSupabase  # noqa: E402
+
+# Module-level mock tables tests may change
+MOCK_STATE = (
+    "mock_users", "mock_portfolios", "mock_transactions",
+    "mock_ledger_snapshots", "mock_equity_curves", "mock_watchlists",
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_state():
+    """Restore the mock database after every test, keeping the same objects."""
+    saved = {name: copy.deepcopy(getattr(mock_db, name)) for name in MOCK_STATE}
+    yield
+    for name, value in saved.items():
+        current = getattr(mock_db, name)
+        if isinstance(current, dict):
+            current.clear()
+            current.update(value)
+        else:
+            current[:] = value
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    """Point the database at a FakeSupabase; returns a function installing one."""
+    def install(tables=None, fail_on=()):
+        client = FakeSupabase(tables, fail_on)
+        monkeypatch.setattr(database, "_client", client)
+        monkeypatch.setattr(database, "_using_mock", False)
+        return client
+    return install
+
+
+@pytest.fixture
+def mock_database(monkeypatch):
+    """Serve requests from the mock database regardless of the environment."""
+    monkeypatch.setattr(database, "_client", mock_db.mock_supabase)
+    monkeypatch.setattr(database, "_using_mock", True)
+
+
+@pytest.fixture
+def client():
+    """Flask test client for the API."""
+    from app import app
+    app.config["TESTING"] = True
+    return app.test_client()
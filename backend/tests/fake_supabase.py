@@ -0,0 +1,112 @@
+"""
+In-memory stand-in for the subset of the Supabase client the backend uses:
+table(...).select/insert/upsert/update/delete with eq/in_/order filters.
+Tables are lists of row dicts; fail_on lets a test make one operation raise.
+"""
+import copy
+import uuid
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, client, table, action, payload=None, on_conflict=None):
+        self.client = client
+        self.table = table
+        self.action = action
+        self.payload = payload
+        self.on_conflict = on_conflict
+        self.filters = []
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def _matches(self, row):
+        return all(check(row) for check in self.filters)
+
+    def execute(self):
+        if (self.table, self.action) in self.client.fail_on:
+            raise RuntimeError(f"{self.action} on {self.table} failed")
+        rows = self.client.tables.setdefault(self.table, [])
+
+        if self.action == "select":
+            return FakeResponse([copy.deepcopy(row) for row in rows if self._matches(row)])
+        if self.action == "insert":
+            inserted = [dict({"id": str(uuid.uuid4())}, **row) for row in _as_list(self.payload)]
+            rows.extend(inserted)
+            return FakeResponse(copy.deepcopy(inserted))
+        if self.action == "upsert":
+            keys = self.on_conflict.split(",")
+            written = []
+            for new in _as_list(self.payload):
+                current = next((row for row in rows if all(row.get(k) == new.get(k) for k in keys)), None)
+                if current is None:
+                    current = dict({"id": str(uuid.uuid4())}, **new)
+                    rows.append(current)
+                else:
+                    current.update(new)
+                written.append(copy.deepcopy(current))
+            return FakeResponse(written)
+        if self.action == "update":
+            updated = [row for row in rows if self._matches(row)]
+            for row in updated:
+                row.update(self.payload)
+            return FakeResponse(copy.deepcopy(updated))
+        if self.action == "delete":
+            deleted = [row for row in rows if self._matches(row)]
+            rows[:] = [row for row in rows if not self._matches(row)]
+            return FakeResponse(deleted)
+        raise ValueError(self.action)
+
+
+class FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def select(self, columns="*"):
+        return FakeQuery(self.client, self.name, "select")
+
+    def insert(self, rows):
+        return FakeQuery(self.client, self.name, "insert", rows)
+
+    def upsert(self, rows, on_conflict="id"):
+        return FakeQuery(self.client, self.name, "upsert", rows, on_conflict)
+
+    def update(self, changes):
+        return FakeQuery(self.client, self.name, "update", changes)
+
+    def delete(self):
+        return FakeQuery(self.client, self.name, "delete")
+
+
+class FakeSupabase:
+    """
+    Fake client over plain lists of rows.
+
+    Args:
+        tables: Dict of table name to list of row dicts
+        fail_on: Set of (table, action) pairs whose execute() raises
+    """
+    def __init__(self, tables=None, fail_on=()):
+        self.tables = tables or {}
+        self.fail_on = set(fail_on)
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+def _as_list(rows):
+    return rows if isinstance(rows, list) else [rows]
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from alerts import AlertEngine
+
+
+def test_prices_fire_exactly_the_crossed_alerts():
+    rng = random.Random(11)
+    engine = AlertEngine(max_alerts_per_user=10**6)
+    alerts = [
+        engine.create("u1", "AAA", rng.randint(80, 120), rng.choice(["above", "below"]))
+        for _ in range(500)
+    ]
+    deleted = set(rng.sample([alert.id for alert in alerts], 60))
+    for alert_id in deleted:
+        engine.delete("u1", alert_id)
+    active = {alert.id: alert for alert in alerts if alert.id not in deleted}
+
+    for _ in range(40):
+        price = rng.randint(75, 125)
+        expected = {
+            alert_id for alert_id, alert in active.items()
+            if (price >= alert.threshold if alert.direction == "above" else price <= alert.threshold)
+        }
+        assert engine.on_prices({"AAA": price}) == len(expected)
+        for alert_id in expected:
+            del active[alert_id]
+        assert {alert.id for alert in engine.alerts_for("u1")} == set(active)
+
+    events, cursor = engine.events_for("u1")
+    assert all(event["alert_id"] not in deleted for event in events)
+    assert engine.events_for("u1", cursor)[0] == []
+
+
+def test_alert_at_the_price_fires_in_both_directions():
+    engine = AlertEngine()
+    above = engine.create("u1", "AAA", 100, "above")
+    below = engine.create("u1", "AAA", 100, "below")
+    engine.create("u1", "AAA", 101, "above")
+    engine.create("u1", "AAA", 99, "below")
+
+    assert engine.on_prices({"AAA": 100}) == 2
+    fired = {event["alert_id"] for event in engine.events_for("u1")[0]}
+    assert fired == {above.id, below.id}
+
+
+def test_direction_is_inferred_from_the_last_price():
+    engine = AlertEngine()
+    with pytest.raises(ValueError):
+        engine.create("u1", "AAA", 100)
+
+    engine.on_prices({"AAA": 90})
+    assert engine.create("u1", "aaa", 100).direction == "above"
+    assert engine.create("u1", "AAA", 80).direction == "below"
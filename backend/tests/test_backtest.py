@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import backtest
+
+CLOSE = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 300)))
+
+
+@pytest.mark.parametrize("params", [
+    {"fast": None},
+    {"fast": {"value": 5}},
+    {"fast": "five"},
+    {"fast": 5.5},
+    {"fast": True},
+    {"slow": float("inf")},
+])
+def test_invalid_parameter_values_raise_value_error(params):
+    with pytest.raises(ValueError):
+        backtest.run(CLOSE, "ma_crossover", params)
+    with pytest.raises(ValueError):
+        backtest.expand_grid("ma_crossover", params)
+
+
+def test_invalid_value_inside_a_sweep_list_is_rejected_up_front():
+    with pytest.raises(ValueError, match="window must be a number"):
+        backtest.expand_grid("rsi", {"window": [10, None]})
+    with pytest.raises(ValueError, match="must not be empty"):
+        backtest.expand_grid("rsi", {"window": []})
+    with pytest.raises(ValueError, match="params must be an object"):
+        backtest.expand_grid("rsi", [14])
+
+
+def test_numeric_strings_and_whole_floats_are_converted():
+    grid = backtest.expand_grid("ma_crossover", {"fast": ["5", 10.0], "slow": 50})
+    assert grid == [{"fast": 5, "slow": 50}, {"fast": 10, "slow": 50}]
+    assert all(isinstance(params["fast"], int) for params in grid)
+
+    stats = backtest.run(CLOSE, "rsi", {"lower": "25.5", "window": "10"})["stats"]
+    assert stats == backtest.run(CLOSE, "rsi", {"lower": 25.5, "window": 10})["stats"]
+
+
+def test_route_answers_400_for_null_params(client):
+    response = client.post("/api/backtest", json={
+        "symbol": "AAPL", "strategy": "ma_crossover", "params": {"fast": None},
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "fast must be a number"}
+
+
+def test_buy_and_hold_tracks_the_price():
+    result = backtest.run(CLOSE, "buy_and_hold", initial_capital=1000.0)
+    assert result["equity"][-1] == pytest.approx(1000.0 * CLOSE[-1] / CLOSE[0])
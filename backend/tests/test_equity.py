@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+import equity
+import ledger
+import mock_db
+import txlog
+from bar_store import Bars
+
+DAYS = np.arange(np.datetime64("2024-03-01"), np.datetime64("2024-03-15"))
+DAYS = DAYS[np.is_busday(DAYS)]
+
+
+def bars(symbol, closes, days=DAYS):
+    close = np.asarray(closes, dtype=np.float64)
+    return Bars(symbol, days, close, close, close, close, np.zeros(len(close)))
+
+
+class FakeStore:
+    def __init__(self, bars_by_symbol):
+        self.bars_by_symbol = bars_by_symbol
+
+    def get_many(self, symbols, period="1mo", allow_mock=False, store=True):
+        return {symbol: self.bars_by_symbol.get(symbol) for symbol in symbols}
+
+
+def trade(i, symbol, quantity, price, side, day):
+    return {"id": f"t{i}", "user_id": "u1", "symbol": symbol, "quantity": quantity,
+            "price": price, "type": side, "created_at": f"{day}T15:00:00"}
+
+
+@pytest.fixture
+def curve_env(mock_database, monkeypatch):
+    monkeypatch.setattr(equity, "bar_store", FakeStore({"AAA": bars("AAA", np.arange(len(DAYS)) + 100.0)}))
+    mock_db.mock_transactions[:] = [
+        trade(0, "AAA", 10, 100.0, "buy", DAYS[0]),
+        trade(1, "AAA", 4, 105.0, "sell", DAYS[5]),
+    ]
+    mock_db.mock_equity_curves.clear()
+
+
+def point(day, trades):
+    return {"date": str(day), "trades": trades}
+
+
+def test_dirty_from_without_points():
+    assert equity.dirty_from([], DAYS[:1]) is None
+
+
+def test_dirty_from_refreshes_only_the_latest_point_when_nothing_changed():
+    trade_days = np.array([DAYS[0], DAYS[3]])
+    points = [point(DAYS[0], 1), point(DAYS[2], 1), point(DAYS[3], 2), point(DAYS[4], 2)]
+    assert equity.dirty_from(points, trade_days) == DAYS[4]
+
+
+def test_dirty_from_starts_at_a_backdated_trade():
+    points = [point(DAYS[0], 1), point(DAYS[2], 1), point(DAYS[3], 2), point(DAYS[4], 2)]
+    # A trade on DAYS[1] arrived after DAYS[2] and later were stored
+    trade_days = np.array([DAYS[0], DAYS[1], DAYS[3]])
+    assert equity.dirty_from(points, trade_days) == DAYS[2]
+
+
+def test_value_days_carries_closes_and_cash():
+    log = txlog.TransactionLog.from_rows([
+        trade(0, "AAA", 10, 100.0, "buy", DAYS[1]),
+    ])
+    partial = bars("AAA", [100.0, 101.0, 103.0], DAYS[[0, 1, 3]])
+
+    values = equity.value_days(log, DAYS[:4], {"AAA": partial})
+
+    assert values["cash"].tolist() == [ledger.INITIAL_CASH] + [ledger.INITIAL_CASH - 1000.0] * 3
+    # No bar on DAYS[2]: the close of DAYS[1] carries forward
+    assert values["holdings"].tolist() == [0.0, 1010.0, 1010.0, 1030.0]
+    assert values["trades"].tolist() == [0, 1, 1, 1]
+    assert not values["estimated"].any()
+
+
+def test_incremental_update_matches_full_rebuild(curve_env):
+    first = equity.update_curve("u1")
+    assert first["points_recomputed"] == len(DAYS)
+
+    again = equity.update_curve("u1")
+    assert again["recomputed_from"] == str(DAYS[-1])
+    assert again["points_recomputed"] == 1
+
+    # Backdated trade: recompute from its day, and agree with a rebuild from scratch
+    mock_db.mock_transactions.append(trade(2, "AAA", 2, 101.0, "buy", DAYS[2]))
+    backdated = equity.update_curve("u1")
+    assert backdated["recomputed_from"] == str(DAYS[2])
+
+    mock_db.mock_equity_curves.clear()
+    rebuilt = equity.update_curve("u1")
+    assert backdated["points"] == rebuilt["points"]
+
+
+def test_points_after_an_estimated_day_are_not_stored(curve_env):
+    mock_db.mock_transactions.append(trade(2, "ZZZ", 1, 50.0, "buy", DAYS[3]))
+
+    curve = equity.update_curve("u1")
+
+    assert curve["missing_prices"] == ["ZZZ"]
+    assert curve["estimated"] == [False] * 3 + [True] * (len(DAYS) - 3)
+    assert curve["points_saved"] == 3
+    assert [p["date"] for p in mock_db.get_equity_curve("u1")] == [str(day) for day in DAYS[:3]]
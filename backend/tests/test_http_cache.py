@@ -0,0 +1,35 @@
+import pytest
+
+import http_cache
+
+
+@pytest.fixture
+def app_module():
+    import app
+    return app
+
+
+def test_mock_quote_and_daily_fallbacks_are_not_stored(app_module):
+    with app_module.app.test_request_context():
+        responses = [
+            app_module.fallback_to_mock_data("AAPL"),
+            app_module.fallback_to_mock_daily_data("AAPL"),
+            app_module.fallback_to_mock_daily_data("AAPL", period="1y"),
+        ]
+    for response in responses:
+        assert response.headers[http_cache.DATA_SOURCE_HEADER] == "mock"
+        assert response.cache_control.no_store
+        assert not response.cache_control.public
+
+
+def test_cached_live_bodies_are_public_and_revalidate(app_module):
+    entry = http_cache.CachedBody(b'{"ok": true}', ttl=120)
+    with app_module.app.test_request_context():
+        response = http_cache.respond(entry, 30)
+    assert response.cache_control.public
+    assert response.cache_control.max_age == http_cache.BROWSER_MAX_AGE
+    assert not response.cache_control.no_store
+    assert response.headers[http_cache.DATA_SOURCE_HEADER] == "live"
+
+    with app_module.app.test_request_context(headers={"If-None-Match": f'"{entry.etag}"'}):
+        assert http_cache.respond(entry, 30).status_code == 304
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+import indicators
+
+
+def test_bollinger_width_may_be_fractional():
+    [(key, name, params)] = indicators.parse_spec("bb:20:2.5")
+    assert (key, name, params) == ("bb:20:2.5", "bb", (20, 2.5))
+
+
+def test_whole_and_default_widths_share_a_key():
+    keys = [key for key, _, _ in indicators.parse_spec("bb, bb:20:2, bb:20:2.0")]
+    assert keys == ["bb:20:2"] * 3
+
+
+def test_window_lengths_stay_integers():
+    with pytest.raises(ValueError, match="Invalid parameters for sma"):
+        indicators.parse_spec("sma:20.5")
+    assert indicators.parse_spec("macd:5") == [("macd:5:26:9", "macd", (5, 26, 9))]
+
+
+@pytest.mark.parametrize("spec", ["", "foo:3", "sma:0", "rsi:14:2", "bb:20:-1"])
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        indicators.parse_spec(spec)
+
+
+def test_bollinger_band_width_scales_deviation():
+    close = np.linspace(100, 120, 60) + np.sin(np.arange(60))
+    narrow = indicators.bollinger(close, 20, 2.0)
+    wide = indicators.bollinger(close, 20, 2.5)
+    np.testing.assert_allclose(
+        (wide["upper"] - wide["middle"])[19:], 1.25 * (narrow["upper"] - narrow["middle"])[19:]
+    )
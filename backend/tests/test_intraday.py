@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pandas as pd
+
+import intraday
+
+
+class SlowService:
+    """Upstream returning a few 1m bars after a delay, counting calls per symbol."""
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def get_intraday(self, symbol, period, interval):
+        with self._lock:
+            self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        time.sleep(self.delay)
+        index = pd.date_range("2024-06-28 13:30", periods=5, freq="1min")
+        return pd.DataFrame(
+            {"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": 1.0, "Volume": 100.0}, index=index
+        )
+
+
+class ClosedCalendar:
+    def cache_ttl(self, symbol, open_ttl):
+        return 3600
+
+
+def test_concurrent_requests_for_one_series_fetch_once():
+    service = SlowService()
+    store = intraday.IntradayStore(service=service, calendar=ClosedCalendar())
+
+    threads = [threading.Thread(target=store.base, args=("AAA", "1d")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert service.calls == {"AAA": 1}
+
+
+def test_lock_pool_does_not_grow_with_symbols():
+    store = intraday.IntradayStore(service=SlowService(delay=0), calendar=ClosedCalendar())
+
+    for i in range(500):
+        store.base(f"SYM{i}", "1d")
+
+    assert len(store._locks) == intraday.LOCK_STRIPES
+    assert store._lock_for(("SYM1", "1m")) is store._lock_for(("SYM1", "1m"))
@@ -0,0 +1,73 @@
+import logging
+
+from leaderboard import Leaderboard
+
+
+class Store:
+    """Loader over mutable balances and portfolio rows, counting loads."""
+    def __init__(self):
+        self.balances = {"alice": 1000.0, "bob": 500.0}
+        self.rows = [{"user_id": "bob", "symbol": "AAA", "quantity": 10, "avg_price": 100.0}]
+        self.loads = 0
+
+    def __call__(self):
+        self.loads += 1
+        return dict(self.balances), list(self.rows)
+
+
+def test_ranks_by_value_without_exposing_user_ids():
+    board = Leaderboard(loader=Store(), max_age=0, handle_key="secret")
+
+    entries = board.top()
+
+    assert [entry["value"] for entry in entries] == [1500.0, 1000.0]
+    assert entries[0]["handle"] == board.handle("bob")
+    assert all("user_id" not in entry and "bob" not in entry["handle"] for entry in entries)
+
+
+def test_handles_agree_across_processes_with_a_configured_key(monkeypatch):
+    monkeypatch.setenv("LEADERBOARD_HANDLE_KEY", "shared-secret")
+    first, second = Leaderboard(loader=Store()), Leaderboard(loader=Store())
+
+    assert first.handle("bob") == second.handle("bob")
+    assert first.handle("bob") != first.handle("alice")
+
+
+def test_unset_handle_key_warns(monkeypatch, caplog):
+    monkeypatch.delenv("LEADERBOARD_HANDLE_KEY", raising=False)
+    board = Leaderboard(loader=Store())
+
+    with caplog.at_level(logging.WARNING, logger="leaderboard"):
+        board.handle("bob")
+
+    assert "LEADERBOARD_HANDLE_KEY is not set" in caplog.text
+    assert board.handle("bob") == board.handle("bob")
+
+
+def test_trades_and_prices_update_incrementally():
+    board = Leaderboard(loader=Store(), max_age=0, handle_key="secret")
+    board.top()
+
+    board.on_trade("alice", [("AAA", 5, 100.0, "buy")], 500.0)
+    board.on_prices({"AAA": 200.0})
+
+    assert board.rank_of("bob")["value"] == 2500.0
+    assert board.rank_of("alice")["value"] == 1500.0
+    assert board.rank_of("alice")["rank"] == 2
+
+
+def test_trades_made_by_another_process_appear_after_max_age(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("leaderboard.time.monotonic", lambda: clock[0])
+    store = Store()
+    board = Leaderboard(loader=store, max_age=60, handle_key="secret")
+    board.top()
+
+    # Another instance records a trade in the database
+    store.balances["alice"] = 5000.0
+    clock[0] += 30
+    assert board.rank_of("alice")["value"] == 1000.0
+
+    clock[0] += 30
+    assert board.rank_of("alice")["value"] == 5000.0
+    assert store.loads == 2
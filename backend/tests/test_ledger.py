@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+import ledger
+import mock_db
+from trades import plan_batch
+
+
+def random_rows(seed, count=300, users=("u1", "u2", "u3"), symbols=("AAA", "BBB", "CCC")):
+    """Valid trades (never short), including positions sold flat and bought again."""
+    rng = random.Random(seed)
+    held = {}
+    rows = []
+    for i in range(count):
+        user, symbol = rng.choice(users), rng.choice(symbols)
+        have = held.get((user, symbol), 0)
+        if have and rng.random() < 0.45:
+            quantity, side = (have if rng.random() < 0.3 else rng.randint(1, have)), "sell"
+        else:
+            quantity, side = rng.randint(1, 20), "buy"
+        held[(user, symbol)] = have + (quantity if side == "buy" else -quantity)
+        rows.append({
+            "id": f"t{i}", "user_id": user, "symbol": symbol, "quantity": quantity,
+            "price": round(rng.uniform(10, 200), 2), "type": side,
+            # Several entries share a timestamp
+            "created_at": f"2024-01-01T10:{i // 3 // 60:02d}:{i // 3 % 60:02d}",
+        })
+    return rows
+
+
+def sequential(rows):
+    """Apply rows one at a time with the trade planner, per user."""
+    cash, positions = {}, {}
+    for row in rows:
+        user = row["user_id"]
+        held = positions.setdefault(user, {})
+        balance, changed = plan_batch(
+            cash.get(user, ledger.INITIAL_CASH), held,
+            [(row["symbol"], row["quantity"], row["price"], row["type"])]
+        )
+        cash[user] = balance
+        held.update(changed)
+    return cash, {user: {s: p for s, p in held.items() if p[0] > 0} for user, held in positions.items()}
+
+
+def assert_states_match(states, cash, positions):
+    assert set(states) == set(cash)
+    for user, state in states.items():
+        assert state.cash == pytest.approx(cash[user])
+        assert set(state.positions) == set(positions[user])
+        for symbol, (held, avg_price) in state.positions.items():
+            assert held == pytest.approx(positions[user][symbol][0])
+            assert avg_price == pytest.approx(positions[user][symbol][1])
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_vectorized_replay_matches_trade_by_trade(seed):
+    rows = random_rows(seed)
+    states = ledger.replay_rows(rows)
+    assert_states_match(states, *sequential(rows))
+    assert sum(state.entries for state in states.values()) == len(rows)
+
+
+def test_replay_from_snapshot_matches_full_replay():
+    rows = random_rows(4)
+    head, tail = rows[:150], rows[150:]
+    snapshots = ledger.replay_rows(head)
+
+    assert_states_match(ledger.replay_rows(tail, snapshots), *sequential(rows))
+
+
+def test_snapshot_survives_round_trip():
+    state = ledger.replay_rows(random_rows(5))["u1"]
+    restored = ledger.LedgerState.from_snapshot(state.to_snapshot())
+
+    assert (restored.cash, restored.positions, restored.as_of, restored.as_of_ids, restored.entries) == (
+        state.cash, state.positions, state.as_of, state.as_of_ids, state.entries
+    )
+
+
+def test_rebuild_resumes_after_snapshot_without_double_counting(mock_database, monkeypatch):
+    monkeypatch.setattr(ledger, "SNAPSHOT_EVERY", 10)
+    rows = [row for row in random_rows(6) if row["user_id"] == "u1"]
+    # Stop in the middle of a group of entries sharing one timestamp
+    cut = next(i for i in range(20, len(rows)) if rows[i]["created_at"] == rows[i - 1]["created_at"])
+    mock_db.mock_transactions[:] = rows[:cut]
+
+    first = ledger.rebuild("u1")
+    assert mock_db.mock_ledger_snapshots["u1"]["transaction_count"] == cut
+
+    mock_db.mock_transactions[:] = rows
+    state = ledger.rebuild("u1")
+
+    assert state.entries == len(rows)
+    assert first.as_of <= state.as_of
+    assert_states_match({"u1": state}, *sequential(rows))
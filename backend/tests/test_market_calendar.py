@@ -0,0 +1,57 @@
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from market_calendar import EXCHANGES, SETTLE_PERIOD, MarketCalendar
+
+calendar = MarketCalendar()
+NEW_YORK = ZoneInfo("America/New_York")
+TORONTO = ZoneInfo("America/Toronto")
+
+
+@pytest.mark.parametrize("code, day", [
+    ("TSX", date(2022, 1, 3)),     # New Year's Day on a Saturday
+    ("TSX", date(2024, 2, 19)),    # Family Day
+    ("TSX", date(2024, 5, 20)),    # Victoria Day
+    ("TSX", date(2023, 7, 3)),     # Canada Day on a Saturday
+    ("TSX", date(2024, 8, 5)),     # Civic Holiday
+    ("TSX", date(2024, 10, 14)),   # Thanksgiving
+    ("TSX", date(2021, 12, 28)),   # Boxing Day after a weekend Christmas
+    ("NSE", date(2024, 1, 26)),    # Republic Day
+    ("NSE", date(2024, 8, 15)),    # Independence Day
+    ("US", date(2026, 7, 3)),      # Independence Day on a Saturday
+])
+def test_holidays(code, day):
+    assert not EXCHANGES[code].is_trading_day(day)
+
+
+@pytest.mark.parametrize("code, day, close", [
+    ("US", date(2024, 11, 29), time(13, 0)),   # Day after Thanksgiving
+    ("US", date(2024, 12, 24), time(13, 0)),
+    ("US", date(2024, 7, 3), time(13, 0)),
+    ("LSE", date(2024, 12, 24), time(12, 30)),
+    ("LSE", date(2024, 12, 31), time(12, 30)),
+    ("TSX", date(2024, 12, 24), time(13, 0)),
+    ("US", date(2024, 11, 27), time(16, 0)),
+    ("TSX", date(2024, 11, 29), time(16, 0)),
+])
+def test_session_close(code, day, close):
+    assert EXCHANGES[code].session(day)[1].time() == close
+
+
+def test_half_day_closes_the_market_and_holds_caches_until_next_open():
+    assert calendar.is_open("AAPL", datetime(2024, 11, 29, 12, 30, tzinfo=NEW_YORK))
+    after = datetime(2024, 11, 29, 13, 0, tzinfo=NEW_YORK) + SETTLE_PERIOD
+    assert not calendar.is_open("AAPL", after)
+
+    next_open = datetime(2024, 12, 2, 9, 30, tzinfo=NEW_YORK)
+    assert calendar.next_open("AAPL", after) == next_open
+    assert calendar.cache_ttl("AAPL", 60, after) == (next_open - after).total_seconds()
+    assert calendar.last_close("AAPL", after).time() == time(13, 0)
+
+
+def test_tsx_symbols_skip_canadian_holidays():
+    before = datetime(2024, 5, 17, 17, 0, tzinfo=TORONTO)
+    assert calendar.next_open("SHOP.TO", before) == datetime(2024, 5, 21, 9, 30, tzinfo=TORONTO)
+    assert calendar.next_open("AAPL", before) == datetime(2024, 5, 20, 9, 30, tzinfo=NEW_YORK)
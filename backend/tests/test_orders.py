@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+import mock_db
+from orders import OrderEngine
+from trades import TradeError
+
+
+def crosses(order, price):
+    """Reference rule from the OrderBook.crossing docstring."""
+    if order.order_type == "limit":
+        return price <= order.price if order.side == "buy" else price >= order.price
+    return price >= order.price if order.side == "buy" else price <= order.price
+
+
+def recording_engine():
+    fills = []
+
+    def executor(user_id, symbol, quantity, price, side):
+        fills.append((user_id, symbol, quantity, price, side))
+        return {"symbol": symbol}, 0.0
+
+    return OrderEngine(executor=executor), fills
+
+
+def test_match_fills_exactly_the_crossed_orders():
+    rng = random.Random(3)
+    engine, _ = recording_engine()
+    orders = [
+        engine.place("u1", rng.choice(["AAA", "BBB"]), rng.choice(["buy", "sell"]),
+                     rng.choice(["limit", "stop"]), 1, rng.randint(90, 110))
+        for _ in range(400)
+    ]
+    cancelled = set(rng.sample([order.id for order in orders], 50))
+    for order_id in cancelled:
+        engine.cancel("u1", order_id)
+
+    for _ in range(30):
+        prices = {"AAA": rng.randint(85, 115), "BBB": rng.randint(85, 115)}
+        expected = {
+            order.id for order in orders
+            if order.status == "open" and crosses(order, prices[order.symbol])
+        }
+        filled = engine.match(prices)
+        assert {order.id for order in filled} == expected
+        assert all(order.status == "filled" for order in filled)
+
+    for order in orders:
+        if order.id in cancelled:
+            assert order.status == "cancelled"
+        assert order.status != "open" or order.id in {o.id for o in engine.orders_for("u1", "open")}
+
+
+def test_orders_at_the_same_price_fill_first_in_first_out():
+    engine, fills = recording_engine()
+    first = engine.place("first", "AAA", "buy", "limit", 1, 100)
+    second = engine.place("second", "AAA", "buy", "limit", 1, 100)
+    better = engine.place("better", "AAA", "buy", "limit", 1, 101)
+
+    assert engine.match({"AAA": 100}) == [better, first, second]
+    assert [fill[0] for fill in fills] == ["better", "first", "second"]
+
+
+def test_only_symbols_with_open_orders_are_polled():
+    engine, _ = recording_engine()
+    order = engine.place("u1", "AAA", "sell", "stop", 1, 90)
+    engine.place("u1", "BBB", "buy", "limit", 1, 50)
+    engine.cancel("u1", order.id)
+    assert engine.open_symbols() == ["BBB"]
+
+
+def test_rejected_fill_closes_the_order():
+    def executor(*args):
+        raise TradeError("Insufficient funds for this purchase")
+
+    engine = OrderEngine(executor=executor)
+    order = engine.place("u1", "AAA", "buy", "limit", 1, 100)
+
+    engine.match({"AAA": 99})
+
+    assert order.status == "rejected"
+    assert order.reason == "Insufficient funds for this purchase"
+    assert engine.open_symbols() == []
+
+
+def test_failed_fill_stays_open_and_is_retried():
+    calls = []
+
+    def executor(user_id, symbol, quantity, price, side):
+        calls.append(price)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return {"symbol": symbol}, 0.0
+
+    engine = OrderEngine(executor=executor)
+    order = engine.place("u1", "AAA", "buy", "limit", 1, 100)
+
+    engine.match({"AAA": 99})
+    assert order.status == "open"
+    engine.match({"AAA": 98})
+    assert order.status == "filled"
+    assert order.fill_price == 98
+    assert calls == [99, 98]
+
+
+def test_default_executor_does_not_fall_back_to_mock_database(supabase):
+    supabase({"users": [{"id": "user123", "cash_balance": 1000.0}]}, fail_on={("portfolios", "select")})
+    balance = mock_db.get_user_balance("user123")
+    transactions = len(mock_db.mock_transactions)
+    engine = OrderEngine()
+    order = engine.place("user123", "AAPL", "buy", "limit", 1, 100)
+
+    engine.match({"AAPL": 99})
+
+    assert order.status == "open"
+    assert mock_db.get_user_balance("user123") == balance
+    assert len(mock_db.mock_transactions) == transactions
+
+
+def test_default_executor_rejects_overdraft_on_mock_database(mock_database):
+    engine = OrderEngine()
+    order = engine.place("user123", "AAPL", "buy", "limit", 10**6, 100)
+
+    engine.match({"AAPL": 99})
+
+    assert order.status == "rejected"
+    assert order.reason == "Insufficient funds for this purchase"
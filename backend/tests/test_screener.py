@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+import screener
+from bar_store import Bars
+
+END = np.datetime64("2024-06-28")
+
+
+def daily_bars(symbol, days, end=END, start_price=100.0, source="live"):
+    dates = np.arange(end - np.timedelta64(days * 2, "D"), end + np.timedelta64(1, "D"))
+    dates = dates[np.is_busday(dates)][-days:]
+    close = start_price * 1.001 ** np.arange(len(dates))
+    return Bars(symbol, dates, close, close, close, close, np.full(len(dates), 1e6), source)
+
+
+class FakeStore:
+    """Cache holding short series; get_many serves a year and counts calls."""
+    def __init__(self, cached, upstream):
+        self.cached = cached
+        self.upstream = upstream
+        self.calls = []
+
+    def cached_daily(self):
+        return dict(self.cached)
+
+    def get_many(self, symbols, period="1mo", allow_mock=False, store=True):
+        self.calls.append((list(symbols), period, allow_mock, store))
+        return {symbol: self.upstream.get(symbol) for symbol in symbols}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.delenv("SCREENER_UNIVERSE", raising=False)
+    return FakeStore(
+        cached={"AAA": daily_bars("AAA", 21), "BBB": daily_bars("BBB", 21)},
+        upstream={"AAA": daily_bars("AAA", 252, END - np.timedelta64(3, "D"))},
+    )
+
+
+def test_cached_month_leaves_long_windows_empty(store):
+    table = screener.Screener(store=store).rebuild()
+    _, rows = table.screen([], limit=10)
+    assert {row["symbol"] for row in rows} == {"AAA", "BBB"}
+    assert all(row["return_3m"] is None and row["volatility"] is None for row in rows)
+
+
+def test_loaded_year_fills_long_windows_and_keeps_newest_cached_days(store):
+    runner = screener.Screener(store=store, history_max_age=3600)
+
+    assert runner.load_history() == 1
+    assert store.calls == [(["AAA", "BBB"], "1y", False, False)]
+
+    _, rows = runner.table.screen([("return_3m", ">", -100)], limit=10)
+    assert [row["symbol"] for row in rows] == ["AAA"]
+    assert rows[0]["volatility"] is not None
+    # The price comes from the cached series, which is three days newer
+    assert rows[0]["price"] == pytest.approx(float(store.cached["AAA"].close[-1]), abs=1e-4)
+
+
+def test_loaded_symbols_are_not_fetched_again_until_stale(store):
+    runner = screener.Screener(store=store, history_max_age=3600)
+    runner.load_history()
+    assert runner.due_symbols() == []
+
+    runner.history_max_age = 0
+    assert runner.due_symbols() == ["AAA", "BBB"]
+
+
+def test_configured_universe_limits_loading_and_screening(store, monkeypatch):
+    monkeypatch.setenv("SCREENER_UNIVERSE", "aaa,CCC")
+    runner = screener.Screener(store=store, history_max_age=3600)
+
+    runner.load_history()
+
+    assert store.calls[0][0] == ["AAA", "CCC"]
+    assert list(runner.table.symbols) == ["AAA"]
+
+
+def test_queries_never_fetch_and_load_in_the_background(store):
+    runner = screener.Screener(store=store, max_age=0, history_max_age=3600)
+
+    runner.current()
+    runner._loader.join(5)
+
+    assert len(store.calls) == 1
+    table = runner.current()
+    assert len(store.calls) == 1
+    assert table.screen([("return_3m", ">", -100)])[0] == 1
+
+
+def test_synthetic_history_is_never_screened(store):
+    store.upstream["BBB"] = daily_bars("BBB", 252, source="mock")
+    runner = screener.Screener(store=store, history_max_age=3600)
+
+    assert runner.load_history() == 1
+    assert "BBB" not in runner.history
+
+
+def test_splice_appends_only_newer_days():
+    history = daily_bars("AAA", 252, END - np.timedelta64(7, "D"))
+    recent = daily_bars("AAA", 21)
+
+    spliced = screener.splice(history, recent)
+
+    assert spliced.dates[-1] == recent.dates[-1]
+    assert len(np.unique(spliced.dates)) == len(spliced)
+    assert np.all(np.diff(spliced.dates.astype(np.int64)) > 0)
+    assert screener.splice(None, recent) is recent
+    assert screener.splice(history, None) is history
@@ -0,0 +1,143 @@
+import pytest
+
+import mock_db
+import trades
+from trades import TradeError, execute_batch, execute_trade, plan_batch
+
+
+def test_sell_in_batch_funds_buy():
+    holdings = {"AAPL": (10, 50.0)}
+    # Buying MSFT alone would overdraw the 100 in cash
+    legs = [("MSFT", 5, 100.0, "buy"), ("AAPL", 10, 60.0, "sell")]
+
+    balance, positions = plan_batch(100.0, holdings, legs)
+
+    assert balance == pytest.approx(200.0)
+    assert positions == {"MSFT": (5, 100.0), "AAPL": (0, 50.0)}
+
+
+def test_selling_more_than_held_is_rejected():
+    with pytest.raises(TradeError, match="Not enough shares to sell: AAPL"):
+        plan_batch(1000.0, {"AAPL": (3, 50.0)}, [("AAPL", 2, 60.0, "sell"), ("AAPL", 2, 60.0, "sell")])
+
+
+def test_short_that_a_later_buy_covers_is_rejected_only_when_final_position_is_negative():
+    balance, positions = plan_batch(1000.0, {}, [("AAPL", 2, 60.0, "sell"), ("AAPL", 2, 60.0, "buy")])
+    assert positions["AAPL"][0] == 0
+    assert balance == pytest.approx(1000.0)
+
+
+def test_overdraft_is_rejected():
+    with pytest.raises(TradeError, match="Insufficient funds"):
+        plan_batch(100.0, {}, [("AAPL", 1, 60.0, "buy"), ("MSFT", 1, 60.0, "buy")])
+
+
+def test_average_price_after_buy_following_partial_sell():
+    _, positions = plan_batch(1000.0, {"AAPL": (10, 50.0)}, [("AAPL", 5, 70.0, "sell"), ("AAPL", 5, 80.0, "buy")])
+    # The sell leaves 5 shares at 50; the buy averages them with 5 at 80
+    assert positions["AAPL"] == (10, pytest.approx(65.0))
+
+
+def test_average_price_after_buy_following_full_sell():
+    _, positions = plan_batch(1000.0, {"AAPL": (10, 50.0)}, [("AAPL", 10, 70.0, "sell"), ("AAPL", 4, 80.0, "buy")])
+    assert positions["AAPL"] == (4, pytest.approx(80.0))
+
+
+def test_mock_batch_applies_all_legs(mock_database):
+    balance = mock_db.get_user_balance("user123")
+    transactions, new_balance = execute_batch("user123", [("AAPL", 10, 200.0, "sell"), ("NVDA", 1, 500.0, "buy")])
+
+    assert len(transactions) == 2
+    assert new_balance == pytest.approx(balance + 1500.0)
+    assert mock_db.get_user_balance("user123") == pytest.approx(new_balance)
+    symbols = {row["symbol"]: row["quantity"] for row in mock_db.get_user_portfolio("user123")}
+    assert "AAPL" not in symbols
+    assert symbols["NVDA"] == 1
+
+
+def test_rejected_mock_batch_writes_nothing(mock_database):
+    balance = mock_db.get_user_balance("user123")
+    transactions = len(mock_db.mock_transactions)
+
+    with pytest.raises(TradeError):
+        execute_batch("user123", [("NVDA", 1, 500.0, "buy"), ("AAPL", 11, 200.0, "sell")])
+
+    assert mock_db.get_user_balance("user123") == balance
+    assert len(mock_db.mock_transactions) == transactions
+
+
+def _tables():
+    return {
+        "users": [{"id": "u1", "cash_balance": 1000.0}],
+        "portfolios": [{"id": "p1", "user_id": "u1", "symbol": "AAPL", "quantity": 10, "avg_price": 50.0}],
+        "transactions": [],
+    }
+
+
+def test_supabase_batch_writes_positions_balance_and_transactions(supabase):
+    client = supabase(_tables())
+
+    transactions, new_balance = execute_batch("u1", [("AAPL", 10, 60.0, "sell"), ("MSFT", 2, 100.0, "buy")])
+
+    assert new_balance == pytest.approx(1400.0)
+    assert len(transactions) == 2 == len(client.tables["transactions"])
+    assert client.tables["users"][0]["cash_balance"] == pytest.approx(1400.0)
+    assert [(row["symbol"], row["quantity"]) for row in client.tables["portfolios"]] == [("MSFT", 2)]
+
+
+def test_failed_transactions_insert_rolls_back_portfolios_and_balance(supabase):
+    client = supabase(_tables(), fail_on={("transactions", "insert")})
+    balance_before = mock_db.get_user_balance("u1")
+
+    with pytest.raises(RuntimeError):
+        execute_batch("u1", [("AAPL", 4, 60.0, "sell"), ("MSFT", 2, 100.0, "buy")])
+
+    assert client.tables["users"][0]["cash_balance"] == 1000.0
+    assert [(row["symbol"], row["quantity"], row["avg_price"]) for row in client.tables["portfolios"]] == [
+        ("AAPL", 10, 50.0)
+    ]
+    assert client.tables["transactions"] == []
+    # Nothing falls back to the mock database
+    assert mock_db.get_user_balance("u1") == balance_before
+
+
+def test_supabase_batch_validation_writes_nothing(supabase):
+    client = supabase(_tables())
+
+    with pytest.raises(TradeError):
+        execute_batch("u1", [("MSFT", 20, 100.0, "buy")])
+
+    assert client.tables == _tables()
+
+
+def test_trades_reach_leaderboard_hook(mock_database, monkeypatch):
+    seen = []
+    monkeypatch.setattr(trades.leaderboard, "on_trade", lambda *args: seen.append(args))
+    execute_batch("user123", [("NVDA", 1, 500.0, "buy")])
+    assert seen and seen[0][0] == "user123"
+
+
+def test_mock_trade_rejects_overdraft_and_short(mock_database):
+    balance = mock_db.get_user_balance("user123")
+
+    with pytest.raises(TradeError, match="Insufficient funds"):
+        execute_trade("user123", "NVDA", 1, balance + 1, "buy")
+    with pytest.raises(TradeError, match="Not enough shares"):
+        execute_trade("user123", "AAPL", 11, 200.0, "sell")
+    with pytest.raises(TradeError) as missing:
+        execute_trade("nobody", "AAPL", 1, 200.0, "buy")
+
+    assert missing.value.status == 404
+    assert mock_db.get_user_balance("user123") == balance
+
+
+def test_single_trade_falls_back_to_mock_database_unless_disabled(supabase):
+    supabase({"users": [{"id": "user123", "cash_balance": 1000.0}]}, fail_on={("portfolios", "select")})
+    balance = mock_db.get_user_balance("user123")
+
+    with pytest.raises(RuntimeError):
+        execute_trade("user123", "NVDA", 1, 100.0, "buy", allow_fallback=False)
+    assert mock_db.get_user_balance("user123") == balance
+
+    _, new_balance = execute_trade("user123", "NVDA", 1, 100.0, "buy")
+    assert new_balance == pytest.approx(balance - 100.0)
@@ -0,0 +1,44 @@
+import pytest
+
+import mock_db
+import watchlists
+
+HEADERS = {"user-id": "u1"}
+
+
+def stored(symbols=("AAPL",)):
+    return {"watchlists": [{"id": "w1", "user_id": "u1", "name": "Tech", "symbols": list(symbols),
+                            "created_at": "2024-01-01T00:00:00"}]}
+
+
+def test_reads_fall_back_to_mock_database(supabase):
+    supabase(stored(), fail_on={("watchlists", "select")})
+    mock_db.create_watchlist({"user_id": "u1", "name": "Mock", "symbols": ["MSFT"]})
+
+    assert [w["name"] for w in watchlists.list_watchlists("u1")] == ["Mock"]
+
+
+@pytest.mark.parametrize("method, path, body, action", [
+    ("post", "/api/user/watchlists", {"name": "New", "symbols": ["NVDA"]}, "insert"),
+    ("patch", "/api/user/watchlists/w1", {"symbols": ["NVDA"]}, "update"),
+    ("delete", "/api/user/watchlists/w1", None, "delete"),
+])
+def test_failed_writes_return_500_and_leave_mock_database_alone(client, supabase, method, path, body, action):
+    fake = supabase(stored(), fail_on={("watchlists", action)})
+    before = [dict(watchlist) for watchlist in mock_db.mock_watchlists]
+
+    response = getattr(client, method)(path, json=body, headers=HEADERS)
+
+    assert response.status_code == 500
+    assert fake.tables == stored()
+    assert mock_db.mock_watchlists == before
+
+
+def test_writes_reach_supabase(client, supabase):
+    fake = supabase(stored())
+
+    response = client.patch("/api/user/watchlists/w1", json={"symbols": ["msft", "MSFT"]}, headers=HEADERS)
+
+    assert response.status_code == 200
+    assert fake.tables["watchlists"][0]["symbols"] == ["MSFT"]
+    assert client.delete("/api/user/watchlists/missing", headers=HEADERS).status_code == 404
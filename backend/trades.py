@@ -0,0 +1,355 @@
+"""
+Trade execution against the user's portfolio and cash balance.
+Every fill, whether a market trade posted by the client or a resting order
+filled by the order engine, goes through execute_trade so portfolio rows,
+average prices and balances are updated the same way. execute_batch applies
+many trades as one unit: all legs are validated with cash and shares netted
+across the batch, then written with one request per table.
+"""
+import logging
+
+import mock_db
+import write_behind
+from database import database
+from leaderboard import leaderboard
+
+logger = logging.getLogger(__name__)
+
+# Most trades accepted in one batch
+MAX_BATCH_LEGS = 100
+
+
+class TradeError(Exception):
+    """A trade rejected for a reason the client should see (e.g. insufficient funds)."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def execute_trade(user_id, symbol, quantity, price, trade_type, allow_fallback=True):
+    """
+    Record a trade and apply it to the user's portfolio and balance.
+
+    Args:
+        user_id: The user making the trade
+        symbol: The stock symbol
+        quantity: Number of shares (positive)
+        price: Price per share
+        trade_type: 'buy' or 'sell'
+        allow_fallback: Apply the trade to the mock database when Supabase
+            fails; callers that retry (the order engine) pass False
+
+    Returns:
+        (transaction, new_balance)
+
+    Raises:
+        TradeError: If the user is missing or lacks the funds or shares
+        Exception: If Supabase fails and allow_fallback is False, or both
+            Supabase and the mock database fail
+    """
+    # If using mock database, use the mock implementation
+    if database.using_mock:
+        result = _execute_mock(user_id, symbol, quantity, price, trade_type)
+    else:
+        try:
+            result = _execute_supabase(database.client, user_id, symbol, quantity, price, trade_type)
+        except TradeError:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating transaction for user {user_id}: {str(e)}")
+            if not allow_fallback:
+                raise
+            # Try to fall back to mock database if Supabase fails
+            logger.warning(f"Falling back to mock database for transaction")
+            result = _execute_mock(user_id, symbol, quantity, price, trade_type)
+
+    _record_trades(user_id, [(symbol, quantity, price, trade_type)], result[1])
+    return result
+
+
+def _execute_mock(user_id, symbol, quantity, price, trade_type):
+    # Same funds and shares checks as a batch of one leg
+    balance = mock_db.get_user_balance(user_id)
+    if balance is None:
+        raise TradeError("User not found", 404)
+    holdings = {
+        row['symbol']: (row['quantity'], row['avg_price'])
+        for row in mock_db.get_user_portfolio(user_id) if row['symbol'] == symbol
+    }
+    try:
+        plan_batch(balance, holdings, [(symbol, quantity, price, trade_type)])
+    except TradeError:
+        logger.warning(f"Rejected {trade_type} of {quantity} {symbol} for user {user_id}")
+        raise TradeError("Insufficient funds for this purchase" if trade_type == 'buy' else "Not enough shares to sell")
+
+    return mock_db.create_transaction(
+        user_id=user_id,
+        symbol=symbol,
+        quantity=quantity,
+        price=price,
+        trade_type=trade_type
+    )
+
+
+def _execute_supabase(client, user_id, symbol, quantity, price, trade_type):
+    transaction_data = {
+        'user_id': user_id,
+        'symbol': symbol,
+        'quantity': quantity,
+        'price': price,
+        'type': trade_type,
+        'total': price * quantity
+    }
+
+    # Start by checking user exists and has sufficient funds for buy orders
+    user = client.table('users').select('cash_balance').eq('id', user_id).execute()
+
+    if len(user.data) == 0:
+        logger.error(f"User {user_id} not found in database")
+        raise TradeError("User not found", 404)
+
+    current_balance = user.data[0]['cash_balance']
+
+    # For buy orders, check if user has enough funds
+    if trade_type == 'buy':
+        total_cost = price * quantity
+        if total_cost > current_balance:
+            logger.warning(f"Insufficient funds for user {user_id}: has ${current_balance}, needs ${total_cost}")
+            raise TradeError("Insufficient funds for this purchase")
+
+    # Get current portfolio
+    portfolio = client.table('portfolios').select('*').eq('user_id', user_id).eq('symbol', symbol).execute()
+
+    # For sell orders, check if user has enough shares
+    if trade_type == 'sell':
+        if len(portfolio.data) == 0 or portfolio.data[0]['quantity'] < quantity:
+            logger.warning(f"Insufficient shares for user {user_id} to sell {quantity} of {symbol}")
+            raise TradeError("Not enough shares to sell")
+
+    # Create the transaction record
+    transactions = _insert_transactions(client, [transaction_data])
+
+    if trade_type == 'buy':
+        if len(portfolio.data) == 0:
+            # Create new portfolio entry
+            portfolio_data = {
+                'user_id': user_id,
+                'symbol': symbol,
+                'quantity': quantity,
+                'avg_price': price
+            }
+            logger.info(f"Creating new portfolio entry for user {user_id}: {quantity} shares of {symbol}")
+            client.table('portfolios').insert(portfolio_data).execute()
+        else:
+            # Update existing portfolio
+            current = portfolio.data[0]
+            new_quantity = current['quantity'] + quantity
+            new_avg_price = ((current['quantity'] * current['avg_price']) + (quantity * price)) / new_quantity
+            logger.info(f"Updating portfolio for user {user_id}: {symbol} from {current['quantity']} to {new_quantity} shares")
+
+            client.table('portfolios').update({
+                'quantity': new_quantity,
+                'avg_price': new_avg_price
+            }).eq('id', current['id']).execute()
+
+    elif trade_type == 'sell':
+        current = portfolio.data[0]
+        new_quantity = current['quantity'] - quantity
+        logger.info(f"Selling shares for user {user_id}: {symbol} from {current['quantity']} to {new_quantity} shares")
+
+        if new_quantity == 0:
+            # Remove from portfolio if all shares sold
+            client.table('portfolios').delete().eq('id', current['id']).execute()
+            logger.info(f"Removed {symbol} from user {user_id}'s portfolio (all shares sold)")
+        else:
+            # Update quantity (avg_price stays the same when selling)
+            client.table('portfolios').update({
+                'quantity': new_quantity
+            }).eq('id', current['id']).execute()
+
+    # Update user's cash balance
+    cash_change = -price * quantity if trade_type == 'buy' else price * quantity
+    new_balance = current_balance + cash_change
+    logger.info(f"Updating user {user_id}'s balance from ${current_balance} to ${new_balance}")
+
+    client.table('users').update({
+        'cash_balance': new_balance
+    }).eq('id', user_id).execute()
+
+    return transactions, new_balance
+
+
+def plan_batch(balance, holdings, legs):
+    """
+    Validate a batch of trades and work out the resulting positions.
+
+    Legs are applied in order for average prices, but funds and shares are
+    only checked on the final result, so sells in the batch can pay for buys
+    in the same batch.
+
+    Args:
+        balance: Current cash balance
+        holdings: Dict of symbol to (quantity, avg_price) for current positions
+        legs: List of (symbol, quantity, price, trade_type)
+
+    Returns:
+        (new_balance, positions): positions maps every traded symbol to its
+        final (quantity, avg_price); a quantity of 0 means the position is closed
+
+    Raises:
+        TradeError: If the batch sells more shares than held or costs more than the balance
+    """
+    positions = {}
+    cash = balance
+    for symbol, quantity, price, trade_type in legs:
+        held, avg_price = positions.get(symbol) or holdings.get(symbol, (0, 0.0))
+        if trade_type == 'buy':
+            # Average price of the shares held once the buy completes
+            base = max(held, 0)
+            avg_price = ((base * avg_price) + (quantity * price)) / (base + quantity)
+            held += quantity
+            cash -= price * quantity
+        else:
+            held -= quantity
+            cash += price * quantity
+        positions[symbol] = (held, avg_price)
+
+    short = [symbol for symbol, (held, _) in positions.items() if held < 0]
+    if short:
+        raise TradeError(f"Not enough shares to sell: {', '.join(short)}")
+    if cash < 0:
+        raise TradeError("Insufficient funds for this batch")
+    return cash, positions
+
+
+def execute_batch(user_id, legs):
+    """
+    Apply several trades as one unit.
+
+    Args:
+        user_id: The user making the trades
+        legs: List of (symbol, quantity, price, trade_type), already validated
+
+    Returns:
+        (transactions, new_balance)
+
+    Raises:
+        TradeError: If the user is missing or the batch fails validation;
+            nothing is written in that case
+        Exception: If the Supabase batch fails; its writes are rolled back and,
+            unlike single trades, it does not fall back to the mock database
+    """
+    if database.using_mock:
+        result = _execute_batch_mock(user_id, legs)
+    else:
+        try:
+            result = _execute_batch_supabase(database.client, user_id, legs)
+        except TradeError:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating transaction batch for user {user_id}: {str(e)}")
+            raise
+
+    _record_trades(user_id, legs, result[1])
+    return result
+
+
+def _record_trades(user_id, legs, new_balance):
+    """Pass executed trades on to the leaderboard; never fails the trade."""
+    if new_balance is None:
+        return
+    try:
+        leaderboard.on_trade(user_id, legs, new_balance)
+    except Exception as e:
+        logger.error(f"Error updating leaderboard for user {user_id}: {str(e)}")
+
+
+def _execute_batch_mock(user_id, legs):
+    balance = mock_db.get_user_balance(user_id)
+    if balance is None:
+        raise TradeError("User not found", 404)
+    holdings = {row['symbol']: (row['quantity'], row['avg_price']) for row in mock_db.get_user_portfolio(user_id)}
+    new_balance, positions = plan_batch(balance, holdings, legs)
+    return mock_db.apply_trades(user_id, legs, positions, new_balance), new_balance
+
+
+def _execute_batch_supabase(client, user_id, legs):
+    user = client.table('users').select('cash_balance').eq('id', user_id).execute()
+    if len(user.data) == 0:
+        logger.error(f"User {user_id} not found in database")
+        raise TradeError("User not found", 404)
+    balance = user.data[0]['cash_balance']
+
+    symbols = sorted({leg[0] for leg in legs})
+    existing = client.table('portfolios').select('*').eq('user_id', user_id).in_('symbol', symbols).execute().data
+    holdings = {row['symbol']: (row['quantity'], row['avg_price']) for row in existing}
+    new_balance, positions = plan_batch(balance, holdings, legs)
+
+    try:
+        # One upsert for open positions (needs a unique (user_id, symbol) constraint)
+        # and one delete for positions the batch closed
+        open_rows = [
+            {'user_id': user_id, 'symbol': symbol, 'quantity': quantity, 'avg_price': avg_price}
+            for symbol, (quantity, avg_price) in positions.items() if quantity > 0
+        ]
+        if open_rows:
+            client.table('portfolios').upsert(open_rows, on_conflict='user_id,symbol').execute()
+        closed = [symbol for symbol, (quantity, _) in positions.items() if quantity == 0 and symbol in holdings]
+        if closed:
+            client.table('portfolios').delete().eq('user_id', user_id).in_('symbol', closed).execute()
+
+        client.table('users').update({'cash_balance': new_balance}).eq('id', user_id).execute()
+
+        # One multi-row insert for every leg, written last so a failure never
+        # leaves transaction records for holdings that were rolled back
+        transactions = _insert_transactions(client, [
+            {
+                'user_id': user_id,
+                'symbol': symbol,
+                'quantity': quantity,
+                'price': price,
+                'type': trade_type,
+                'total': price * quantity
+            }
+            for symbol, quantity, price, trade_type in legs
+        ])
+    except Exception:
+        _roll_back_batch(client, user_id, existing, positions, balance)
+        raise
+
+    logger.info(f"Applied {len(legs)} trades for user {user_id}; balance ${balance} -> ${new_balance}")
+    return transactions, new_balance
+
+
+def _roll_back_batch(client, user_id, existing, positions, balance):
+    """Undo a partially written batch (PostgREST has no multi-request transactions)."""
+    logger.warning(f"Rolling back partially applied transaction batch for user {user_id}")
+    try:
+        if existing:
+            client.table('portfolios').upsert([
+                {'user_id': user_id, 'symbol': row['symbol'], 'quantity': row['quantity'], 'avg_price': row['avg_price']}
+                for row in existing
+            ], on_conflict='user_id,symbol').execute()
+        opened = [symbol for symbol in positions if symbol not in {row['symbol'] for row in existing}]
+        if opened:
+            client.table('portfolios').delete().eq('user_id', user_id).in_('symbol', opened).execute()
+        client.table('users').update({'cash_balance': balance}).eq('id', user_id).execute()
+    except Exception as e:
+        logger.error(f"Error rolling back transaction batch for user {user_id}: {str(e)}")
+
+
+def _insert_transactions(client, rows):
+    """
+    Insert transaction rows, or journal them for a later batched insert when
+    write-behind is enabled.
+
+    Returns:
+        The stored rows
+    """
+    journal = write_behind.get_journal()
+    if journal is None:
+        return client.table('transactions').insert(rows).execute().data
+    rows = write_behind.stamp(rows)
+    journal.append(rows)
+    return rows
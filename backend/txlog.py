@@ -0,0 +1,292 @@
+"""
+Columnar in-memory transaction log.
+Holds transactions as parallel NumPy arrays instead of one dict per row: user
+and symbol are int32 codes into interning tables, quantity and price are
+float64, the side is one byte and the timestamp is datetime64[ms]. That is
+33 bytes per row. Aggregations (per user, per symbol, per time bucket,
+realized P&L) are bincounts and reductions over these arrays.
+
+Logs load from transaction dicts (the mock database or a Supabase query), a
+Supabase CSV export or a SQLite table with the same columns.
+"""
+import csv
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import ledger
+
+# Time bucket sizes for activity()
+BUCKETS = {
+    "hour": "datetime64[h]",
+    "day": "datetime64[D]",
+    "week": "datetime64[W]",
+    "month": "datetime64[M]",
+    "year": "datetime64[Y]",
+}
+
+# Columns read from exports
+COLUMNS = ("user_id", "symbol", "quantity", "price", "type", "created_at")
+
+
+class StringTable:
+    """
+    Interns strings as consecutive int codes.
+    """
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        """Return the code for a string, adding it if new."""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values):
+        """Return an int32 array of codes for a sequence of strings."""
+        code = self.code
+        return np.fromiter((code(value) for value in values), dtype=np.int32, count=len(values))
+
+    def lookup(self, value):
+        """Return the code for a string, or None if it was never interned."""
+        return self._codes.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+def parse_timestamps(values):
+    """Parse ISO 8601 strings (with or without an offset) into naive UTC datetime64[ms]."""
+    if not len(values):
+        return np.array([], dtype="datetime64[ms]")
+    series = pd.Series(values)
+    try:
+        parsed = pd.to_datetime(series, utc=True, format="ISO8601")
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(series, utc=True)
+    return parsed.dt.tz_localize(None).to_numpy().astype("datetime64[ms]")
+
+
+class TransactionLog:
+    """
+    Transactions as columns, sorted by time.
+    """
+    def __init__(self, users, symbols, user, symbol, quantity, price, is_buy, timestamp):
+        """
+        Initialize the log.
+
+        Args:
+            users: StringTable of user ids
+            symbols: StringTable of symbols
+            user: int32 user codes
+            symbol: int32 symbol codes
+            quantity: Shares per transaction
+            price: Price per share
+            is_buy: bool array, False for sells
+            timestamp: datetime64[ms] transaction times
+        """
+        order = np.argsort(timestamp, kind="stable")
+        self.users = users
+        self.symbols = symbols
+        self.user = np.asarray(user, dtype=np.int32)[order]
+        self.symbol = np.asarray(symbol, dtype=np.int32)[order]
+        self.quantity = np.asarray(quantity, dtype=np.float64)[order]
+        self.price = np.asarray(price, dtype=np.float64)[order]
+        self.is_buy = np.asarray(is_buy, dtype=bool)[order]
+        self.timestamp = np.asarray(timestamp, dtype="datetime64[ms]")[order]
+
+    @classmethod
+    def from_columns(cls, user_ids, symbols, quantities, prices, types, created_at):
+        """Build a log from per-column sequences of raw values."""
+        user_table, symbol_table = StringTable(), StringTable()
+        return cls(
+            user_table,
+            symbol_table,
+            user_table.encode([str(value) for value in user_ids]),
+            symbol_table.encode([str(value).upper() for value in symbols]),
+            np.asarray(quantities, dtype=np.float64),
+            np.asarray(prices, dtype=np.float64),
+            np.asarray([value == "buy" for value in types], dtype=bool),
+            parse_timestamps(list(created_at)),
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a log from transaction dicts (e.g. mock_db.mock_transactions)."""
+        return cls.from_columns(*([row[column] for row in rows] for column in COLUMNS))
+
+    @classmethod
+    def from_csv(cls, path):
+        """Build a log from a CSV export of the transactions table."""
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        return cls.from_columns(*(
+            [row[column] for row in rows] if column not in ("quantity", "price")
+            else [float(row[column]) for row in rows]
+            for column in COLUMNS
+        ))
+
+    @classmethod
+    def from_sqlite(cls, path, table="transactions"):
+        """Build a log from a SQLite table with the transactions columns."""
+        connection = sqlite3.connect(path)
+        try:
+            rows = connection.execute(f"SELECT {', '.join(COLUMNS)} FROM {table}").fetchall()
+        finally:
+            connection.close()
+        return cls.from_columns(*(zip(*rows) if rows else ([],) * len(COLUMNS)))
+
+    @classmethod
+    def from_database(cls, user_id=None):
+        """Build a log from Supabase (or the mock database), optionally for one user."""
+        return cls.from_rows(ledger.load_transactions(user_id))
+
+    def __len__(self):
+        return len(self.user)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the column arrays."""
+        return sum(column.nbytes for column in (
+            self.user, self.symbol, self.quantity, self.price, self.is_buy, self.timestamp
+        ))
+
+    @property
+    def notional(self):
+        return self.quantity * self.price
+
+    def mask(self, user_id=None, symbol=None, start=None, end=None):
+        """
+        Select rows by user, symbol and time range.
+
+        Args:
+            user_id: Only this user's rows
+            symbol: Only this symbol's rows
+            start: Only rows at or after this time (anything np.datetime64 accepts)
+            end: Only rows before this time
+
+        Returns:
+            Boolean array
+        """
+        selected = np.ones(len(self), dtype=bool)
+        if user_id is not None:
+            code = self.users.lookup(str(user_id))
+            selected &= self.user == (-1 if code is None else code)
+        if symbol is not None:
+            code = self.symbols.lookup(str(symbol).upper())
+            selected &= self.symbol == (-1 if code is None else code)
+        if start is not None:
+            selected &= self.timestamp >= np.datetime64(start, "ms")
+        if end is not None:
+            selected &= self.timestamp < np.datetime64(end, "ms")
+        return selected
+
+    def group_by(self, by="symbol", where=None):
+        """
+        Trade count, shares and notional per user or per symbol.
+
+        Args:
+            by: 'symbol' or 'user'
+            where: Optional boolean row mask (see mask())
+
+        Returns:
+            Dict of key to {'trades', 'bought', 'sold', 'buy_notional', 'sell_notional'}
+            for every key with at least one selected row
+        """
+        codes, table = (self.symbol, self.symbols) if by == "symbol" else (self.user, self.users)
+        quantity, notional, is_buy = self.quantity, self.notional, self.is_buy
+        if where is not None:
+            codes, quantity, notional, is_buy = codes[where], quantity[where], notional[where], is_buy[where]
+        codes = codes.astype(np.intp)
+        size = len(table)
+
+        columns = {
+            "trades": np.bincount(codes, minlength=size),
+            "bought": np.bincount(codes, weights=np.where(is_buy, quantity, 0.0), minlength=size),
+            "sold": np.bincount(codes, weights=np.where(is_buy, 0.0, quantity), minlength=size),
+            "buy_notional": np.bincount(codes, weights=np.where(is_buy, notional, 0.0), minlength=size),
+            "sell_notional": np.bincount(codes, weights=np.where(is_buy, 0.0, notional), minlength=size),
+        }
+        present = np.flatnonzero(columns["trades"])
+        values = {name: column[present].tolist() for name, column in columns.items()}
+        return {
+            table.values[code]: {name: values[name][i] for name in columns}
+            for i, code in enumerate(present.tolist())
+        }
+
+    def activity(self, bucket="day", where=None):
+        """
+        Trade count and notional per time bucket.
+
+        Args:
+            bucket: A key of BUCKETS
+            where: Optional boolean row mask
+
+        Returns:
+            Dict with ascending bucket start 'dates' and matching 'trades',
+            'notional' and 'net_cash' (sell minus buy notional) lists
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+        stamps, notional, is_buy = self.timestamp, self.notional, self.is_buy
+        if where is not None:
+            stamps, notional, is_buy = stamps[where], notional[where], is_buy[where]
+        if not len(stamps):
+            return {"dates": [], "trades": [], "notional": [], "net_cash": []}
+
+        # Rows are in time order, so each bucket is one contiguous run
+        stamps = stamps.astype(BUCKETS[bucket])
+        firsts = np.flatnonzero(np.concatenate(([True], stamps[1:] != stamps[:-1])))
+        signed = np.where(is_buy, -notional, notional)
+        return {
+            "dates": np.datetime_as_string(stamps[firsts].astype("datetime64[D]"), unit="D").tolist(),
+            "trades": np.diff(np.append(firsts, len(stamps))).tolist(),
+            "notional": np.round(np.add.reduceat(notional, firsts), 2).tolist(),
+            "net_cash": np.round(np.add.reduceat(signed, firsts), 2).tolist(),
+        }
+
+    def realized_pnl(self, where=None):
+        """
+        Realized profit and loss per (user, symbol) position.
+
+        Uses the average-cost rules of trade execution: what sells realized is
+        sell proceeds minus the cost of the shares sold, and the cost of the
+        shares sold is everything bought minus the cost basis still held.
+
+        Args:
+            where: Optional boolean row mask; select whole positions (all of
+                a user's rows for a symbol) or the result is meaningless
+
+        Returns:
+            Dict of (user_id, symbol) to realized P&L, for positions with sells
+        """
+        selected = np.ones(len(self), dtype=bool) if where is None else where
+        user, symbol = self.user[selected], self.symbol[selected]
+        quantity, price, is_buy = self.quantity[selected], self.price[selected], self.is_buy[selected]
+        n_users, n_symbols = len(self.users), len(self.symbols)
+
+        _, (pos_user, pos_symbol, held, avg_price) = ledger.replay(
+            user, symbol, quantity, price, is_buy, n_users, n_symbols
+        )
+        key = user.astype(np.int64) * n_symbols + symbol
+        keys, index = np.unique(key, return_inverse=True)
+        notional = quantity * price
+        proceeds = np.bincount(index, weights=np.where(is_buy, 0.0, notional), minlength=len(keys))
+        cost = np.bincount(index, weights=np.where(is_buy, notional, 0.0), minlength=len(keys))
+        sold = np.bincount(index, weights=np.where(is_buy, 0.0, quantity), minlength=len(keys))
+
+        remaining = np.zeros(len(keys))
+        remaining[np.searchsorted(keys, pos_user * n_symbols + pos_symbol)] = held * avg_price
+        realized = proceeds - (cost - remaining)
+        closed = np.flatnonzero(sold > 0)
+        users, symbols = self.users.values, self.symbols.values
+        return {
+            (users[k // n_symbols], symbols[k % n_symbols]): value
+            for k, value in zip(keys[closed].tolist(), realized[closed].tolist())
+        }
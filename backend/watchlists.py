@@ -0,0 +1,178 @@
+"""
+Watchlists: named lists of symbols a user follows without owning them.
+Stored in the Supabase `watchlists` table next to portfolios. Reads fall back
+to the mock database when Supabase is unavailable, like portfolios; writes do
+not, since a change stored only in this process would be lost on restart.
+"""
+import logging
+from datetime import datetime
+
+import mock_db
+from database import database
+
+logger = logging.getLogger(__name__)
+
+# Limits per user and per list
+MAX_WATCHLISTS_PER_USER = 20
+MAX_SYMBOLS_PER_WATCHLIST = 50
+MAX_NAME_LENGTH = 100
+
+
+class WatchlistError(Exception):
+    """A watchlist request rejected for a reason the client should see."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def clean_symbols(symbols):
+    """
+    Validate a list of symbols.
+
+    Returns:
+        Upper-cased symbols in their original order, without duplicates
+
+    Raises:
+        WatchlistError: If symbols is not a list of non-empty strings or is too long
+    """
+    if not isinstance(symbols, list) or not all(isinstance(symbol, str) and symbol.strip() for symbol in symbols):
+        raise WatchlistError("symbols must be a list of stock symbols")
+    cleaned = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols))
+    if len(cleaned) > MAX_SYMBOLS_PER_WATCHLIST:
+        raise WatchlistError(f"A watchlist can hold at most {MAX_SYMBOLS_PER_WATCHLIST} symbols")
+    return cleaned
+
+
+def clean_name(name):
+    """Validate a watchlist name; returns it stripped."""
+    if not isinstance(name, str) or not name.strip():
+        raise WatchlistError("name is required")
+    if len(name.strip()) > MAX_NAME_LENGTH:
+        raise WatchlistError(f"name must be at most {MAX_NAME_LENGTH} characters")
+    return name.strip()
+
+
+def _with_fallback(action, supabase_call, mock_call):
+    """Run a Supabase read, falling back to the mock database on errors."""
+    if database.using_mock:
+        return mock_call()
+    try:
+        return supabase_call(database.client)
+    except WatchlistError:
+        raise
+    except Exception as e:
+        logger.error(f"Error {action}: {str(e)}")
+        logger.warning(f"Falling back to mock database for watchlists")
+        return mock_call()
+
+
+def _write(action, supabase_call, mock_call):
+    """Run a Supabase write; errors are logged and re-raised instead of applied to the mock database."""
+    if database.using_mock:
+        return mock_call()
+    try:
+        return supabase_call(database.client)
+    except WatchlistError:
+        raise
+    except Exception as e:
+        logger.error(f"Error {action}: {str(e)}")
+        raise
+
+
+def list_watchlists(user_id):
+    """Return the user's watchlists, oldest first."""
+    return _with_fallback(
+        f"retrieving watchlists for user {user_id}",
+        lambda client: client.table('watchlists').select('*').eq('user_id', user_id).order('created_at').execute().data,
+        lambda: mock_db.get_user_watchlists(user_id),
+    )
+
+
+def get_watchlist(user_id, watchlist_id):
+    """
+    Return one of the user's watchlists.
+
+    Raises:
+        WatchlistError: 404 if the user has no such watchlist
+    """
+    for watchlist in list_watchlists(user_id):
+        if watchlist['id'] == watchlist_id:
+            return watchlist
+    raise WatchlistError("Watchlist not found", 404)
+
+
+def create_watchlist(user_id, name, symbols):
+    """
+    Create a watchlist.
+
+    Args:
+        user_id: The owner
+        name: Display name
+        symbols: List of symbols (cleaned with clean_symbols)
+
+    Returns:
+        The stored watchlist
+
+    Raises:
+        WatchlistError: If the input is invalid or the user has too many lists
+    """
+    row = {'user_id': user_id, 'name': clean_name(name), 'symbols': clean_symbols(symbols)}
+    if len(list_watchlists(user_id)) >= MAX_WATCHLISTS_PER_USER:
+        raise WatchlistError(f"At most {MAX_WATCHLISTS_PER_USER} watchlists are allowed per user")
+
+    logger.info(f"Creating watchlist '{row['name']}' for user {user_id} with {len(row['symbols'])} symbols")
+    return _write(
+        f"creating watchlist for user {user_id}",
+        lambda client: client.table('watchlists').insert(row).execute().data[0],
+        lambda: mock_db.create_watchlist(row),
+    )
+
+
+def update_watchlist(user_id, watchlist_id, name=None, symbols=None):
+    """
+    Rename a watchlist and/or replace its symbols.
+
+    Returns:
+        The updated watchlist
+
+    Raises:
+        WatchlistError: If the input is invalid or the watchlist is not the user's
+    """
+    changes = {}
+    if name is not None:
+        changes['name'] = clean_name(name)
+    if symbols is not None:
+        changes['symbols'] = clean_symbols(symbols)
+    if not changes:
+        raise WatchlistError("Provide name and/or symbols to update")
+    changes['updated_at'] = datetime.now().isoformat()
+
+    rows = _write(
+        f"updating watchlist {watchlist_id} for user {user_id}",
+        lambda client: client.table('watchlists').update(changes).eq('id', watchlist_id).eq('user_id', user_id).execute().data,
+        lambda: mock_db.update_watchlist(user_id, watchlist_id, changes),
+    )
+    if not rows:
+        raise WatchlistError("Watchlist not found", 404)
+    return rows[0]
+
+
+def delete_watchlist(user_id, watchlist_id):
+    """
+    Delete a watchlist.
+
+    Returns:
+        The deleted watchlist
+
+    Raises:
+        WatchlistError: 404 if the user has no such watchlist
+    """
+    rows = _write(
+        f"deleting watchlist {watchlist_id} for user {user_id}",
+        lambda client: client.table('watchlists').delete().eq('id', watchlist_id).eq('user_id', user_id).execute().data,
+        lambda: mock_db.delete_watchlist(user_id, watchlist_id),
+    )
+    if not rows:
+        raise WatchlistError("Watchlist not found", 404)
+    return rows[0]
@@ -0,0 +1,36 @@
+"""
+Shared process pool for CPU-bound analytics (backtest sweeps, simulations).
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """Return the shared process pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _pool
+
+
+def set_process_pool(pool):
+    """
+    Replace the shared process pool.
+
+    Args:
+        pool: An executor to use from now on, or None to recreate the default
+            one on next use
+
+    Returns:
+        The previous pool (not shut down)
+    """
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    return previous
@@ -0,0 +1,309 @@
+"""
+Write-behind persistence for transaction records.
+When TRANSACTION_WRITE_BEHIND is set, trades no longer wait on the Supabase
+insert into `transactions`. Each record is appended to a local journal file
+instead and the trade responds once the append is on disk; a background
+flusher then sends journaled records to Supabase in multi-row batches.
+
+- Appends use group commit: whichever request finds no write in progress
+  writes and fsyncs everything queued so far, so concurrent trades share
+  one fsync.
+- The flusher sends up to FLUSH_BATCH records per request, waiting at most
+  FLUSH_INTERVAL for a batch to fill. It always sends the oldest records
+  first and retries a failed batch with backoff until it succeeds, so
+  records reach Supabase in journal order and none are skipped.
+- A checkpoint file records how much of the journal has been flushed. After
+  a restart the unflushed tail is read back and sent again; records carry
+  their own id and are upserted, so a batch sent twice is not duplicated.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Records per Supabase insert
+FLUSH_BATCH = 500
+
+# How long the flusher waits for a batch to fill before sending what it has (seconds)
+FLUSH_INTERVAL = 0.25
+
+# Retry delays after a failed flush, doubling up to the maximum (seconds)
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+
+# Start a new journal once everything is flushed and the file is this large
+COMPACT_BYTES = 4 * 1024 * 1024
+
+
+class JournalWriteError(Exception):
+    """Raised when records could not be made durable in the journal."""
+
+
+class TransactionJournal:
+    """
+    Append-only journal of transaction records with group commit and a flusher.
+    """
+    def __init__(self, path, client_factory, batch_size=FLUSH_BATCH, flush_interval=FLUSH_INTERVAL):
+        """
+        Open the journal and recover records not yet flushed.
+
+        Args:
+            path: Journal file path; the checkpoint is stored next to it
+            client_factory: Callable returning the Supabase client to flush to
+            batch_size: Records per insert request
+            flush_interval: Longest wait for a batch to fill before flushing
+        """
+        self.path = path
+        self.checkpoint_path = path + ".offset"
+        self.client_factory = client_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._cond = threading.Condition()
+        self._queued = []
+        self._queued_seq = 0
+        self._durable_seq = 0
+        self._writing = False
+        self._failed = {}
+
+        # (end offset in the journal, record) for every record not yet flushed
+        self._pending = deque()
+        self._flushed_offset = self._read_checkpoint()
+        self._size = self._recover()
+        self._file = open(self.path, "ab")
+        self._flusher = None
+
+        # Stats for the health endpoint and benchmarks
+        self.appended = 0
+        self.flushed = 0
+        self.flush_requests = 0
+        self.fsyncs = 0
+        self.failures = 0
+
+        if self._pending:
+            logger.info(f"Recovered {len(self._pending)} unflushed transaction records from {self.path}")
+            with self._cond:
+                self._start_flusher()
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, offset):
+        temporary = self.checkpoint_path + ".tmp"
+        with open(temporary, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.checkpoint_path)
+        self._flushed_offset = offset
+
+    def _recover(self):
+        """Load records after the checkpoint; drop a torn final line. Returns the file size."""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                logger.warning(f"Dropping incomplete trailing record in {self.path}")
+                f.truncate(complete)
+
+        if self._flushed_offset > complete:
+            # The journal was compacted after the checkpoint was written
+            self._write_checkpoint(0)
+        offset = self._flushed_offset
+        for line in data[offset:complete].splitlines(keepends=True):
+            offset += len(line)
+            self._pending.append((offset, json.loads(line)))
+        return complete
+
+    def append(self, records):
+        """
+        Make records durable in the journal and queue them for flushing.
+
+        Blocks until the records are fsynced. Concurrent callers are written
+        and fsynced together by whichever of them starts the write.
+
+        Args:
+            records: List of transaction dicts; each needs an 'id'
+
+        Raises:
+            JournalWriteError: If writing or fsyncing the journal failed
+        """
+        lines = [json.dumps(record, separators=(",", ":")).encode() + b"\n" for record in records]
+        with self._cond:
+            self._queued.append((lines, records))
+            self._queued_seq += 1
+            seq = self._queued_seq
+
+            while self._durable_seq < seq:
+                if self._writing:
+                    self._cond.wait()
+                    continue
+
+                # Nobody is writing: write everything queued so far in one go
+                self._writing = True
+                batch, self._queued = self._queued, []
+                first, last = self._durable_seq + 1, self._queued_seq
+                self._cond.release()
+                error = None
+                try:
+                    written = self._write(batch)
+                except Exception as e:
+                    error = e
+                finally:
+                    self._cond.acquire()
+                    self._writing = False
+
+                if error is None:
+                    self._pending.extend(written)
+                    self.appended += sum(len(records) for _, records in batch)
+                    self._start_flusher()
+                else:
+                    logger.error(f"Error writing transaction journal {self.path}: {str(error)}")
+                    for failed_seq in range(first, last + 1):
+                        self._failed[failed_seq] = error
+                self._durable_seq = last
+                self._cond.notify_all()
+
+            error = self._failed.pop(seq, None)
+        if error is not None:
+            raise JournalWriteError(str(error))
+
+    def _write(self, batch):
+        """Write and fsync queued lines; returns (end offset, record) pairs."""
+        written = []
+        offset = self._size
+        for lines, records in batch:
+            for line, record in zip(lines, records):
+                offset += len(line)
+                written.append((offset, record))
+        try:
+            self._file.write(b"".join(line for lines, _ in batch for line in lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception:
+            # Cut off whatever part of the batch made it to the file
+            self._file.truncate(self._size)
+            raise
+        self.fsyncs += 1
+        self._size = offset
+        return written
+
+    def pending_for(self, user_id):
+        """Return a user's records that have not reached Supabase yet."""
+        with self._cond:
+            return [record for _, record in self._pending if record.get("user_id") == user_id]
+
+    def backlog(self):
+        """Number of records waiting to be flushed."""
+        with self._cond:
+            return len(self._pending)
+
+    def _start_flusher(self):
+        """Start the flusher thread if needed and wake it (caller holds the lock)."""
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run, name="transaction-flusher", daemon=True)
+            self._flusher.start()
+        self._cond.notify_all()
+
+    def _run(self):
+        delay = RETRY_DELAY
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._compact()
+                    self._cond.wait()
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                # Always the oldest records, so Supabase sees them in journal order
+                batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+
+            try:
+                self.flush_requests += 1
+                self.client_factory().table("transactions").upsert(
+                    [record for _, record in batch], on_conflict="id", ignore_duplicates=True
+                ).execute()
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Error flushing {len(batch)} transaction records, retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+
+            delay = RETRY_DELAY
+            with self._cond:
+                for _ in batch:
+                    self._pending.popleft()
+                self.flushed += len(batch)
+            self._write_checkpoint(batch[-1][0])
+
+    def _compact(self):
+        """Start an empty journal once everything in a large one is flushed (caller holds the lock)."""
+        if self._writing or self._queued or self._size < COMPACT_BYTES:
+            return
+        # Checkpoint first: a crash in between only re-sends flushed records,
+        # which the upsert ignores
+        self._write_checkpoint(0)
+        self._file.truncate(0)
+        self._size = 0
+
+    def stats(self):
+        with self._cond:
+            return {
+                "appended": self.appended,
+                "flushed": self.flushed,
+                "backlog": len(self._pending),
+                "flush_requests": self.flush_requests,
+                "fsyncs": self.fsyncs,
+                "failures": self.failures,
+            }
+
+
+def stamp(rows):
+    """Give transaction rows the id and timestamp Supabase would otherwise assign."""
+    created_at = datetime.now().isoformat()
+    return [dict(row, id=str(uuid.uuid4()), created_at=created_at) for row in rows]
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """
+    Return the shared journal when write-behind is enabled, else None.
+
+    Enabled by TRANSACTION_WRITE_BEHIND=1; the file is TRANSACTION_JOURNAL_PATH
+    (default: investing101-transactions.journal in the temp directory).
+    """
+    global _journal
+    if _journal is None:
+        if config.getenv("TRANSACTION_WRITE_BEHIND", "0").lower() not in ("1", "true", "yes"):
+            return None
+        with _journal_lock:
+            if _journal is None:
+                from database import database
+                path = config.getenv(
+                    "TRANSACTION_JOURNAL_PATH",
+                    os.path.join(tempfile.gettempdir(), "investing101-transactions.journal")
+                )
+                _journal = TransactionJournal(path, lambda: database.client)
+    return _journal
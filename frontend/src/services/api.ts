@@ -37,8 +37,29 @@ export const marketAPI = {
   getStockQuote: (symbol: string) =>
     fetchAPI(`/market/quote/${symbol}`),
 
-  getDailyData: (symbol: string) =>
-    fetchAPI(`/market/daily/${symbol}`),
+  getDailyData: (symbol: string, range: string = '1mo', maxPoints?: number) =>
+    fetchAPI(`/market/daily/${symbol}?range=${range}${maxPoints ? `&max_points=${maxPoints}` : ''}`),
+
+  getDailyColumnar: (symbol: string) =>
+    fetchAPI(`/market/daily/${symbol}?format=columnar`),
+
+  getIntraday: (symbol: string, interval: string = '5m', range: string = '1d', maxPoints?: number) =>
+    fetchAPI(`/market/intraday/${symbol}?interval=${interval}&range=${range}${maxPoints ? `&max_points=${maxPoints}` : ''}`),
+
+  compareSymbols: (symbols: string[], range: string = '6mo', normalize: boolean = false, maxPoints?: number) =>
+    fetchAPI(`/market/compare?symbols=${encodeURIComponent(symbols.join(','))}&range=${range}&normalize=${normalize}${maxPoints ? `&max_points=${maxPoints}` : ''}`),
+
+  getIndicators: (symbol: string, indicators: string, range: string = '6mo') =>
+    fetchAPI(`/market/indicators/${symbol}?ind=${encodeURIComponent(indicators)}&range=${range}`),
+
+  screenStocks: (filter: string, sort: string = '-return_1m', limit: number = 50) =>
+    fetchAPI(`/market/screener?filter=${encodeURIComponent(filter)}&sort=${encodeURIComponent(sort)}&limit=${limit}`),
+
+  runBacktest: (data: any) =>
+    fetchAPI(`/backtest`, {
+      method: 'POST',
+      body: JSON.stringify(data),
+    }),
 };
 
 // User data endpoints
@@ -60,17 +81,125 @@ export const userAPI = {
       body: JSON.stringify(data),
     }),
 
+  createTransactionBatch: (userId: string, transactions: any[]) =>
+    fetchAPI(`/user/transactions/batch`, {
+      method: 'POST',
+      headers: { 'user-id': userId },
+      body: JSON.stringify({ transactions }),
+    }),
+
+  placeOrder: (userId: string, data: any) =>
+    fetchAPI(`/user/orders`, {
+      method: 'POST',
+      headers: { 'user-id': userId },
+      body: JSON.stringify(data),
+    }),
+
+  getOrders: (userId: string, status?: string) =>
+    fetchAPI(`/user/orders${status ? `?status=${status}` : ''}`, {
+      headers: { 'user-id': userId }
+    }),
+
+  cancelOrder: (userId: string, orderId: string) =>
+    fetchAPI(`/user/orders/${orderId}`, {
+      method: 'DELETE',
+      headers: { 'user-id': userId }
+    }),
+
+  createAlert: (userId: string, data: any) =>
+    fetchAPI(`/user/alerts`, {
+      method: 'POST',
+      headers: { 'user-id': userId },
+      body: JSON.stringify(data),
+    }),
+
+  getAlerts: (userId: string) =>
+    fetchAPI(`/user/alerts`, {
+      headers: { 'user-id': userId }
+    }),
+
+  deleteAlert: (userId: string, alertId: string) =>
+    fetchAPI(`/user/alerts/${alertId}`, {
+      method: 'DELETE',
+      headers: { 'user-id': userId }
+    }),
+
+  getAlertEvents: (userId: string, after: number = 0) =>
+    fetchAPI(`/user/alerts/events?after=${after}`, {
+      headers: { 'user-id': userId }
+    }),
+
+  getWatchlists: (userId: string) =>
+    fetchAPI(`/user/watchlists`, {
+      headers: { 'user-id': userId }
+    }),
+
+  createWatchlist: (userId: string, name: string, symbols: string[]) =>
+    fetchAPI(`/user/watchlists`, {
+      method: 'POST',
+      headers: { 'user-id': userId },
+      body: JSON.stringify({ name, symbols }),
+    }),
+
+  updateWatchlist: (userId: string, watchlistId: string, data: { name?: string; symbols?: string[] }) =>
+    fetchAPI(`/user/watchlists/${watchlistId}`, {
+      method: 'PATCH',
+      headers: { 'user-id': userId },
+      body: JSON.stringify(data),
+    }),
+
+  deleteWatchlist: (userId: string, watchlistId: string) =>
+    fetchAPI(`/user/watchlists/${watchlistId}`, {
+      method: 'DELETE',
+      headers: { 'user-id': userId }
+    }),
+
+  getWatchlistQuotes: (userId: string, watchlistId: string) =>
+    fetchAPI(`/user/watchlists/${watchlistId}/quotes`, {
+      headers: { 'user-id': userId }
+    }),
+
+  getPortfolioHistory: (userId: string, maxPoints?: number) =>
+    fetchAPI(`/user/portfolio/history${maxPoints ? `?max_points=${maxPoints}` : ''}`, {
+      headers: { 'user-id': userId }
+    }),
+
+  getLeaderboardRank: (userId: string) =>
+    fetchAPI(`/user/leaderboard`, {
+      headers: { 'user-id': userId }
+    }),
+
+  getTradingStats: (userId: string, bucket: string = 'month') =>
+    fetchAPI(`/user/trading-stats?bucket=${bucket}`, {
+      headers: { 'user-id': userId }
+    }),
+
   getBalance: (userId: string) =>
     fetchAPI(`/user/balance`, {
       headers: { 'user-id': userId }
     }),
+
+  getProjection: (userId: string, horizon: number = 252, paths: number = 10000) =>
+    fetchAPI(`/user/projection?horizon=${horizon}&paths=${paths}`, {
+      headers: { 'user-id': userId }
+    }),
+
+  getRisk: (userId: string, benchmark: string = 'SPY', range: string = '1y') =>
+    fetchAPI(`/user/risk?benchmark=${encodeURIComponent(benchmark)}&range=${range}`, {
+      headers: { 'user-id': userId }
+    }),
 };
 
+// Leaderboard
+export const getLeaderboard = (limit: number = 10, offset: number = 0) =>
+  fetchAPI(`/leaderboard?limit=${limit}&offset=${offset}`);
+
 // Health check
 export const healthCheck = () => fetchAPI('/health');
 
 export default {
   market: marketAPI,
   user: userAPI,
+  getLeaderboard,
   healthCheck,
 };